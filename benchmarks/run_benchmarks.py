@@ -0,0 +1,220 @@
+"""
+Suite de benchmarks del kit sobre árboles sintéticos reproducibles.
+
+Cronometra las operaciones principales (búsqueda, conteo de palabras, snapshots,
+organizadores en modo simulación y real, reportes), guarda los resultados en
+JSON y los compara con una línea base para detectar regresiones. Por defecto
+los resultados y la línea base se guardan junto a este script (ver .gitignore).
+
+Uso:
+    python benchmarks/run_benchmarks.py --preset small
+    python benchmarks/run_benchmarks.py --preset medium --save-baseline
+    python benchmarks/run_benchmarks.py --files 20000 --depth 4 --repeat 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import generate_flat, generate_tree  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_FILE = os.path.join(BENCH_DIR, "benchmark_results.json")
+
+PRESETS = {
+    "small": {"files": 500, "depth": 2, "max_size": 64 * 1024},
+    "medium": {"files": 5000, "depth": 3, "max_size": 256 * 1024},
+    "large": {"files": 50000, "depth": 4, "max_size": 1024 * 1024},
+}
+
+# Una operación es una regresión si su mediana empeora más que este porcentaje
+DEFAULT_THRESHOLD = 20.0
+
+
+def _timed(func, repeat, setup=None):
+    """Mediana y mínimo (en s) de `repeat` ejecuciones; `setup` no se cronometra."""
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(*args)
+            times.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(times), "min_s": min(times), "runs": repeat}
+
+
+def run_suite(config, repeat, workdir):
+    """Genera los árboles en `workdir` y cronometra cada operación."""
+    from src import analyzer, auditor, organizer, reporter
+    from src.utils import ensure_directories
+
+    os.chdir(workdir)
+    ensure_directories()
+    tree = os.path.join(workdir, "arbol")
+    total_bytes = generate_tree(tree, **config)
+
+    text_file = max(
+        (
+            os.path.join(root, f)
+            for root, _, files in os.walk(tree)
+            for f in files
+            if f.endswith(".log")
+        ),
+        key=os.path.getsize,
+    )
+    flat_files = min(config["files"], 2000)
+    flat_counter = iter(range(1_000_000))
+
+    def _fresh_flat():
+        path = os.path.join(workdir, f"plano_{next(flat_counter)}")
+        generate_flat(path, files=flat_files, max_size=4096)
+        return (path,)
+
+    results = {}
+    results["analyze_content"] = _timed(
+        lambda: analyzer.analyze_content(tree, r"ERROR id=\d+7 ", use_cache=False),
+        repeat,
+    )
+    results["analyze_content_parallel"] = _timed(
+        lambda: analyzer.analyze_content(
+            tree, r"ERROR id=\d+7 ", parallel=True, use_cache=False
+        ),
+        repeat,
+    )
+    results["count_words"] = _timed(
+        lambda: analyzer.count_words(text_file, use_cache=False), repeat
+    )
+    results["take_snapshot"] = _timed(lambda: auditor.take_snapshot(tree), repeat)
+    results["compare_snapshot"] = _timed(lambda: auditor.compare_snapshot(tree), repeat)
+
+    flat = _fresh_flat()[0]
+    results["organize_by_extension_dry"] = _timed(
+        lambda: organizer.organize_by_extension(flat, dry_run=True), repeat
+    )
+    results["organize_by_size_dry"] = _timed(
+        lambda: organizer.organize_by_size(flat, dry_run=True), repeat
+    )
+    results["rename_by_pattern_dry"] = _timed(
+        lambda: organizer.rename_by_pattern(flat, r"archivo_", "doc_", dry_run=True),
+        repeat,
+    )
+    results["organize_by_extension"] = _timed(
+        organizer.organize_by_extension, repeat, _fresh_flat
+    )
+    results["organize_by_size"] = _timed(organizer.organize_by_size, repeat, _fresh_flat)
+    results["rename_by_pattern"] = _timed(
+        lambda path: organizer.rename_by_pattern(path, r"archivo_", "doc_"),
+        repeat,
+        _fresh_flat,
+    )
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        matches = analyzer.analyze_content(tree, r"contacto=\S+", use_cache=False)
+    results["generate_txt_report"] = _timed(
+        lambda: reporter.generate_txt_report("Benchmark", matches, "benchmark.txt"),
+        repeat,
+    )
+
+    return {
+        "config": config,
+        "total_bytes": total_bytes,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+
+
+def compare_with_baseline(current, baseline, threshold):
+    """Devuelve [(operación, base, actual, %cambio)] de las regresiones encontradas."""
+    regressions = []
+    print(f"\n{'Operación':<28} {'Base (ms)':>10} {'Actual (ms)':>12} {'Cambio':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        now_ms = result["median_s"] * 1000
+        if base is None:
+            print(f"{name:<28} {'-':>10} {now_ms:>12.1f} {'nuevo':>8}")
+            continue
+        base_ms = base["median_s"] * 1000
+        change = (now_ms - base_ms) / base_ms * 100 if base_ms else 0.0
+        flag = "  <-- REGRESIÓN" if change > threshold else ""
+        print(f"{name:<28} {base_ms:>10.1f} {now_ms:>12.1f} {change:>7.1f}%{flag}")
+        if change > threshold:
+            regressions.append((name, base_ms, now_ms, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del kit.")
+    parser.add_argument("--preset", choices=list(PRESETS), default="small")
+    parser.add_argument("--files", type=int)
+    parser.add_argument("--depth", type=int)
+    parser.add_argument("--min-size", type=int)
+    parser.add_argument("--max-size", type=int)
+    parser.add_argument("--distribution", choices=["uniform", "lognormal"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    config = dict(PRESETS[args.preset], seed=args.seed)
+    for key in ("files", "depth", "min_size", "max_size", "distribution"):
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline)
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="kit_bench_")
+    try:
+        current = run_suite(config, args.repeat, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=4)
+    print(f"Resultados guardados en {output}")
+
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=4)
+        print(f"Línea base guardada en {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        for name, result in current["results"].items():
+            print(f"{name:<28} {result['median_s'] * 1000:>10.1f} ms")
+        print("No hay línea base; use --save-baseline para crearla.")
+        return 0
+
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != current["config"]:
+        print("Aviso: la línea base se generó con otra configuración.")
+    regressions = compare_with_baseline(current, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} operaciones empeoraron más de {args.threshold}%.")
+        return 1
+    print("\nSin regresiones.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
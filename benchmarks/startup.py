@@ -0,0 +1,113 @@
+"""
+Benchmark de arranque del kit.
+
+Mide dos cosas, cada una como mediana de varias ejecuciones:
+- el tiempo de importación de src.main según `python -X importtime`;
+- el tiempo hasta que el menú interactivo muestra el primer prompt.
+
+Uso:
+    python benchmarks/startup.py [--runs N] [--output resultados.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = "Seleccione una opción".encode("utf-8")
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def parse_importtime(stderr):
+    """Devuelve {módulo: tiempo acumulado en µs} a partir de la salida de -X importtime."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:") :].split("|")
+            modules[name.strip()] = int(cumulative)
+        except ValueError:
+            continue  # Cabecera
+    return modules
+
+
+def measure_imports(cwd):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=cwd,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_first_prompt(cwd):
+    """Segundos desde el lanzamiento de main.py hasta que aparece el primer prompt."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "src", "main.py")],
+        cwd=cwd,
+        env=_env(),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    output = b""
+    try:
+        while PROMPT not in output:
+            chunk = os.read(proc.stdout.fileno(), 4096)
+            if not chunk:
+                raise RuntimeError("main.py terminó sin mostrar el menú")
+            output += chunk
+        return time.perf_counter() - start
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        import_runs = [measure_imports(cwd) for _ in range(args.runs)]
+        prompt_runs = [measure_first_prompt(cwd) for _ in range(args.runs)]
+
+    totals = [run.get("src.main", 0) for run in import_runs]
+    slowest = sorted(import_runs[-1].items(), key=lambda item: item[1], reverse=True)
+    results = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "import_src_main_us": statistics.median(totals),
+        "first_prompt_s": statistics.median(prompt_runs),
+        "slowest_imports_us": dict(slowest[:15]),
+    }
+
+    print(f"Importar src.main: {results['import_src_main_us'] / 1000:.1f} ms (mediana)")
+    print(f"Hasta el primer prompt: {results['first_prompt_s'] * 1000:.1f} ms (mediana)")
+    print("Módulos más lentos (acumulado):")
+    for name, micros in slowest[:15]:
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
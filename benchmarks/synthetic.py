@@ -0,0 +1,118 @@
+"""
+Generadores de árboles de directorios sintéticos y reproducibles para los benchmarks.
+"""
+
+import math
+import os
+import random
+
+WORDS = (
+    "error aviso usuario archivo proceso datos sistema red disco memoria "
+    "solicitud respuesta servidor cliente tiempo fecha registro valor total"
+).split()
+LEVELS = ["INFO", "INFO", "INFO", "DEBUG", "WARNING", "ERROR"]
+EXTENSIONS = {
+    ".log": 0.35,
+    ".txt": 0.25,
+    ".csv": 0.15,
+    ".jpg": 0.10,
+    ".py": 0.10,
+    "": 0.05,
+}
+
+
+def _pick_size(rng, min_size, max_size, distribution):
+    if distribution == "uniform":
+        return rng.randint(min_size, max_size)
+    # Log-normal: muchos archivos pequeños y pocos grandes, como en un disco real
+    mu = math.log(max(min_size, 1) * 4)
+    size = int(rng.lognormvariate(mu, 1.2))
+    return max(min_size, min(size, max_size))
+
+
+def _log_line(rng, n):
+    line = (
+        f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+        f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} "
+        f"{rng.choice(LEVELS)} id={n} latency={rng.randint(1, 999)} "
+        f"{' '.join(rng.choices(WORDS, k=4))}"
+    )
+    if rng.random() < 0.01:
+        line += f" contacto=user{rng.randint(1, 999)}@empresa.org"
+    return line + "\n"
+
+
+def _text_line(rng, n):
+    return " ".join(rng.choices(WORDS, k=rng.randint(5, 14))) + "\n"
+
+
+def _csv_line(rng, n):
+    status = rng.choice(["200", "200", "200", "404", "500"])
+    return f"{n},{status},{rng.randint(1, 999)},{rng.choice(WORDS)}\n"
+
+
+def _write_text(path, size, rng, make_line):
+    written = 0
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        if make_line is _csv_line:
+            f.write("id,status,latency,tag\n")
+        while written < size:
+            line = make_line(rng, n)
+            f.write(line)
+            written += len(line)
+            n += 1
+
+
+def generate_tree(
+    root,
+    files=1000,
+    depth=3,
+    fanout=4,
+    min_size=128,
+    max_size=256 * 1024,
+    distribution="lognormal",
+    seed=42,
+):
+    """
+    Crea en `root` un árbol con `files` archivos repartidos en subdirectorios de
+    hasta `depth` niveles (`fanout` subdirectorios por nivel). Los tamaños siguen
+    la distribución indicada ("uniform" o "lognormal") y el contenido es texto,
+    logs, CSV o bytes aleatorios según la extensión. Con la misma semilla se
+    obtiene siempre el mismo árbol. Devuelve el total de bytes escritos.
+    """
+    rng = random.Random(seed)
+    folders = [root]
+    level = [root]
+    for _ in range(depth):
+        level = [
+            os.path.join(parent, f"dir_{i}") for parent in level for i in range(fanout)
+        ]
+        folders.extend(level)
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+
+    extensions = list(EXTENSIONS)
+    weights = list(EXTENSIONS.values())
+    total = 0
+    for n in range(files):
+        ext = rng.choices(extensions, weights)[0]
+        folder = rng.choice(folders)
+        path = os.path.join(folder, f"archivo_{n:07d}{ext}")
+        size = _pick_size(rng, min_size, max_size, distribution)
+        if ext == ".jpg":
+            with open(path, "wb") as f:
+                f.write(rng.randbytes(size))
+        elif ext == ".log":
+            _write_text(path, size, rng, _log_line)
+        elif ext == ".csv":
+            _write_text(path, size, rng, _csv_line)
+        else:
+            _write_text(path, size, rng, _text_line)
+        total += size
+    return total
+
+
+def generate_flat(root, files=1000, seed=42, **kwargs):
+    """Árbol de un solo nivel, el que recorren los organizadores."""
+    return generate_tree(root, files=files, depth=0, seed=seed, **kwargs)
@@ -1,50 +1,1405 @@
+import contextlib
+import csv
+import heapq
+import io
+import mmap
+import operator
 import os
 import re
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from src.utils import log_execution, print_error
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from src import progress
+from src.throttle import SCHEDULER, open_read
+from src.throttle import init_worker as init_io_worker
+from src.utils import (
+    count_metric,
+    log_execution,
+    merge_counters,
+    print_error,
+    print_info,
+    print_warning,
+    stat_entry,
+    walk_files,
+    with_counters,
+)
+
+TEXT_EXTENSIONS = (".txt", ".log", ".csv")
+
+# Archivos comprimidos (se buscan si el nombre sin la extensión es de texto)
+# y archivadores cuyos miembros de texto se leen en streaming
+COMPRESSED_EXTENSIONS = (".gz", ".bz2", ".xz")
+ARCHIVE_EXTENSIONS = (
+    ".zip",
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+
+# Terminaciones de los archivos que recorren la búsqueda y el conteo
+SEARCH_EXTENSIONS = TEXT_EXTENSIONS + COMPRESSED_EXTENSIONS + ARCHIVE_EXTENSIONS
+
+# Separador entre la ruta del archivador y la del miembro en los resultados
+MEMBER_SEP = "::"
+
+# Tamaño aproximado (en bytes) de cada lote enviado a un proceso en modo paralelo
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Regex (o conjunto de patrones) compilado una sola vez por proceso trabajador
+_worker_regex = None
+_worker_pattern_set = None
+
+# Archivos más pequeños que esto se leen línea por línea (mmap no compensa)
+MMAP_MIN_SIZE = 64 * 1024
+
+# Tamaño de bloque para recorrer el buffer mapeado sin copiarlo completo
+MMAP_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Bloque de lectura del conteo de palabras (acota la memoria por proceso)
+COUNT_BLOCK_SIZE = 1024 * 1024
+
+# Tokens distintos que conserva el resumen de frecuencias (Misra-Gries)
+HEAVY_HITTERS_CAPACITY = 10000
+
+# Traducción de bytes ASCII: separador (según str.split) -> 0, resto -> 1
+_WORD_TABLE = bytes(0 if chr(i).isspace() else 1 for i in range(128)) + bytes([1] * 128)
+
+
+def _is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _compression(name):
+    """Extensión de compresión del nombre (".gz", ".bz2", ".xz") o None."""
+    lower = name.lower()
+    if lower.endswith(ARCHIVE_EXTENSIONS):
+        return None
+    return next((ext for ext in COMPRESSED_EXTENSIONS if lower.endswith(ext)), None)
+
+
+def _is_text_name(name):
+    """Indica si el nombre es de texto, quitando antes la extensión de compresión."""
+    compression = _compression(name)
+    if compression:
+        name = name[: -len(compression)]
+    return name.lower().endswith(TEXT_EXTENSIONS)
+
+
+def _split_member(path):
+    """Separa "archivador::miembro" en (archivador, miembro); (path, None) si no lo es."""
+    if MEMBER_SEP in path and not os.path.exists(path):
+        archive, _, member = path.partition(MEMBER_SEP)
+        if _is_archive(archive):
+            return archive, member
+    return path, None
+
+
+def _is_plain(path):
+    """Indica si la ruta es un archivo normal (ni comprimido, ni archivador, ni miembro)."""
+    return not (_is_archive(path) or _compression(path) or _split_member(path)[1])
+
+
+def _decompress(raw, name):
+    """Envuelve un flujo binario con el descompresor que corresponde al nombre."""
+    compression = _compression(name)
+    if compression == ".gz":
+        import gzip
+
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if compression == ".bz2":
+        import bz2
+
+        return bz2.BZ2File(raw)
+    if compression == ".xz":
+        import lzma
+
+        return lzma.LZMAFile(raw)
+    return raw
+
+
+@contextlib.contextmanager
+def open_binary(path):
+    """
+    Abre en binario un archivo normal, un archivo comprimido (.gz, .bz2, .xz)
+    o un miembro de un archivador ("datos.zip::logs/app.log"), descomprimiendo
+    en streaming, sin escribir nada a disco. Un archivador completo no se abre
+    como si fuera un archivo de texto: ValueError (sus miembros se recorren
+    con _iter_archive_members).
+    """
+    archive, member = _split_member(path)
+    if member is None and _is_archive(path):
+        raise ValueError(
+            f"{path} es un archivador: lea sus miembros como {path}{MEMBER_SEP}ruta"
+        )
+    with contextlib.ExitStack() as stack:
+        if member is None:
+            raw = stack.enter_context(open_read(path))
+        elif archive.lower().endswith(".zip"):
+            import zipfile
+
+            source = stack.enter_context(open_read(archive))
+            raw = stack.enter_context(
+                stack.enter_context(zipfile.ZipFile(source)).open(member)
+            )
+        else:
+            import tarfile
+
+            source = stack.enter_context(open_read(archive))
+            tar = stack.enter_context(tarfile.open(fileobj=source))
+            raw = tar.extractfile(member)
+            if raw is None:
+                raise IsADirectoryError(path)
+            stack.enter_context(raw)
+        yield stack.enter_context(_decompress(raw, member or path))
+
+
+def _iter_archive_members(path):
+    """
+    Recorre un archivador (.zip o .tar, comprimido o no) en una sola pasada y
+    genera (ruta_del_miembro, flujo_binario) de cada miembro de texto.
+    """
+    if path.lower().endswith(".zip"):
+        import zipfile
+
+        with open_read(path) as source, zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _is_text_name(info.filename):
+                    continue
+                with archive.open(info) as raw:
+                    yield f"{path}{MEMBER_SEP}{info.filename}", _decompress(raw, info.filename)
+        return
+
+    import tarfile
+
+    # Los miembros se leen en el orden del archivador, así que la descompresión
+    # solo avanza y el archivador se descomprime una sola vez
+    with open_read(path) as source, tarfile.open(fileobj=source, mode="r:*") as archive:
+        for info in archive:
+            if not info.isfile() or not _is_text_name(info.name):
+                continue
+            raw = archive.extractfile(info)
+            yield f"{path}{MEMBER_SEP}{info.name}", _decompress(raw, info.name)
 
 
 def read_large_file(file_path):
-    """Generador para leer archivos grandes línea por línea."""
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        for line in f:
-            yield line
+    """
+    Generador para leer archivos grandes línea por línea. Acepta también archivos
+    comprimidos y miembros de archivadores, pero no archivadores completos
+    (ver open_binary).
+    """
+    with contextlib.ExitStack() as stack:
+        if _is_plain(file_path) and not SCHEDULER.active:
+            f = stack.enter_context(open(file_path, "r", encoding="utf-8", errors="ignore"))
+        else:
+            # Con el planificador activo las lecturas pasan por él
+            binary = stack.enter_context(open_binary(file_path))
+            f = stack.enter_context(
+                io.TextIOWrapper(binary, encoding="utf-8", errors="ignore")
+            )
+        try:
+            for line in f:
+                yield line
+        finally:
+            count_metric("bytes_read", f.buffer.tell())
 
 
-@log_execution
-def search_pattern_in_file(file_path, pattern):
-    """Busca un patrón regex en un archivo y devuelve las líneas coincidentes."""
+# Clases (\s, \W, \D) que incluyen el salto de línea
+_NEWLINE_CATEGORIES = {
+    sre_parse.CATEGORY_SPACE,
+    sre_parse.CATEGORY_NOT_WORD,
+    sre_parse.CATEGORY_NOT_DIGIT,
+    sre_parse.CATEGORY_UNI_SPACE,
+    sre_parse.CATEGORY_UNI_NOT_WORD,
+    sre_parse.CATEGORY_UNI_NOT_DIGIT,
+    sre_parse.CATEGORY_LINEBREAK,
+    sre_parse.CATEGORY_UNI_LINEBREAK,
+}
+_NEWLINE = ord("\n")
+
+
+def _set_has_newline(items):
+    """Indica si un conjunto [...] ya parseado contiene el salto de línea."""
+    negate = False
+    found = False
+    for op, av in items:
+        if op is sre_parse.NEGATE:
+            negate = True
+        elif op is sre_parse.LITERAL:
+            found = found or av == _NEWLINE
+        elif op is sre_parse.RANGE:
+            found = found or av[0] <= _NEWLINE <= av[1]
+        elif op is sre_parse.CATEGORY:
+            found = found or av in _NEWLINE_CATEGORIES
+        else:
+            # Conjuntos compilados (CHARSET, BIGCHARSET...): se asume que sí
+            return True
+    return found != negate
+
+
+def _can_match_newline(pattern, flags=0):
+    """
+    Indica si alguna parte del patrón (incluidas las aserciones) puede
+    coincidir con un salto de línea. Ante cualquier construcción desconocida
+    o una referencia a un grupo se responde que sí.
+    """
+    dotall_flag = sre_parse.SRE_FLAG_DOTALL
+    repeats = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT}
+    if hasattr(sre_parse, "POSSESSIVE_REPEAT"):
+        repeats.add(sre_parse.POSSESSIVE_REPEAT)
+
+    def _walk(parsed, dotall):
+        for op, av in parsed:
+            if op is sre_parse.LITERAL:
+                if av == _NEWLINE:
+                    return True
+            elif op is sre_parse.NOT_LITERAL:
+                if av != _NEWLINE:
+                    return True
+            elif op is sre_parse.ANY:
+                if dotall:
+                    return True
+            elif op is sre_parse.IN:
+                if _set_has_newline(av):
+                    return True
+            elif op is sre_parse.AT:
+                continue
+            elif op is sre_parse.SUBPATTERN:
+                _, add_flags, del_flags, sub = av
+                sub_dotall = (dotall or bool(add_flags & dotall_flag)) and not (
+                    del_flags & dotall_flag
+                )
+                if _walk(sub, sub_dotall):
+                    return True
+            elif op is sre_parse.BRANCH:
+                if any(_walk(sub, dotall) for sub in av[1]):
+                    return True
+            elif op in repeats:
+                if _walk(av[2], dotall):
+                    return True
+            elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+                if _walk(av[1], dotall):
+                    return True
+            elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+                if _walk(av, dotall):
+                    return True
+            else:
+                return True
+        return False
+
+    parsed = sre_parse.parse(pattern, flags)
+    return _walk(parsed, bool(parsed.state.flags & dotall_flag))
+
+
+def _to_bytes_regex(regex):
+    """
+    Convierte una regex de texto en su equivalente de bytes (multilínea).
+    Devuelve None si el patrón no puede evaluarse de forma idéntica sobre bytes:
+    en particular si puede coincidir con un salto de línea (\\s, [^...], \\W,
+    (?s).), porque sobre el buffer completo cruzaría de una línea a otra.
+    """
+    pattern = regex.pattern
+    if "\\A" in pattern or "\\Z" in pattern:
+        return None
+    if not isinstance(pattern, str) or _can_match_newline(pattern, regex.flags):
+        return None
+    try:
+        return re.compile(
+            pattern.encode("ascii"), (regex.flags & ~re.UNICODE) | re.MULTILINE
+        )
+    except (UnicodeEncodeError, re.error, ValueError):
+        return None
+
+
+def _count_newlines(buffer, start, end):
+    """Cuenta los saltos de línea de buffer[start:end] por bloques."""
+    count = 0
+    while start < end:
+        stop = min(start + MMAP_BLOCK_SIZE, end)
+        count += buffer[start:stop].count(b"\n")
+        start = stop
+    return count
+
+
+def _is_plain_ascii(buffer):
+    """
+    Indica si el buffer es ASCII sin \\r. En otro caso la búsqueda sobre bytes
+    no sería equivalente (saltos de línea universales, semántica de \\w, \\d, .).
+    """
+    if buffer.find(b"\r") != -1:
+        return False
+    size = len(buffer)
+    for start in range(0, size, MMAP_BLOCK_SIZE):
+        if not buffer[start : start + MMAP_BLOCK_SIZE].isascii():
+            return False
+    return True
+
+
+def _mmap_matches(buffer, regex, bytes_regex):
+    """
+    Búsqueda rápida sobre el archivo mapeado en memoria.
+    Primero se comprueba el buffer completo una sola vez; los números de línea
+    solo se calculan alrededor de cada coincidencia. Genera (línea, texto)
+    con el texto completo de la línea, salto incluido.
+    """
+    size = len(buffer)
+    line_num = 1
+    counted_to = 0
+    match = bytes_regex.search(buffer)
+    while match:
+        hit = match.start()
+        if hit == size and (size == 0 or buffer[size - 1 : size] == b"\n"):
+            break
+        line_start = buffer.rfind(b"\n", 0, hit) + 1
+        line_end = buffer.find(b"\n", hit)
+        line_end = size if line_end == -1 else line_end + 1
+
+        line_num += _count_newlines(buffer, counted_to, line_start)
+        counted_to = line_start
+
+        # Verificación con la regex original (descarta coincidencias
+        # que en el buffer completo cruzan varias líneas)
+        line = buffer[line_start:line_end].decode("ascii")
+        if regex.search(line):
+            yield line_num, line
+
+        if line_end >= size:
+            break
+        match = bytes_regex.search(buffer, line_end)
+
+
+def _iter_file_matches(file_path, regex):
+    """
+    Genera (línea, texto) de cada línea del archivo que coincide con la regex,
+    sin recortar el texto. Usa la búsqueda sobre mmap cuando el archivo y el
+    patrón lo permiten y, si no, la lectura línea por línea en modo texto.
+    """
+    bytes_regex = _to_bytes_regex(regex) if _is_plain(file_path) else None
+    if bytes_regex is not None:
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size >= MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    if _is_plain_ascii(buffer):
+                        count_metric("bytes_read", len(buffer))
+                        # El mmap no pasa por read(): se descuenta el archivo entero
+                        SCHEDULER.acquire(len(buffer))
+                        yield from _mmap_matches(buffer, regex, bytes_regex)
+                        return
+
+    line_num = 0
+    for line in read_large_file(file_path):
+        line_num += 1
+        if regex.search(line):
+            yield line_num, line
+
+
+def _iter_source_matches(path, regex=None, strict=False):
+    """
+    Genera (ruta, línea, texto) de las líneas que coinciden con la regex (todas
+    si es None) en un archivo normal o comprimido, o en cada miembro de texto
+    de un archivador; la ruta de los miembros es "archivador::miembro".
+    Un error de lectura se avisa y termina el recorrido; con strict=True se
+    propaga, para no dar por completo un resultado parcial.
+    """
+    if _is_plain(path) and regex is not None:
+        for line_num, line in _iter_file_matches(path, regex):
+            yield path, line_num, line
+        return
+
+    try:
+        if _is_archive(path):
+            members = _iter_archive_members(path)
+        else:
+            members = [(path, None)]
+        for member_path, binary in members:
+            lines = read_large_file(path) if binary is None else io.TextIOWrapper(
+                binary, encoding="utf-8", errors="ignore"
+            )
+            for line_num, line in enumerate(lines, 1):
+                if regex is None or regex.search(line):
+                    yield member_path, line_num, line
+    except Exception as e:
+        if strict:
+            raise
+        print_warning(f"No se pudo leer {path}: {e}")
+
+
+def _search_source(path, regex):
+    """Busca la regex en un archivo o archivador y devuelve [(ruta, coincidencias)]."""
+    results = []
+    for member_path, line_num, line in _iter_source_matches(path, regex):
+        if not results or results[-1][0] != member_path:
+            results.append((member_path, []))
+        results[-1][1].append((line_num, line.strip()))
+    return results
+
+
+def _cache_params(regex):
+    return f"{regex.flags}:{regex.pattern}"
+
+
+def _cached_search_source(path, regex, cache, stamp=None):
+    """
+    _search_source con caché persistente: si el archivo no cambió desde la
+    última búsqueda del mismo patrón, se devuelve el resultado guardado sin
+    leerlo. Devuelve (resultados, acierto).
+    `stamp` debe tomarse antes de leer el archivo: si cambia durante la
+    búsqueda, el resultado queda guardado con la huella vieja y no se reutiliza.
+    """
+    params = _cache_params(regex)
+    stored = cache.get(path, "search", params, stamp)
+    if stored is not None:
+        # Las rutas se guardan relativas al archivo ("" o "::miembro")
+        results = [(path + suffix, [tuple(m) for m in found]) for suffix, found in stored]
+        return results, True
+    results = _search_source(path, regex)
+    cache.put(
+        path, "search", params, [(p[len(path) :], m) for p, m in results], stamp
+    )
+    return results, False
+
+
+def _entry_stamp(entry):
+    """Huella (tamaño, mtime_ns) de un DirEntry a partir de su stat en caché."""
+    try:
+        st = stat_entry(entry)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _entry_size(entry):
+    stamp = _entry_stamp(entry)
+    return stamp[0] if stamp else 0
+
+
+@log_execution(hot=True)
+def search_pattern_in_file(file_path, pattern, use_cache=False):
+    """
+    Busca un patrón regex en un archivo (normal, comprimido o miembro
+    "archivador::miembro") y devuelve las líneas coincidentes. Un archivador
+    completo no es un archivo de texto: se informa y no se busca en él.
+    Con `use_cache` reutiliza el resultado guardado si el archivo no cambió.
+    """
     matches = []
     try:
         regex = re.compile(pattern)
-        line_num = 0
-        for line in read_large_file(file_path):
-            line_num += 1
-            if regex.search(line):
-                matches.append((line_num, line.strip()))
     except re.error as e:
         print_error(f"Error en regex: {e}")
+        return matches
+    if _is_archive(file_path):
+        print_error(
+            f"{file_path} es un archivador: indique un miembro "
+            f"({file_path}{MEMBER_SEP}ruta) o busque en su carpeta."
+        )
+        return matches
+
+    results = None
+    if use_cache:
+        from src.cache import fingerprint, get_cache
+
+        try:
+            stamp = fingerprint(file_path)
+        except OSError:
+            pass
+        else:
+            results, _ = _cached_search_source(file_path, regex, get_cache(), stamp)
+    if results is None:
+        results = _search_source(file_path, regex)
+    # Un archivo que no es archivador da a lo sumo una entrada: la suya
+    for _, found in results:
+        matches.extend(found)
     return matches
 
 
+def _find_text_files(directory):
+    """Devuelve los DirEntry de los archivos de texto (.txt, .log, .csv) del directorio."""
+    return walk_files(directory, extensions=TEXT_EXTENSIONS)
+
+
+def _find_search_files(directory):
+    """
+    Devuelve los DirEntry de los archivos de texto, los archivos de texto
+    comprimidos (app.log.gz) y los archivadores (.zip, .tar...) del directorio.
+    """
+    for entry in walk_files(directory, extensions=SEARCH_EXTENSIONS):
+        if _is_archive(entry.name) or _is_text_name(entry.name):
+            yield entry
+
+
+def _io_worker_config(workers):
+    """Parte del presupuesto de E/S de cada proceso del pool (None si no hay límites)."""
+    return SCHEDULER.worker_config(workers) if SCHEDULER.active else None
+
+
+def _batch_files_by_size(entries, chunk_size, done=(0, 0)):
+    """
+    Agrupa archivos en lotes (rutas, bytes) de aproximadamente `chunk_size`
+    bytes. Los archivos más grandes se envían primero para equilibrar la carga.
+    `done` son los (archivos, bytes) ya contados en el progreso, p. ej. los
+    aciertos de la caché, que se suman al total.
+    """
+    sized = []
+    for entry in entries:
+        try:
+            sized.append((stat_entry(entry).st_size, entry.path))
+        except OSError:
+            continue
+    sized.sort(reverse=True)
+    progress.set_total(len(sized) + done[0], sum(size for size, _ in sized) + done[1])
+
+    batch, batch_bytes = [], 0
+    for size, filepath in sized:
+        batch.append(filepath)
+        batch_bytes += size
+        if batch_bytes >= chunk_size:
+            yield batch, batch_bytes
+            batch, batch_bytes = [], 0
+    if batch:
+        yield batch, batch_bytes
+
+
+def _worker_result(future):
+    """Resultado de un lote de un proceso hijo; sus contadores de E/S se suman a los del padre."""
+    result, counters = future.result()
+    merge_counters(counters)
+    return result
+
+
+def _init_search_worker(pattern, io_config=None):
+    """Inicializa un proceso trabajador compilando el patrón una sola vez."""
+    global _worker_regex
+    _worker_regex = re.compile(pattern)
+    if io_config is not None:
+        init_io_worker(io_config)
+
+
+def _search_batch(batch):
+    """
+    Busca el patrón del trabajador en un lote de archivos y devuelve
+    [(archivo, [(ruta, coincidencias)])], también para los archivos sin coincidencias.
+    """
+    return [(filepath, _search_source(filepath, _worker_regex)) for filepath in batch]
+
+
+def _parallel_search_sources(
+    entries, pattern, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, done=(0, 0)
+):
+    """
+    Busca un patrón en los DirEntry dados usando un pool de procesos.
+    Genera (archivo, [(ruta, coincidencias)]) a medida que terminan los lotes.
+    `done` son los (archivos, bytes) ya contados en el progreso.
+    """
+    batches = _batch_files_by_size(entries, chunk_size, done)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_search_worker,
+        initargs=(pattern, _io_worker_config(workers)),
+    ) as executor:
+        futures = {
+            executor.submit(with_counters, _search_batch, batch): (len(batch), batch_bytes)
+            for batch, batch_bytes in batches
+        }
+        for future in as_completed(futures):
+            results = _worker_result(future)
+            progress.advance(*futures[future])
+            yield from results
+
+
+def iter_parallel_search(directory, pattern, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Busca un patrón en paralelo usando un pool de procesos; los archivos
+    comprimidos y los archivadores se descomprimen también en paralelo.
+    Genera tuplas (ruta, coincidencias) a medida que terminan los lotes.
+    """
+    for _, results in _parallel_search_sources(
+        _find_search_files(directory), pattern, workers, chunk_size
+    ):
+        yield from results
+
+
+def iter_matches(
+    directory, pattern, parallel=False, workers=None, chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """
+    Variante en streaming de analyze_content: genera (ruta, línea, texto) a medida
+    que se encuentran, sin acumular los resultados, así que la memoria no depende
+    del número de coincidencias.
+    """
+    try:
+        regex = re.compile(pattern)
+    except re.error as e:
+        print_error(f"Error en regex: {e}")
+        return
+
+    if parallel:
+        for filepath, matches in iter_parallel_search(
+            directory, pattern, workers, chunk_size
+        ):
+            for line_num, line in matches:
+                yield filepath, line_num, line
+        return
+
+    for entry in _find_search_files(directory):
+        for filepath, line_num, line in _iter_source_matches(entry.path, regex):
+            yield filepath, line_num, line.strip()
+        progress.advance(1, _entry_size(entry))
+
+
 @log_execution
-def analyze_content(directory, pattern):
-    """Analiza todos los archivos de texto en un directorio buscando un patrón."""
+def analyze_content(
+    directory,
+    pattern,
+    parallel=False,
+    workers=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    use_cache=False,
+):
+    """
+    Analiza todos los archivos de texto en un directorio buscando un patrón.
+    También lee los archivos comprimidos (.gz, .bz2, .xz) y los miembros de
+    texto de los archivadores (.zip, .tar...), que aparecen en los resultados
+    como "archivador::miembro".
+    Con `parallel=True` reparte los archivos entre `workers` procesos en lotes
+    de aproximadamente `chunk_size` bytes.
+    Con `use_cache` solo se releen los archivos cuyo tamaño o fecha de
+    modificación cambió desde la última búsqueda del mismo patrón.
+    """
     results = {}
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith(".txt") or file.endswith(".log") or file.endswith(".csv"):
-                filepath = os.path.join(root, file)
-                matches = search_pattern_in_file(filepath, pattern)
-                if matches:
-                    results[filepath] = matches
+    try:
+        regex = re.compile(pattern)
+    except re.error as e:
+        print_error(f"Error en regex: {e}")
+        return results
+
+    if not use_cache:
+        if parallel:
+            for filepath, matches in iter_parallel_search(
+                directory, pattern, workers, chunk_size
+            ):
+                results[filepath] = matches
+            return results
+        for entry in _find_search_files(directory):
+            for filepath, matches in _search_source(entry.path, regex):
+                results[filepath] = matches
+            progress.advance(1, _entry_size(entry))
+        return results
+
+    from src.cache import get_cache
+
+    cache = get_cache()
+    hits = lookups = 0
+    if parallel:
+        params = _cache_params(regex)
+        stamps = {}
+        pending = []
+        cached_bytes = 0
+        for entry in _find_search_files(directory):
+            lookups += 1
+            stamp = _entry_stamp(entry)
+            stored = cache.get(entry.path, "search", params, stamp)
+            if stored is None:
+                stamps[entry.path] = stamp
+                pending.append(entry)
+                continue
+            hits += 1
+            cached_bytes += stamp[0]
+            progress.advance(1, stamp[0])
+            for suffix, matches in stored:
+                results[entry.path + suffix] = [tuple(m) for m in matches]
+        found_sources = _parallel_search_sources(
+            pending, pattern, workers, chunk_size, done=(hits, cached_bytes)
+        )
+        for source, found in found_sources:
+            cache.put(
+                source,
+                "search",
+                params,
+                [(p[len(source) :], m) for p, m in found],
+                stamps[source],
+            )
+            results.update(found)
+    else:
+        for entry in _find_search_files(directory):
+            stamp = _entry_stamp(entry)
+            found, hit = _cached_search_source(entry.path, regex, cache, stamp)
+            lookups += 1
+            hits += hit
+            results.update(found)
+            progress.advance(1, stamp[0] if stamp else 0)
+
+    if lookups:
+        print_info(
+            f"Caché: {hits} de {lookups} archivos sin releer "
+            f"({hits / lookups:.0%} de acierto)."
+        )
+    return results
+
+
+def _literal_text(pattern):
+    """Devuelve el texto del patrón si es un literal sin metacaracteres ni flags, o None."""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    if parsed.state.flags & ~sre_parse.SRE_FLAG_UNICODE:
+        return None
+    if not all(op is sre_parse.LITERAL for op, _ in parsed):
+        return None
+    return "".join(chr(av) for _, av in parsed)
+
+
+def _trie_regex(literals):
+    """
+    Regex equivalente a la alternancia de los literales, factorizada como un
+    trie ("error|errno" -> "err(?:no|or)"). El motor avanza por las ramas del
+    trie en lugar de probar cada literal en cada posición.
+    """
+    trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = None
+
+    def _emit(node):
+        end = "" in node
+        branches = [re.escape(char) + _emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if end else body
+
+    # Literales muy largos superarían el límite de recursión
+    if max(map(len, literals)) > 500:
+        return "|".join(re.escape(l) for l in sorted(literals, key=len, reverse=True))
+    return _emit(trie)
+
+
+def _uses_group_refs(pattern):
+    """Indica si el patrón usa referencias a grupos (cambiarían al combinarlo)."""
+    def _walk(parsed):
+        for op, av in parsed:
+            if op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS):
+                return True
+            for item in av if isinstance(av, (list, tuple)) else ():
+                if isinstance(item, sre_parse.SubPattern) and _walk(item):
+                    return True
+                if isinstance(item, (list, tuple)) and any(
+                    isinstance(sub, sre_parse.SubPattern) and _walk(sub) for sub in item
+                ):
+                    return True
+        return False
+
+    return _walk(sre_parse.parse(pattern))
+
+
+def compile_pattern_set(patterns):
+    """
+    Compila un conjunto de patrones para buscarlos todos en una sola lectura.
+    Devuelve (prefiltro, verificadores): el prefiltro es una única regex que
+    coincide con una línea si y solo si coincide algún patrón (los literales
+    se factorizan en un trie y el resto se combina en una alternancia); cada
+    verificador dice si su patrón coincide con una línea concreta.
+    El prefiltro es None si algún patrón no se puede combinar (flags globales
+    o referencias a grupos). Lanza re.error si un patrón no es válido.
+    """
+    literals = []
+    regexes = []
+    checks = []
+    combinable = True
+    for pattern in patterns:
+        regex = re.compile(pattern)
+        literal = _literal_text(pattern)
+        if literal is not None:
+            literals.append(literal)
+            checks.append(lambda line, literal=literal: literal in line)
+            continue
+        checks.append(regex.search)
+        if regex.flags & ~re.UNICODE or _uses_group_refs(pattern):
+            combinable = False
+        regexes.append(pattern)
+
+    if not combinable:
+        return None, checks
+    branches = [f"(?:{p})" for p in regexes]
+    if literals:
+        branches.insert(0, f"(?:{_trie_regex(literals)})")
+    try:
+        return re.compile("|".join(branches)), checks
+    except re.error:
+        return None, checks
+
+
+def _iter_file_pattern_set(file_path, prefilter, checks):
+    """
+    Lee el archivo (o archivador) una vez y genera (ruta, índice_patrón, línea,
+    texto) por cada patrón que coincide con cada línea.
+    """
+    for path, line_num, line in _iter_source_matches(file_path, prefilter):
+        text = None
+        for index, check in enumerate(checks):
+            if check(line):
+                if text is None:
+                    text = line.strip()
+                yield path, index, line_num, text
+
+
+def _init_pattern_set_worker(patterns, io_config=None):
+    """Inicializa un proceso trabajador compilando el conjunto de patrones una sola vez."""
+    global _worker_pattern_set
+    _worker_pattern_set = compile_pattern_set(patterns)
+    if io_config is not None:
+        init_io_worker(io_config)
+
+
+def _search_pattern_set_batch(batch):
+    """Busca el conjunto de patrones del trabajador en un lote de archivos."""
+    prefilter, checks = _worker_pattern_set
+    results = []
+    for filepath in batch:
+        matches = list(_iter_file_pattern_set(filepath, prefilter, checks))
+        if matches:
+            results.append(matches)
     return results
 
 
 @log_execution
-def count_words(file_path):
-    """Cuenta palabras en un archivo usando un generador."""
-    count = 0
-    for line in read_large_file(file_path):
-        count += len(line.split())
+def analyze_patterns(
+    directory, patterns, parallel=False, workers=None, chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """
+    Busca varios patrones a la vez leyendo cada archivo una sola vez.
+    Devuelve {patrón: {ruta: [(línea, texto)]}} con una entrada por patrón,
+    igual que si se llamara a analyze_content con cada uno.
+    """
+    patterns = list(dict.fromkeys(patterns))
+    results = {pattern: {} for pattern in patterns}
+    try:
+        prefilter, checks = compile_pattern_set(patterns)
+    except re.error as e:
+        print_error(f"Error en regex: {e}")
+        return results
+
+    if parallel:
+        batches = _batch_files_by_size(_find_search_files(directory), chunk_size)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_pattern_set_worker,
+            initargs=(patterns, _io_worker_config(workers)),
+        ) as executor:
+            futures = {
+                executor.submit(with_counters, _search_pattern_set_batch, batch): (
+                    len(batch),
+                    batch_bytes,
+                )
+                for batch, batch_bytes in batches
+            }
+            for future in as_completed(futures):
+                for matches in _worker_result(future):
+                    for filepath, index, line_num, line in matches:
+                        results[patterns[index]].setdefault(filepath, []).append(
+                            (line_num, line)
+                        )
+                progress.advance(*futures[future])
+        return results
+
+    for entry in _find_search_files(directory):
+        for filepath, index, line_num, line in _iter_file_pattern_set(
+            entry.path, prefilter, checks
+        ):
+            results[patterns[index]].setdefault(filepath, []).append((line_num, line))
+        progress.advance(1, _entry_size(entry))
+    return results
+
+
+def _word_cut(block):
+    """
+    Posición de un separador (espacio, tabulación o salto de línea) del bloque
+    donde puede cortarse sin partir una palabra, o -1 si no hay ninguno.
+    """
+    return max(block.rfind(b"\n"), block.rfind(b" "), block.rfind(b"\t"))
+
+
+def _align_to_word(f, pos):
+    """Avanza pos hasta el siguiente separador para que ningún trozo parta una palabra."""
+    f.seek(pos)
+    while True:
+        block = f.read(COUNT_BLOCK_SIZE)
+        if not block:
+            return pos
+        cut = min(
+            (i for i in (block.find(b"\n"), block.find(b" "), block.find(b"\t")) if i != -1),
+            default=-1,
+        )
+        if cut != -1:
+            return pos + cut
+        pos += len(block)
+
+
+def _reduce_summary(counter, capacity):
+    """
+    Reduce un Counter a `capacity` tokens restando a todos el conteo del primero
+    que queda fuera (resumen Misra-Gries: combinable y de memoria acotada).
+    """
+    if len(counter) <= capacity:
+        return counter
+    threshold = heapq.nlargest(capacity + 1, counter.values())[-1]
+    return Counter({t: c - threshold for t, c in counter.items() if c > threshold})
+
+
+def _count_stream(f, limit=None, capacity=None):
+    """
+    Cuenta palabras, líneas y bytes de un flujo binario leyendo por bloques,
+    hasta `limit` bytes o hasta el final. Con `capacity` también devuelve el
+    resumen de frecuencias de tokens (en minúsculas).
+    Los cortes entre bloques se hacen siempre en un separador.
+    """
+    words = lines = total = 0
+    summary = Counter() if capacity else None
+    carry = b""
+    remaining = limit
+    while True:
+        size = COUNT_BLOCK_SIZE if remaining is None else min(COUNT_BLOCK_SIZE, remaining)
+        block = f.read(size) if size > 0 else b""
+        total += len(block)
+        if remaining is not None:
+            remaining -= len(block)
+        data = carry + block
+        if block:
+            cut = _word_cut(data)
+            if cut == -1:
+                carry = data
+                continue
+            data, carry = data[:cut], data[cut:]
+        elif not data:
+            break
+
+        lines += data.count(b"\n")
+        if summary is None and data.isascii():
+            # Una palabra empieza en cada transición separador -> no separador
+            marks = data.translate(_WORD_TABLE)
+            words += marks.count(b"\x00\x01") + marks.startswith(b"\x01")
+        else:
+            text = data.decode("utf-8", errors="ignore")
+            if summary is None:
+                words += len(text.split())
+            else:
+                tokens = text.lower().split()
+                words += len(tokens)
+                summary.update(tokens)
+                if len(summary) > 2 * capacity:
+                    summary = _reduce_summary(summary, capacity)
+        if not block:
+            break
+
+    count_metric("bytes_read", total)
+    if summary is not None:
+        summary = _reduce_summary(summary, capacity)
+    return words, lines, total, summary
+
+
+def _count_range(file_path, start, end, capacity=None):
+    """Cuenta file_path[start:end] (ver _count_stream)."""
+    with open_read(file_path) as f:
+        f.seek(start)
+        return _count_stream(f, end - start, capacity)
+
+
+def _count_source(path, capacity=None):
+    """
+    Cuenta un archivo completo: normal, comprimido, miembro de un archivador
+    o, si es un archivador, la suma de todos sus miembros de texto.
+    """
+    if _is_plain(path):
+        return _count_range(path, 0, os.path.getsize(path), capacity)
+    if not _is_archive(path):
+        with open_binary(path) as f:
+            return _count_stream(f, None, capacity)
+
+    words = lines = total = 0
+    summary = Counter() if capacity else None
+    for _, f in _iter_archive_members(path):
+        w, l, b, s = _count_stream(f, None, capacity)
+        words, lines, total = words + w, lines + l, total + b
+        if summary is not None:
+            summary.update(s)
+    if summary is not None:
+        summary = _reduce_summary(summary, capacity)
+    return words, lines, total, summary
+
+
+def _file_ranges(file_path, size, chunk_size):
+    """
+    Divide un archivo en rangos de unos `chunk_size` bytes alineados a separadores.
+    Los comprimidos y archivadores no se pueden trocear y forman un solo rango.
+    """
+    if size <= chunk_size or not _is_plain(file_path):
+        return [(file_path, 0, size)]
+    ranges = []
+    with open(file_path, "rb") as f:
+        start = 0
+        while start < size:
+            end = _align_to_word(f, start + chunk_size) if start + chunk_size < size else size
+            ranges.append((file_path, start, end))
+            start = end
+    return ranges
+
+
+def _batch_ranges(files, chunk_size):
+    """
+    Reparte los archivos (ruta, tamaño) en lotes de rangos de unos `chunk_size`
+    bytes: los archivos grandes se trocean y los pequeños se agrupan.
+    """
+    batch, batch_bytes = [], 0
+    for file_path, size in sorted(files, key=lambda item: item[1], reverse=True):
+        for file_range in _file_ranges(file_path, size, chunk_size):
+            batch.append(file_range)
+            batch_bytes += file_range[2] - file_range[1]
+            if batch_bytes >= chunk_size:
+                yield batch
+                batch, batch_bytes = [], 0
+    if batch:
+        yield batch
+
+
+def _count_batch(batch, capacity):
+    """Cuenta un lote de rangos y combina sus resultados."""
+    words = lines = size = 0
+    summary = Counter()
+    for file_path, start, end in batch:
+        try:
+            if _is_plain(file_path):
+                w, l, b, s = _count_range(file_path, start, end, capacity)
+            else:
+                w, l, b, s = _count_source(file_path, capacity)
+        except Exception as e:
+            print_warning(f"No se pudo leer {file_path}: {e}")
+            continue
+        words, lines, size = words + w, lines + l, size + b
+        summary.update(s)
+    return words, lines, size, _reduce_summary(summary, capacity)
+
+
+@log_execution(hot=True)
+def count_words(file_path, use_cache=False):
+    """
+    Cuenta palabras en un archivo leyendo por bloques de bytes. Acepta archivos
+    comprimidos, archivadores y miembros ("datos.zip::app.log").
+    Con `use_cache` reutiliza el conteo guardado si el archivo no cambió.
+    """
+    if not use_cache:
+        return _count_source(file_path)[0]
+
+    from src.cache import fingerprint, get_cache
+
+    cache = get_cache()
+    stamp = fingerprint(file_path)
+    count = cache.get(file_path, "count_words", "", stamp)
+    if count is None:
+        count = _count_source(file_path)[0]
+        cache.put(file_path, "count_words", "", count, stamp)
     return count
+
+
+@log_execution
+def text_statistics(
+    path, top=10, parallel=False, workers=None, chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """
+    Calcula en una sola pasada palabras, líneas, bytes y los `top` tokens más
+    frecuentes de un archivo o de los archivos de texto de un directorio
+    (incluidos los comprimidos y los archivadores, descomprimidos en streaming).
+    Con `parallel=True` los archivos grandes se trocean en rangos de unos
+    `chunk_size` bytes que se cuentan en varios procesos.
+    Las frecuencias son exactas mientras el vocabulario no supere
+    HEAVY_HITTERS_CAPACITY; por encima, son cotas inferiores.
+    """
+    if os.path.isfile(path):
+        files = [(path, os.path.getsize(path))]
+    else:
+        files = []
+        for entry in _find_search_files(path):
+            try:
+                files.append((entry.path, stat_entry(entry).st_size))
+            except OSError:
+                continue
+
+    capacity = max(HEAVY_HITTERS_CAPACITY, top)
+    progress.set_total(len(files), sum(size for _, size in files))
+    batches = _batch_ranges(files, chunk_size)
+    if parallel:
+        io_config = _io_worker_config(workers)
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_io_worker if io_config else None,
+            initargs=(io_config,) if io_config else (),
+        )
+        futures = {
+            executor.submit(with_counters, _count_batch, batch, capacity): batch
+            for batch in batches
+        }
+        parts = ((futures[f], _worker_result(f)) for f in as_completed(futures))
+    else:
+        executor = None
+        parts = ((batch, _count_batch(batch, capacity)) for batch in batches)
+
+    words = lines = size = 0
+    summary = Counter()
+    try:
+        for batch, (w, l, b, s) in parts:
+            # El avance se mide sobre el tamaño en disco (comprimido, si lo está)
+            progress.advance(
+                sum(1 for _, start, _ in batch if start == 0),
+                sum(end - start for _, start, end in batch),
+            )
+            words, lines, size = words + w, lines + l, size + b
+            summary.update(s)
+            if len(summary) > 2 * capacity:
+                summary = _reduce_summary(summary, capacity)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return {
+        "files": len(files),
+        "words": words,
+        "lines": lines,
+        "bytes": size,
+        "top": _reduce_summary(summary, capacity).most_common(top),
+    }
+
+
+# Operadores de los filtros de query_table ("latencia>500", "estado==200", "ruta~^/api")
+_FILTER_RE = re.compile(r"^(.+?)\s*(==|!=|>=|<=|=|>|<|~)\s*(.*)$")
+_COMPARISONS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+
+
+def _parse_filter(expression):
+    """
+    Convierte "columna<op>valor" en (columna, función(celda) -> bool).
+    Una celda sin valor (None, de un grupo opcional de la regex de log) no
+    cumple ningún filtro.
+    """
+    match = _FILTER_RE.match(expression)
+    if not match:
+        raise ValueError(f"filtro no válido: {expression!r}")
+    column, op, value = match.group(1).strip(), match.group(2), match.group(3).strip()
+    if op == "~":
+        search = re.compile(value).search
+        return column, lambda cell: cell is not None and search(cell) is not None
+    compare = _COMPARISONS[op]
+    try:
+        number = float(value)
+    except ValueError:
+        return column, lambda cell: cell is not None and compare(cell, value)
+    # Las celdas que no son números no cumplen un filtro numérico
+    def _numeric(cell):
+        try:
+            return compare(float(cell), number)
+        except (TypeError, ValueError):
+            return False
+    return column, _numeric
+
+
+def _parse_aggregate(expression):
+    """Convierte "count", "sum:columna", "avg:columna"... en (función, columna)."""
+    name, _, column = expression.partition(":")
+    name = name.strip().lower()
+    if name not in AGGREGATES:
+        raise ValueError(f"agregado no válido: {expression!r}")
+    if name != "count" and not column:
+        raise ValueError(f"el agregado {name} necesita una columna ({name}:columna)")
+    return name, column.strip() or None
+
+
+class _GroupAccumulators:
+    """
+    Acumuladores por grupo respaldados por arrays: cada grupo recibe un índice
+    y cada estadística es un array con una posición por grupo, así que la
+    memoria crece con el número de grupos y no con el de filas.
+    """
+
+    def __init__(self, columns):
+        self.index = {}
+        self.keys = []
+        self.rows = array("q")
+        self.columns = columns
+        self.count = {c: array("q") for c in columns}
+        self.total = {c: array("d") for c in columns}
+        self.low = {c: array("d") for c in columns}
+        self.high = {c: array("d") for c in columns}
+
+    def group(self, key):
+        gid = self.index.get(key)
+        if gid is None:
+            gid = self.index[key] = len(self.keys)
+            self.keys.append(key)
+            self.rows.append(0)
+            for c in self.columns:
+                self.count[c].append(0)
+                self.total[c].append(0.0)
+                self.low[c].append(float("inf"))
+                self.high[c].append(float("-inf"))
+        return gid
+
+    def add(self, gid, column, value):
+        self.count[column][gid] += 1
+        self.total[column][gid] += value
+        if value < self.low[column][gid]:
+            self.low[column][gid] = value
+        if value > self.high[column][gid]:
+            self.high[column][gid] = value
+
+    def result(self, gid, name, column):
+        if name == "count":
+            return self.rows[gid] if column is None else self.count[column][gid]
+        count = self.count[column][gid]
+        if name == "sum":
+            return self.total[column][gid]
+        if not count:
+            return ""
+        if name == "avg":
+            return self.total[column][gid] / count
+        return self.low[column][gid] if name == "min" else self.high[column][gid]
+
+
+def _group_sort_key(key):
+    """Clave de orden de un grupo; los valores ausentes (None) van al final."""
+    values = key if isinstance(key, tuple) else (key,)
+    return tuple((value is None, "" if value is None else value) for value in values)
+
+
+@contextlib.contextmanager
+def _open_table(file_path, log_regex, delimiter):
+    """
+    Abre un archivo como tabla y devuelve (columnas, filas): para CSV la cabecera
+    y un lector csv; para logs, los grupos con nombre de la regex y las líneas
+    que coinciden. El archivo se lee con un buffer de DEFAULT_CHUNK_SIZE bytes.
+    """
+    with open(
+        file_path,
+        "r",
+        encoding="utf-8",
+        errors="ignore",
+        newline="",
+        buffering=DEFAULT_CHUNK_SIZE,
+    ) as f:
+        try:
+            if log_regex is None:
+                reader = csv.reader(f, delimiter=delimiter)
+                header = next(reader, None) or []
+                yield [column.strip() for column in header], reader
+            else:
+                names = sorted(log_regex.groupindex, key=log_regex.groupindex.get)
+                positions = [log_regex.groupindex[name] - 1 for name in names]
+                pick = operator.itemgetter(*positions)
+                if len(positions) == 1:
+                    pick = lambda groups: (groups[positions[0]],)
+                matches = filter(None, map(log_regex.search, f))
+                yield names, (pick(match.groups()) for match in matches)
+        finally:
+            count_metric("bytes_read", f.buffer.tell())
+
+
+@log_execution
+def query_table(
+    path, where=(), group_by=(), aggregates=("count",), log_regex=None, delimiter=","
+):
+    """
+    Consulta en streaming sobre archivos CSV (con cabecera) o de log: filtra
+    filas (`where`, p. ej. ["latencia>500", "metodo==GET"]), las agrupa por las
+    columnas de `group_by` y calcula los agregados (count, sum:col, avg:col,
+    min:col, max:col). Con `log_regex` cada línea de log se convierte en una
+    fila con los grupos con nombre de la regex. `path` puede ser un archivo o
+    un directorio (sus .csv, o sus .log/.txt en modo log).
+    Devuelve (cabeceras, filas) ordenadas por grupo, o None si hay errores.
+    """
+    try:
+        filters = [_parse_filter(expression) for expression in where]
+        aggs = [_parse_aggregate(expression) for expression in aggregates]
+        regex = re.compile(log_regex) if log_regex else None
+    except (ValueError, re.error) as e:
+        print_error(f"Consulta no válida: {e}")
+        return None
+    if regex is not None and not regex.groupindex:
+        print_error("La regex de log necesita grupos con nombre (?P<columna>...).")
+        return None
+
+    if os.path.isfile(path):
+        files = [path]
+    else:
+        extensions = (".csv",) if regex is None else (".log", ".txt")
+        files = [entry.path for entry in walk_files(path, extensions=extensions, sort=True)]
+
+    value_columns = sorted({column for name, column in aggs if column is not None})
+    acc = _GroupAccumulators(value_columns)
+    group_by = list(group_by)
+    skipped = 0
+
+    for file_path in files:
+        with _open_table(file_path, regex, delimiter) as (header, rows):
+            positions = {name: i for i, name in enumerate(header)}
+            missing = [
+                c for c in (*group_by, *value_columns, *(c for c, _ in filters))
+                if c not in positions
+            ]
+            if missing:
+                print_error(f"{file_path}: columnas inexistentes: {', '.join(missing)}")
+                return None
+
+            # Solo se leen de cada fila las columnas que usa la consulta
+            checks = [(positions[c], test) for c, test in filters]
+            if group_by:
+                key_of = operator.itemgetter(*(positions[c] for c in group_by))
+            else:
+                key_of = lambda row: ()
+            values = [(positions[c], c) for c in value_columns]
+            group, add, counts = acc.group, acc.add, acc.rows
+            width = len(header)
+
+            for row in rows:
+                if len(row) < width:
+                    skipped += 1
+                    continue
+                if not all(test(row[i]) for i, test in checks):
+                    continue
+                gid = group(key_of(row))
+                counts[gid] += 1
+                for i, column in values:
+                    try:
+                        add(gid, column, float(row[i]))
+                    except (TypeError, ValueError):
+                        pass
+
+    if skipped:
+        print_warning(f"Se omitieron {skipped} filas incompletas.")
+
+    headers = group_by + [name if column is None else f"{name}({column})" for name, column in aggs]
+    order = sorted(range(len(acc.keys)), key=lambda gid: _group_sort_key(acc.keys[gid]))
+    results = []
+    for gid in order:
+        key = acc.keys[gid]
+        key = (key,) if len(group_by) == 1 else tuple(key)
+        results.append([*key, *(acc.result(gid, name, column) for name, column in aggs)])
+    return headers, results
@@ -1,62 +1,1035 @@
+import datetime
+import hashlib
 import json
 import os
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from src.utils import log_execution, print_success, print_warning
+from src import progress
+from src.throttle import open_read
+from src.utils import (
+    log_execution,
+    path_sort_key,
+    print_error,
+    print_success,
+    print_warning,
+    stat_entry,
+    walk_files,
+)
 
-SNAPSHOT_FILE = os.path.join("snapshots", "snapshot.json")
+SNAPSHOT_FILE = os.path.join("snapshots", "snapshot.bin")
+LEGACY_SNAPSHOT_FILE = os.path.join("snapshots", "snapshot.json")
+HISTORY_DIR = os.path.join("snapshots", "history")
+DIGEST_CACHE_FILE = os.path.join("snapshots", "digest_cache.json")
 
+# Tamaño de bloque para calcular el hash de forma incremental
+HASH_BLOCK_SIZE = 1024 * 1024
 
-@log_execution
-def take_snapshot(directory):
+# Archivos que se envían juntos al pool de hashing durante un recorrido
+HASH_BATCH = 512
+
+# Buffer de lectura/escritura del archivo de snapshot
+SNAPSHOT_BUFFER = 1024 * 1024
+
+# Formato binario del snapshot:
+#   cabecera: MAGIC + 1 byte de flags (bit 0: incluye hash)
+#   registro: varint prefijo común con la ruta anterior, varint longitud del
+#             sufijo, sufijo (bytes), mtime_ns (int64), tamaño (uint64)
+#             y, si hay hash, el digest BLAKE2b en crudo (64 bytes)
+# Los registros se escriben ordenados según path_sort_key.
+SNAPSHOT_MAGIC = b"KITSNAP1"
+FLAG_HASH = 1
+_RECORD = struct.Struct("<qQ")
+DIGEST_SIZE = hashlib.blake2b().digest_size
+
+
+def hash_file(file_path):
+    """Calcula el hash BLAKE2b de un archivo leyéndolo por bloques."""
+    digest = hashlib.blake2b()
+    with open_read(file_path) as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _digest_key(st):
+    """
+    Clave de caché: un archivo con el mismo inodo, tamaño, mtime y ctime no
+    cambió. El ctime no se puede fijar a mano, así que una escritura que
+    restaura el mtime (touch -r, copias que conservan fechas) cambia la clave.
+    """
+    return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}:{st.st_ctime_ns}"
+
+
+class _DigestCache:
+    """
+    Caché de hashes {ruta_absoluta: [clave, hash]} de una ejecución. Recuerda
+    qué rutas se consultaron y cuáles cambiaron, y los directorios recorridos,
+    para guardar solo los cambios sobre lo que haya en disco.
+    """
+
+    def __init__(self, entries=None, roots=()):
+        self.entries = entries or {}
+        self.roots = [os.path.join(os.path.abspath(root), "") for root in roots]
+        self.touched = set()
+        self.updated = {}
+
+    def get(self, filepath, key):
+        """Hash guardado del archivo si su clave no cambió, o None."""
+        filepath = os.path.abspath(filepath)
+        self.touched.add(filepath)
+        entry = self.entries.get(filepath)
+        return entry[1] if entry is not None and entry[0] == key else None
+
+    def put(self, filepath, key, digest):
+        filepath = os.path.abspath(filepath)
+        self.entries[filepath] = self.updated[filepath] = [key, digest]
+
+    def stale(self):
+        """Rutas guardadas bajo los directorios recorridos que ya no existen."""
+        return [
+            path
+            for path in self.entries
+            if path not in self.touched
+            and path.startswith(tuple(self.roots))
+            and not os.path.lexists(path)
+        ]
+
+
+def _read_digest_file():
+    if not os.path.exists(DIGEST_CACHE_FILE):
+        return {}
+    try:
+        with open(DIGEST_CACHE_FILE, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        print_warning("La caché de hashes está dañada, se regenerará.")
+        return {}
+    # Las cachés del formato anterior ({clave: hash}) no tienen rutas
+    if not all(isinstance(entry, list) and len(entry) == 2 for entry in entries.values()):
+        return {}
+    return entries
+
+
+def _load_digest_cache(*roots):
+    """Carga la caché de hashes para una ejecución que recorre `roots`."""
+    return _DigestCache(_read_digest_file(), roots)
+
+
+def _save_digest_cache(cache):
+    """
+    Guarda los cambios de la ejecución sobre la caché que haya en disco: los
+    hashes nuevos o recalculados se añaden y se descartan los de archivos
+    borrados bajo los directorios recorridos. Los hashes de otros directorios
+    se conservan. Se escribe en un archivo temporal único que reemplaza al
+    anterior, así una interrupción o dos escrituras a la vez no dejan la caché
+    a medias.
+    """
+    stale = cache.stale()
+    if not cache.updated and not stale:
+        return
+    entries = _read_digest_file()
+    entries.update(cache.updated)
+    for path in stale:
+        entries.pop(path, None)
+
+    import tempfile
+
+    folder = os.path.dirname(DIGEST_CACHE_FILE) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_file = tempfile.mkstemp(prefix="digest_cache.", suffix=".tmp", dir=folder)
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_file, DIGEST_CACHE_FILE)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+
+def _safe_hash(filepath):
+    try:
+        return hash_file(filepath)
+    except OSError:
+        return None
+
+
+def _hash_files(stats, cache, executor):
+    """
+    Calcula en paralelo el hash de los archivos {ruta: os.stat_result}.
+    Los archivos cuya clave (inodo, tamaño, mtime_ns, ctime_ns) no cambió
+    desde que se guardó su hash en `cache` no se releen.
+    """
+    digests = {}
+    pending = []
+    cached_bytes = 0
+    for filepath, st in stats.items():
+        key = _digest_key(st)
+        digest = cache.get(filepath, key)
+        if digest is not None:
+            digests[filepath] = digest
+            cached_bytes += st.st_size
+        else:
+            pending.append((filepath, key))
+    progress.advance(0, cached_bytes)
+
+    paths = [filepath for filepath, _ in pending]
+    for (filepath, key), digest in zip(pending, executor.map(_safe_hash, paths)):
+        progress.advance(0, stats[filepath].st_size)
+        if digest is not None:
+            digests[filepath] = digest
+            cache.put(filepath, key, digest)
+    return digests
+
+
+def _encode_varint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(f):
+    value = shift = 0
+    while True:
+        byte = f.read(1)
+        if not byte:
+            raise EOFError
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+
+def _write_snapshot(records, has_hash, target=SNAPSHOT_FILE):
     """
-    Crea un snapshot del estado actual del directorio (archivos y fecha de modificación).
+    Escribe los registros (ruta, mtime_ns, tamaño, digest) en `target`
+    comprimiendo cada ruta contra la anterior. Devuelve el número de registros.
     """
-    snapshot = {}
-    for root, _, files in os.walk(directory):
-        for file in files:
-            filepath = os.path.join(root, file)
+    count = 0
+    previous = b""
+    tmp_file = target + ".tmp"
+    with open(tmp_file, "wb", buffering=SNAPSHOT_BUFFER) as f:
+        f.write(SNAPSHOT_MAGIC + bytes([FLAG_HASH if has_hash else 0]))
+        for path, mtime_ns, size, digest in records:
+            raw = os.fsencode(path)
+            common = 0
+            limit = min(len(raw), len(previous))
+            while common < limit and raw[common] == previous[common]:
+                common += 1
+            f.write(_encode_varint(common))
+            f.write(_encode_varint(len(raw) - common))
+            f.write(raw[common:])
+            f.write(_RECORD.pack(mtime_ns, size))
+            if has_hash:
+                f.write(bytes.fromhex(digest))
+            previous = raw
+            count += 1
+    os.replace(tmp_file, target)
+    return count
+
+
+def _read_snapshot(f):
+    """
+    Lee la cabecera de un snapshot abierto. Devuelve (tiene_hash, generador)
+    donde el generador produce (ruta, mtime_ns, tamaño, digest) en orden.
+    """
+    header = f.read(len(SNAPSHOT_MAGIC) + 1)
+    if header[:-1] != SNAPSHOT_MAGIC:
+        raise ValueError(f"{getattr(f, 'name', 'El archivo')} no es un snapshot válido.")
+    has_hash = bool(header[-1] & FLAG_HASH)
+
+    def _records():
+        previous = b""
+        while True:
             try:
-                mtime = os.path.getmtime(filepath)
-                snapshot[filepath] = mtime
-            except OSError:
-                continue
+                common = _read_varint(f)
+            except EOFError:
+                return
+            raw = previous[:common] + f.read(_read_varint(f))
+            mtime_ns, size = _RECORD.unpack(f.read(_RECORD.size))
+            digest = f.read(DIGEST_SIZE).hex() if has_hash else None
+            previous = raw
+            yield os.fsdecode(raw), mtime_ns, size, digest
+
+    return has_hash, _records()
+
+
+def _iter_stats(directory):
+    """Genera (ruta, os.stat_result) de los archivos del directorio, en orden."""
+    for entry in walk_files(directory, sort=True):
+        try:
+            st = stat_entry(entry)
+        except OSError:
+            continue
+        progress.advance()
+        yield entry.path, st
 
-    with open(SNAPSHOT_FILE, "w", encoding="utf-8") as f:
-        json.dump(snapshot, f, indent=4)
 
-    print_success(f"Snapshot guardado en {SNAPSHOT_FILE}")
-    return snapshot
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _snapshot_records(directory, use_hash, cache, executor):
+    """Genera los registros del snapshot a medida que se recorre el directorio."""
+    if not use_hash:
+        for filepath, st in _iter_stats(directory):
+            yield filepath, st.st_mtime_ns, st.st_size, None
+        return
+
+    for batch in _batched(_iter_stats(directory), HASH_BATCH):
+        digests = _hash_files(dict(batch), cache, executor)
+        for filepath, st in batch:
+            if filepath in digests:
+                yield filepath, st.st_mtime_ns, st.st_size, digests[filepath]
+
+
+@log_execution
+def take_snapshot(directory, use_hash=False, workers=None):
+    """
+    Crea un snapshot del estado actual del directorio (archivos, fecha de
+    modificación y tamaño) y devuelve el número de archivos registrados.
+    Con `use_hash=True` guarda además el hash BLAKE2b del contenido de cada archivo.
+    """
+    cache = _load_digest_cache(directory) if use_hash else {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        count = _write_snapshot(
+            _snapshot_records(directory, use_hash, cache, executor), use_hash
+        )
+    if use_hash:
+        _save_digest_cache(cache)
+
+    print_success(f"Snapshot guardado en {SNAPSHOT_FILE} ({count} archivos)")
+    return count
 
 
 @log_execution
-def compare_snapshot(directory):
+def compare_snapshot(directory, use_hash=False, workers=None):
     """
     Compara el estado actual con el último snapshot guardado.
+    Se recorre el directorio en orden y se cruza con el snapshot a medida que
+    se lee, sin cargar ninguno de los dos completo en memoria.
+    Con `use_hash=True` un archivo se considera modificado solo si cambió su contenido.
     """
     if not os.path.exists(SNAPSHOT_FILE):
-        print_warning("No existe un snapshot previo. Ejecute 'Tomar Snapshot' primero.")
+        if os.path.exists(LEGACY_SNAPSHOT_FILE):
+            print_warning(
+                f"{LEGACY_SNAPSHOT_FILE} usa el formato antiguo. Tome un nuevo snapshot."
+            )
+        else:
+            print_warning(
+                "No existe un snapshot previo. Ejecute 'Tomar Snapshot' primero."
+            )
+        return None
+
+    added, removed, modified = [], [], []
+    cache = _load_digest_cache(directory) if use_hash else {}
+
+    with open(SNAPSHOT_FILE, "rb", buffering=SNAPSHOT_BUFFER) as f, ThreadPoolExecutor(
+        max_workers=workers
+    ) as executor:
+        has_hash, old_records = _read_snapshot(f)
+        if use_hash and not has_hash:
+            print_warning(
+                "El snapshot previo no tiene hashes. "
+                "Se usará la fecha de modificación y el tamaño."
+            )
+        check_hash = use_hash and has_hash
+        pending = []
+        old_attrs = {}
+
+        def _flush_pending():
+            digests = _hash_files(
+                {path: st for path, st, _ in pending}, cache, executor
+            )
+            for path, st, old_digest in pending:
+                if path in digests:
+                    if digests[path] != old_digest:
+                        modified.append(path)
+                elif (st.st_mtime_ns, st.st_size) != old_attrs[path]:
+                    modified.append(path)
+            pending.clear()
+            old_attrs.clear()
+
+        old = next(old_records, None)
+        current = _iter_stats(directory)
+        cur = next(current, None)
+        while old is not None or cur is not None:
+            if cur is None or (
+                old is not None and path_sort_key(old[0]) < path_sort_key(cur[0])
+            ):
+                removed.append(old[0])
+                old = next(old_records, None)
+            elif old is None or path_sort_key(cur[0]) < path_sort_key(old[0]):
+                added.append(cur[0])
+                cur = next(current, None)
+            else:
+                path, st = cur
+                _, old_mtime_ns, old_size, old_digest = old
+                if check_hash:
+                    pending.append((path, st, old_digest))
+                    old_attrs[path] = (old_mtime_ns, old_size)
+                    if len(pending) >= HASH_BATCH:
+                        _flush_pending()
+                elif (st.st_mtime_ns, st.st_size) != (old_mtime_ns, old_size):
+                    modified.append(path)
+                old = next(old_records, None)
+                cur = next(current, None)
+        if pending:
+            _flush_pending()
+
+    if use_hash:
+        _save_digest_cache(cache)
+
+    return {"added": added, "removed": removed, "modified": modified}
+
+
+# ---------------------------------------------------------------------------
+# Historial de snapshots: un snapshot base más una cadena de deltas
+# ---------------------------------------------------------------------------
+
+
+def _history_dir(directory):
+    """Carpeta del historial de un directorio (una por ruta absoluta)."""
+    abspath = os.path.abspath(directory)
+    slug = hashlib.blake2b(os.fsencode(abspath), digest_size=8).hexdigest()
+    return os.path.join(HISTORY_DIR, slug)
+
+
+def _load_history(directory):
+    manifest = os.path.join(_history_dir(directory), "history.json")
+    if not os.path.exists(manifest):
+        return None
+    with open(manifest, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_history(directory, history):
+    manifest = os.path.join(_history_dir(directory), "history.json")
+    with open(manifest + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=4)
+    os.replace(manifest + ".tmp", manifest)
+
+
+def _snapshot_stream(path):
+    """Genera los registros de un archivo de snapshot, cerrándolo al terminar."""
+    with open(path, "rb", buffering=SNAPSHOT_BUFFER) as f:
+        _, records = _read_snapshot(f)
+        yield from records
+
+
+def _is_modified(old, new):
+    """Compara dos atributos (mtime_ns, tamaño, digest); usa el hash si lo hay."""
+    if old[2] is not None and new[2] is not None:
+        return old[2] != new[2]
+    return old[:2] != new[:2]
+
+
+def _diff_records(old_records, new_records):
+    """
+    Cruce ordenado de dos flujos de registros. Genera tuplas
+    (estado, ruta, atributos_anteriores, atributos_nuevos).
+    """
+    old = next(old_records, None)
+    new = next(new_records, None)
+    while old is not None or new is not None:
+        if new is None or (
+            old is not None and path_sort_key(old[0]) < path_sort_key(new[0])
+        ):
+            yield "removed", old[0], old[1:], None
+            old = next(old_records, None)
+        elif old is None or path_sort_key(new[0]) < path_sort_key(old[0]):
+            yield "added", new[0], None, new[1:]
+            new = next(new_records, None)
+        else:
+            if _is_modified(old[1:], new[1:]):
+                yield "modified", new[0], old[1:], new[1:]
+            old = next(old_records, None)
+            new = next(new_records, None)
+
+
+def _compose_deltas(delta_files):
+    """
+    Combina una cadena de deltas en un único cambio neto por ruta, sin
+    reconstruir los snapshots intermedios. Devuelve {ruta: (estado, antes, después)}.
+    """
+    changes = {}
+    for delta_file in delta_files:
+        with open(delta_file, "r", encoding="utf-8") as f:
+            for line in f:
+                status, path, old, new = json.loads(line)
+                old = tuple(old) if old else None
+                new = tuple(new) if new else None
+                previous = changes.get(path)
+                first = previous[0] if previous else None
+                if status == "added":
+                    if first == "removed":
+                        base = previous[1]
+                        if _is_modified(base, new):
+                            changes[path] = ("modified", base, new)
+                        else:
+                            del changes[path]
+                    else:
+                        changes[path] = ("added", None, new)
+                elif status == "removed":
+                    if first == "added":
+                        del changes[path]
+                    elif first == "modified":
+                        changes[path] = ("removed", previous[1], None)
+                    else:
+                        changes[path] = ("removed", old, None)
+                elif first == "added":
+                    changes[path] = ("added", None, new)
+                else:
+                    base = previous[1] if first == "modified" else old
+                    if _is_modified(base, new):
+                        changes[path] = ("modified", base, new)
+                    else:
+                        del changes[path]
+    return changes
+
+
+def _resolve_point(history, point):
+    """Devuelve el índice de un punto del historial dado por nombre o índice."""
+    points = history["points"]
+    if isinstance(point, int):
+        if -len(points) <= point < len(points):
+            return point % len(points)
+    else:
+        for i, entry in enumerate(points):
+            if entry["name"] == point:
+                return i
+    raise ValueError(f"El punto '{point}' no existe en el historial.")
+
+
+@log_execution
+def record_history(directory, name=None, use_hash=False, workers=None):
+    """
+    Guarda el estado actual del directorio como un nuevo punto del historial.
+    El primer punto es un snapshot base; los siguientes se guardan como deltas
+    (agregados, eliminados y modificados) respecto al punto anterior.
+    """
+    folder = _history_dir(directory)
+    os.makedirs(folder, exist_ok=True)
+    history = _load_history(directory)
+    if history is None:
+        history = {
+            "directory": os.path.abspath(directory),
+            "use_hash": use_hash,
+            "base": "base.bin",
+            "next_delta": 1,
+            "points": [],
+        }
+    use_hash = history["use_hash"]
+
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    name = name or timestamp
+    if any(entry["name"] == name for entry in history["points"]):
+        print_error(f"Ya existe un punto llamado '{name}' en el historial.")
         return None
 
-    with open(SNAPSHOT_FILE, "r", encoding="utf-8") as f:
-        old_snapshot = json.load(f)
+    head_file = os.path.join(folder, "head.bin")
+    new_head = os.path.join(folder, "head.new")
+    cache = _load_digest_cache(directory) if use_hash else {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        count = _write_snapshot(
+            _snapshot_records(directory, use_hash, cache, executor), use_hash, new_head
+        )
+    if use_hash:
+        _save_digest_cache(cache)
+
+    entry = {"name": name, "timestamp": timestamp, "files": count, "delta": None}
+    if not history["points"]:
+        os.replace(new_head, os.path.join(folder, history["base"]))
+        shutil.copyfile(os.path.join(folder, history["base"]), head_file)
+    else:
+        entry["delta"] = f"delta_{history['next_delta']:06d}.jsonl"
+        history["next_delta"] += 1
+        with open(os.path.join(folder, entry["delta"]), "w", encoding="utf-8") as f:
+            for change in _diff_records(
+                _snapshot_stream(head_file), _snapshot_stream(new_head)
+            ):
+                f.write(json.dumps(change) + "\n")
+        os.replace(new_head, head_file)
+
+    history["points"].append(entry)
+    _save_history(directory, history)
+    print_success(f"Punto '{name}' guardado en el historial ({count} archivos)")
+    return name
+
+
+def list_history(directory):
+    """Devuelve la lista de puntos del historial de un directorio."""
+    history = _load_history(directory)
+    return history["points"] if history else []
+
+
+@log_execution
+def diff_history(directory, start, end=-1):
+    """
+    Compara dos puntos del historial (por nombre o índice) combinando solo los
+    deltas que hay entre ellos. Devuelve el mismo formato que compare_snapshot.
+    """
+    history = _load_history(directory)
+    if history is None:
+        print_warning("No existe historial para este directorio.")
+        return None
+
+    first = _resolve_point(history, start)
+    last = _resolve_point(history, end)
+    folder = _history_dir(directory)
+    low, high = min(first, last), max(first, last)
+    changes = _compose_deltas(
+        os.path.join(folder, entry["delta"])
+        for entry in history["points"][low + 1 : high + 1]
+    )
+
+    diff = {"added": [], "removed": [], "modified": []}
+    for path in sorted(changes, key=path_sort_key):
+        diff[changes[path][0]].append(path)
+    if first > last:
+        diff["added"], diff["removed"] = diff["removed"], diff["added"]
+    return diff
+
+
+def _apply_changes(base_records, changes):
+    """Aplica los cambios netos a un flujo ordenado de registros."""
+    additions = sorted(
+        (path for path, change in changes.items() if change[0] == "added"),
+        key=path_sort_key,
+    )
+    pending = iter(additions)
+    add = next(pending, None)
+    for record in base_records:
+        while add is not None and path_sort_key(add) < path_sort_key(record[0]):
+            yield (add, *changes[add][2])
+            add = next(pending, None)
+        change = changes.get(record[0])
+        if change is None:
+            yield record
+        elif change[0] == "modified":
+            yield (record[0], *change[2])
+    while add is not None:
+        yield (add, *changes[add][2])
+        add = next(pending, None)
+
+
+@log_execution
+def compact_history(directory, point=-1):
+    """
+    Funde en un nuevo snapshot base todos los deltas hasta `point` (incluido).
+    Los puntos anteriores a `point` dejan de estar disponibles.
+    """
+    history = _load_history(directory)
+    if history is None:
+        print_warning("No existe historial para este directorio.")
+        return None
+
+    index = _resolve_point(history, point)
+    folder = _history_dir(directory)
+    folded = history["points"][1 : index + 1]
+    if not folded:
+        print_warning("No hay deltas que compactar.")
+        return 0
+
+    delta_files = [os.path.join(folder, entry["delta"]) for entry in folded]
+    changes = _compose_deltas(delta_files)
+    base_file = os.path.join(folder, history["base"])
+    _write_snapshot(
+        _apply_changes(_snapshot_stream(base_file), changes),
+        history["use_hash"],
+        os.path.join(folder, "base.new"),
+    )
+    os.replace(os.path.join(folder, "base.new"), base_file)
+
+    history["points"] = history["points"][index:]
+    history["points"][0]["delta"] = None
+    _save_history(directory, history)
+    for delta_file in delta_files:
+        os.remove(delta_file)
+
+    print_success(f"Historial compactado: {len(folded)} deltas fundidos en la base.")
+    return len(folded)
+
 
-    current_snapshot = {}
-    for root, _, files in os.walk(directory):
-        for file in files:
-            filepath = os.path.join(root, file)
+# ---------------------------------------------------------------------------
+# Modo vigilancia en tiempo real (inotify, solo Linux)
+# ---------------------------------------------------------------------------
+
+WATCH_EVENTS_FILE = os.path.join("snapshots", "watch_events.jsonl")
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    """Carga libc con las funciones de inotify o lanza OSError si no existen."""
+    if not sys.platform.startswith("linux"):
+        raise OSError("El modo vigilancia requiere Linux (inotify).")
+    import ctypes.util
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return libc
+
+
+def _last_event_id(events_file):
+    """Id del último evento guardado en `events_file` (-1 si no hay ninguno)."""
+    try:
+        with open(events_file, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 64 * 1024))
+            lines = f.read().splitlines()
+    except OSError:
+        return -1
+    for line in reversed(lines):
+        try:
+            return int(json.loads(line)[0])
+        except (ValueError, TypeError, IndexError):
+            continue
+    return -1
+
+
+def read_watch_events(events_file=WATCH_EVENTS_FILE, since=0):
+    """
+    Lee el registro de eventos del modo vigilancia: [(id, instante, estado, ruta)]
+    con id >= `since`. Los ids crecen entre sesiones, así que un id guardado
+    sirve de punto de referencia aunque el vigilante se haya reiniciado.
+    """
+    events = []
+    try:
+        with open(events_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = tuple(json.loads(line))
+                except ValueError:
+                    continue
+                if len(event) == 4 and event[0] >= since:
+                    events.append(event)
+    except OSError:
+        pass
+    return events
+
+
+class ChangeWatcher:
+    """
+    Mantiene en memoria un snapshot del directorio actualizado con inotify.
+    Los eventos se guardan en disco por lotes (ver read_watch_events) y
+    `changes_since` responde al instante qué cambió desde un punto marcado con
+    `mark`. En memoria solo se conservan los eventos posteriores al punto más
+    antiguo que sigue marcado (`unmark` libera un punto).
+    Si el directorio vigilado se borra o se mueve, la vigilancia se detiene.
+    Uso:
+    with ChangeWatcher("datos") as watcher:
+        watcher.mark("antes")
+        # ...
+        diff = watcher.changes_since("antes")
+    """
+
+    def __init__(
+        self,
+        directory,
+        events_file=WATCH_EVENTS_FILE,
+        flush_every=1000,
+        flush_interval=1.0,
+    ):
+        self.directory = directory
+        self.events_file = events_file
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.snapshot = {}
+        self.events = []
+        self.markers = {}
+        # Id del primer evento de `events` y del siguiente evento a registrar
+        self._first_id = 0
+        self._next_id = 0
+        self.rescans = 0
+        self.running = False
+        self.thread = None
+        self._libc = None
+        self._fd = None
+        self._watches = {}
+        self._pending = []
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    # --- Inicialización y escaneo ---
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self._watches[wd] = path
+
+    def _remove_watches(self, path):
+        """Deja de vigilar `path` y sus subdirectorios (borrados o movidos fuera)."""
+        prefix = os.path.join(path, "")
+        for wd, watched in list(self._watches.items()):
+            if watched == path or watched.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def _scan_tree(self, path):
+        """Agrega vigilancia a `path` y sus subdirectorios; devuelve sus archivos."""
+        found = {}
+        for entry in walk_files(path, on_directory=self._add_watch):
             try:
-                mtime = os.path.getmtime(filepath)
-                current_snapshot[filepath] = mtime
+                st = stat_entry(entry)
             except OSError:
                 continue
+            found[entry.path] = (st.st_mtime_ns, st.st_size)
+        return found
 
-    added = [f for f in current_snapshot if f not in old_snapshot]
-    removed = [f for f in old_snapshot if f not in current_snapshot]
-    modified = []
+    def _rescan(self):
+        """Reconstruye el snapshot tras un desbordamiento de la cola de eventos."""
+        self.rescans += 1
+        print_warning("Cola de inotify desbordada: se vuelve a escanear el directorio.")
+        current = self._scan_tree(self.directory)
+        for path, attrs in current.items():
+            old = self.snapshot.get(path)
+            if old is None:
+                self._record("added", path)
+            elif old != attrs:
+                self._record("modified", path)
+        for path in [p for p in self.snapshot if p not in current]:
+            self._record("removed", path)
+        self.snapshot = current
 
-    for f in current_snapshot:
-        if f in old_snapshot:
-            if current_snapshot[f] != old_snapshot[f]:
-                modified.append(f)
+    # --- Registro de eventos ---
 
-    return {"added": added, "removed": removed, "modified": modified}
+    def _record(self, status, path):
+        event = (self._next_id, time.time(), status, path)
+        self._next_id += 1
+        if self.markers:
+            self.events.append(event)
+        else:
+            self._first_id = self._next_id
+        self._pending.append(event)
+
+    def _trim(self):
+        """Descarta de memoria los eventos anteriores al punto más antiguo."""
+        oldest = min(self.markers.values(), default=self._next_id)
+        if oldest > self._first_id:
+            del self.events[: oldest - self._first_id]
+            self._first_id = oldest
+
+    def _flush(self, force=False):
+        """Escribe en disco los eventos pendientes por lotes."""
+        now = time.monotonic()
+        if not self._pending:
+            return
+        if (
+            not force
+            and len(self._pending) < self.flush_every
+            and now - self._last_flush < self.flush_interval
+        ):
+            return
+        with open(self.events_file, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(event) + "\n" for event in self._pending)
+        self._pending = []
+        self._last_flush = now
+
+    def _update_file(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._remove_file(path)
+            return
+        self._set_file(path, (st.st_mtime_ns, st.st_size))
+
+    def _set_file(self, path, attrs):
+        old = self.snapshot.get(path)
+        if old is None:
+            self._record("added", path)
+        elif old != attrs:
+            self._record("modified", path)
+        self.snapshot[path] = attrs
+
+    def _remove_file(self, path):
+        if self.snapshot.pop(path, None) is not None:
+            self._record("removed", path)
+
+    def _remove_tree(self, path):
+        prefix = os.path.join(path, "")
+        for filepath in [p for p in self.snapshot if p.startswith(prefix)]:
+            self._remove_file(filepath)
+
+    def _handle(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            self._rescan()
+            return
+        if mask & IN_IGNORED:
+            self._watches.pop(wd, None)
+            return
+        parent = self._watches.get(wd)
+        if parent is None:
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF) and parent == self.directory:
+            # Sin el directorio raíz no queda nada que vigilar
+            self._remove_tree(parent)
+            self._remove_watches(parent)
+            self.running = False
+            print_warning(f"{parent} se borró o se movió: se detiene la vigilancia.")
+            return
+        if mask & IN_DELETE_SELF:
+            self._remove_tree(parent)
+            self._remove_watches(parent)
+            return
+        if not name:
+            return
+        path = os.path.join(parent, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                for filepath, attrs in self._scan_tree(path).items():
+                    self._set_file(filepath, attrs)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._remove_tree(path)
+                self._remove_watches(path)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self._remove_file(path)
+        else:
+            self._update_file(path)
+
+    def _parse(self, data):
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            self._handle(wd, mask, name)
+
+    def _loop(self):
+        while self.running:
+            ready, _, _ = select.select([self._fd], [], [], 0.2)
+            with self._lock:
+                if ready:
+                    try:
+                        data = os.read(self._fd, 64 * 1024)
+                    except BlockingIOError:
+                        data = b""
+                    self._parse(data)
+                self._flush()
+
+    # --- API pública ---
+
+    def start(self):
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            import ctypes
+
+            raise OSError(ctypes.get_errno(), "No se pudo inicializar inotify")
+        # Los ids continúan los de sesiones anteriores del mismo archivo
+        self._first_id = self._next_id = _last_event_id(self.events_file) + 1
+        self.snapshot = self._scan_tree(self.directory)
+        self.mark("inicio")
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        with self._lock:
+            self._flush(force=True)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.stop()
+
+    def mark(self, name):
+        """
+        Registra (o mueve) un punto de referencia en el evento actual y
+        devuelve su id, que también sirve para read_watch_events.
+        """
+        with self._lock:
+            self.markers[name] = self._next_id
+            self._trim()
+            return self._next_id
+
+    def unmark(self, name):
+        """Libera un punto de referencia y los eventos que solo él retenía."""
+        with self._lock:
+            if self.markers.pop(name, None) is None:
+                print_error(f"No existe el punto '{name}'.")
+                return False
+            self._trim()
+            return True
+
+    def changes_since(self, name="inicio"):
+        """
+        Cambios netos desde el punto `name`, con el mismo formato que
+        compare_snapshot, calculados a partir de los eventos en memoria.
+        Devuelve None si el punto no se marcó.
+        """
+        with self._lock:
+            if name not in self.markers:
+                print_error(
+                    f"No existe el punto '{name}' "
+                    f"(puntos marcados: {', '.join(self.markers) or 'ninguno'})."
+                )
+                return None
+            events = self.events[self.markers[name] - self._first_id :]
+            first, last = {}, {}
+            for _, _, status, path in events:
+                first.setdefault(path, status)
+                last[path] = status
+
+        diff = {"added": [], "removed": [], "modified": []}
+        for path, status in first.items():
+            existed = status != "added"
+            exists = last[path] != "removed"
+            if existed and exists:
+                diff["modified"].append(path)
+            elif existed:
+                diff["removed"].append(path)
+            elif exists:
+                diff["added"].append(path)
+        return diff
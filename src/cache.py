@@ -0,0 +1,173 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.utils import count_metric
+
+CACHE_FILE = os.path.join("snapshots", "result_cache.db")
+
+# Tamaño máximo (bytes de resultados guardados) antes de desalojar por LRU
+CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Resultados más grandes que esto no se guardan (no compensa releerlos del disco)
+CACHE_MAX_ENTRY_BYTES = 8 * 1024 * 1024
+
+# Escrituras acumuladas antes de confirmar la transacción
+CACHE_COMMIT_EVERY = 1000
+
+
+def fingerprint(path):
+    """
+    Huella (tamaño, mtime_ns) del archivo. Para un miembro de un archivador
+    ("datos.zip::app.log") se usa la del archivador.
+    """
+    from src.analyzer import _split_member
+
+    st = os.stat(_split_member(path)[0])
+    return st.st_size, st.st_mtime_ns
+
+
+class ResultCache:
+    """
+    Caché persistente (SQLite) de resultados por archivo, con clave
+    (ruta, operación, parámetros) y validada por la huella (tamaño, mtime_ns):
+    si el archivo cambió, la entrada no se usa y se reemplaza al guardar.
+    Cuando el total supera `max_bytes` se desalojan las entradas usadas
+    hace más tiempo (LRU).
+    """
+
+    def __init__(self, path=CACHE_FILE, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.pending = 0
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "path TEXT, operation TEXT, params TEXT, size INTEGER, mtime_ns INTEGER, "
+            "value TEXT, bytes INTEGER, last_used INTEGER, "
+            "PRIMARY KEY (path, operation, params)) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS results_lru ON results (last_used)"
+        )
+        self.total = self.conn.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM results"
+        ).fetchone()[0]
+
+    def get(self, path, operation, params, stamp=None):
+        """
+        Devuelve el resultado guardado si la huella coincide, o None.
+        `stamp` es la huella (tamaño, mtime_ns) si ya se conoce.
+        """
+        key = (os.path.abspath(path), operation, params)
+        try:
+            size, mtime_ns = stamp or fingerprint(path)
+        except OSError:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT size, mtime_ns, value FROM results "
+                "WHERE path = ? AND operation = ? AND params = ?",
+                key,
+            ).fetchone()
+            if row is None or row[:2] != (size, mtime_ns):
+                self.misses += 1
+                count_metric("cache_misses")
+                return None
+            self.conn.execute(
+                "UPDATE results SET last_used = ? "
+                "WHERE path = ? AND operation = ? AND params = ?",
+                (time.time_ns(), *key),
+            )
+            self._written()
+            self.hits += 1
+            count_metric("cache_hits")
+        return json.loads(row[2])
+
+    def put(self, path, operation, params, value, stamp=None):
+        """Guarda el resultado de `operation` sobre el archivo con su huella actual."""
+        key = (os.path.abspath(path), operation, params)
+        try:
+            size, mtime_ns = stamp or fingerprint(path)
+        except OSError:
+            return
+        data = json.dumps(value, ensure_ascii=False)
+        if len(data) > CACHE_MAX_ENTRY_BYTES:
+            return
+        with self.lock:
+            old = self.conn.execute(
+                "SELECT bytes FROM results WHERE path = ? AND operation = ? AND params = ?",
+                key,
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, size, mtime_ns, data, len(data), time.time_ns()),
+            )
+            self.total += len(data) - (old[0] if old else 0)
+            if self.total > self.max_bytes:
+                self._evict()
+            self._written()
+
+    def _written(self):
+        self.pending += 1
+        if self.pending >= CACHE_COMMIT_EVERY:
+            self.conn.commit()
+            self.pending = 0
+
+    def _evict(self):
+        """Desaloja las entradas menos usadas hasta quedar en el 90% del límite."""
+        target = self.max_bytes * 0.9
+        victims = []
+        for path, operation, params, size in self.conn.execute(
+            "SELECT path, operation, params, bytes FROM results ORDER BY last_used"
+        ):
+            if self.total <= target:
+                break
+            victims.append((path, operation, params))
+            self.total -= size
+        self.conn.executemany(
+            "DELETE FROM results WHERE path = ? AND operation = ? AND params = ?",
+            victims,
+        )
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM results")
+            self.conn.commit()
+            self.total = 0
+
+    def stats(self):
+        """Devuelve (entradas, bytes) guardados."""
+        with self.lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return count, self.total
+
+    def close(self):
+        with self.lock:
+            if self.conn is None:
+                return
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Caché compartida del proceso; se abre en el primer uso y se cierra al salir."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+            atexit.register(_cache.close)
+    return _cache
@@ -0,0 +1,704 @@
+import argparse
+import json
+import os
+import shlex
+
+# Cada comando importa solo los subsistemas que usa, para que los arranques
+# cortos desde scripts no paguen la carga de todo el kit.
+from src.utils import print_error, print_info, print_success
+
+
+def _byte_rate(value):
+    from src.rules import parse_size
+
+    try:
+        rate = parse_size(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    if rate <= 0:
+        raise argparse.ArgumentTypeError("debe ser mayor que cero")
+    return rate
+
+
+# Opciones que afectan a todo el proceso: en un lote solo valen en la línea
+# de comandos, no en cada trabajo
+GLOBAL_OPTIONS = (
+    "metrics",
+    "profile",
+    "tracemalloc",
+    "progress",
+    "io_bps",
+    "io_ops",
+    "io_priority",
+    "io_adaptive",
+    "io_concurrency",
+)
+
+
+def _op_rate(value):
+    try:
+        rate = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"número no válido: {value!r}") from None
+    if rate <= 0:
+        raise argparse.ArgumentTypeError("debe ser mayor que cero")
+    return rate
+
+
+def build_parser():
+    """Construye el parser de la interfaz no interactiva."""
+    parser = argparse.ArgumentParser(
+        prog="kit", description="Kit multifuncional de automatización."
+    )
+    parser.add_argument(
+        "--metrics", action="store_true", help="Guardar el reporte de métricas al terminar"
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="Perfilar el comando con cProfile"
+    )
+    parser.add_argument(
+        "--tracemalloc", action="store_true", help="Registrar los mayores consumos de memoria"
+    )
+    parser.add_argument(
+        "--progress",
+        choices=["auto", "tty", "json", "quiet"],
+        default="auto",
+        help="Progreso: línea de estado, JSON en stderr o nada (auto: según la terminal)",
+    )
+    io_limits = parser.add_argument_group(
+        "límites de E/S", "Compartidos por todos los trabajos (también en batch)"
+    )
+    io_limits.add_argument(
+        "--io-bps", type=_byte_rate, metavar="TAMAÑO", help="Bytes leídos por segundo (ej: 50MB)"
+    )
+    io_limits.add_argument(
+        "--io-ops", type=_op_rate, metavar="N", help="Operaciones de E/S por segundo"
+    )
+    io_limits.add_argument(
+        "--io-priority", choices=["high", "normal", "low", "idle"], help="Prioridad de E/S (ionice)"
+    )
+    io_limits.add_argument(
+        "--io-adaptive",
+        action="store_true",
+        help="Ajustar la concurrencia según la latencia medida",
+    )
+    io_limits.add_argument(
+        "--io-concurrency", type=int, metavar="N", help="Concurrencia máxima (con --io-adaptive)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    organize = commands.add_parser("organize", help="Organizar o renombrar archivos")
+    organize.add_argument("directory")
+    organize.add_argument(
+        "--mode", choices=["extension", "size", "rename", "rules"], default="extension"
+    )
+    organize.add_argument("--rules", metavar="ARCHIVO", help="Archivo de reglas JSON (modo rules)")
+    organize.add_argument(
+        "--max-depth", type=int, help="Profundidad máxima del recorrido (modo rules)"
+    )
+    organize.add_argument("--pattern", help="Regex a buscar (modo rename)")
+    organize.add_argument("--replacement", help="Reemplazo (modo rename)")
+    organize.add_argument("--dry-run", action="store_true")
+
+    dedup = commands.add_parser("dedup", help="Buscar archivos duplicados")
+    dedup.add_argument("directory")
+    dedup.add_argument(
+        "--action",
+        choices=["report", "hardlink", "move", "delete"],
+        default="report",
+        help="Qué hacer con las copias (por defecto solo reportarlas)",
+    )
+    dedup.add_argument("--dry-run", action="store_true")
+    dedup.add_argument("--workers", type=int)
+    dedup.add_argument("--report", metavar="ARCHIVO", help="Guardar reporte TXT o CSV")
+
+    search = commands.add_parser("search", help="Buscar un patrón regex en archivos")
+    search.add_argument("directory")
+    search.add_argument("pattern")
+    search.add_argument("--parallel", action="store_true")
+    search.add_argument("--workers", type=int)
+    search.add_argument("--chunk-size", type=int, help="Bytes por lote en modo paralelo")
+    search.add_argument("--index", action="store_true", help="Usar el índice persistente")
+    search.add_argument(
+        "--no-cache", action="store_true", help="No usar la caché de resultados"
+    )
+    search.add_argument("--report", metavar="ARCHIVO", help="Guardar reporte TXT")
+    search.add_argument(
+        "--stream",
+        choices=["txt", "csv", "jsonl"],
+        help="Escribir el reporte en streaming a medida que se encuentran coincidencias",
+    )
+    search.add_argument("--compress", choices=["gzip", "zstd"])
+
+    msearch = commands.add_parser(
+        "msearch", help="Buscar varios patrones leyendo cada archivo una sola vez"
+    )
+    msearch.add_argument("directory")
+    msearch.add_argument(
+        "-e", "--pattern", dest="patterns", action="append", default=[], metavar="PATRÓN"
+    )
+    msearch.add_argument("--file", metavar="ARCHIVO", help="Patrones, uno por línea")
+    msearch.add_argument("--parallel", action="store_true")
+    msearch.add_argument("--workers", type=int)
+    msearch.add_argument("--chunk-size", type=int, help="Bytes por lote en modo paralelo")
+    msearch.add_argument("--report", metavar="ARCHIVO", help="Guardar reporte TXT")
+
+    query = commands.add_parser(
+        "query", help="Filtrar, agrupar y agregar archivos CSV o de log"
+    )
+    query.add_argument("path", help="Archivo o directorio")
+    query.add_argument(
+        "--where",
+        action="append",
+        default=[],
+        metavar="FILTRO",
+        help="Filtro columna<op>valor con op en == != > >= < <= ~ (repetible)",
+    )
+    query.add_argument(
+        "--group-by", action="append", default=[], metavar="COLUMNA", help="(repetible)"
+    )
+    query.add_argument(
+        "--agg",
+        action="append",
+        metavar="AGREGADO",
+        help="count, sum:col, avg:col, min:col o max:col (repetible, por defecto count)",
+    )
+    query.add_argument(
+        "--log-regex", metavar="REGEX", help="Regex con grupos con nombre para archivos de log"
+    )
+    query.add_argument("--delimiter", default=",")
+    query.add_argument("--output", metavar="ARCHIVO", default="consulta.csv")
+
+    count = commands.add_parser(
+        "count", help="Estadísticas de texto de un archivo o directorio"
+    )
+    count.add_argument("file", metavar="ruta")
+    count.add_argument("--top", type=int, default=10, help="Tokens más frecuentes a mostrar")
+    count.add_argument("--parallel", action="store_true")
+    count.add_argument("--workers", type=int)
+    count.add_argument("--chunk-size", type=int, help="Bytes por trozo en modo paralelo")
+
+    snapshot = commands.add_parser("snapshot", help="Tomar un snapshot")
+    snapshot.add_argument("directory")
+    snapshot.add_argument("--hash", action="store_true", help="Incluir hash de contenido")
+    snapshot.add_argument("--history", metavar="NOMBRE", help="Guardar como punto del historial")
+
+    compare = commands.add_parser("compare", help="Comparar con el último snapshot")
+    compare.add_argument("directory")
+    compare.add_argument("--hash", action="store_true", help="Comparar por contenido")
+    compare.add_argument("--report", metavar="ARCHIVO", help="Guardar reporte TXT")
+
+    report = commands.add_parser("report", help="Generar un reporte desde un archivo JSON")
+    report.add_argument("title")
+    report.add_argument("input", help="JSON con los datos (dict o lista)")
+    report.add_argument("--format", choices=["txt", "csv"], default="txt")
+    report.add_argument("--output", metavar="ARCHIVO")
+
+    cache = commands.add_parser("cache", help="Estado de la caché de resultados")
+    cache.add_argument("--clear", action="store_true", help="Vaciar la caché")
+
+    batch = commands.add_parser("batch", help="Ejecutar un archivo de trabajos")
+    batch.add_argument("jobfile", help="Un comando por línea (líneas con # se ignoran)")
+    batch.add_argument("--workers", type=int)
+
+    return parser
+
+
+def cmd_organize(args):
+    from src import organizer
+
+    if not os.path.isdir(args.directory):
+        print_error("Directorio no válido.")
+        return 1
+    if args.mode == "extension":
+        organizer.organize_by_extension(args.directory, args.dry_run)
+    elif args.mode == "size":
+        organizer.organize_by_size(args.directory, args.dry_run)
+    elif args.mode == "rules":
+        if args.rules is None:
+            print_error("El modo rules requiere --rules.")
+            return 1
+        organizer.organize_by_rules(
+            args.directory, args.rules, args.dry_run, args.max_depth
+        )
+    else:
+        if args.pattern is None or args.replacement is None:
+            print_error("El modo rename requiere --pattern y --replacement.")
+            return 1
+        organizer.rename_by_pattern(
+            args.directory, args.pattern, args.replacement, args.dry_run
+        )
+    return 0
+
+
+def cmd_dedup(args):
+    from src import dedup, organizer
+
+    if not os.path.isdir(args.directory):
+        print_error("Directorio no válido.")
+        return 1
+    if args.action != "report":
+        organizer.remove_duplicates(
+            args.directory, args.action, args.dry_run, args.workers
+        )
+        return 0
+    duplicates = dedup.find_duplicates(args.directory, args.workers)
+    if args.report:
+        dedup.report_duplicates(duplicates, args.report)
+    return 0
+
+
+def _stream_search(args):
+    from src import analyzer, reporter
+
+    matches = analyzer.iter_matches(
+        args.directory,
+        args.pattern,
+        args.parallel,
+        args.workers,
+        args.chunk_size or analyzer.DEFAULT_CHUNK_SIZE,
+    )
+    filename = args.report or f"busqueda.{args.stream}"
+    if args.stream == "txt":
+        rows = reporter.stream_txt_report(
+            f"Búsqueda de '{args.pattern}'", matches, filename, args.compress
+        )
+    elif args.stream == "csv":
+        rows = reporter.stream_csv_report(
+            matches, ["archivo", "linea", "texto"], filename, args.compress
+        )
+    else:
+        rows = reporter.stream_jsonl_report(
+            matches, ["archivo", "linea", "texto"], filename, args.compress
+        )
+    return 1 if rows is None else 0
+
+
+def cmd_search(args):
+    from src import analyzer, indexer, reporter
+
+    if not os.path.isdir(args.directory):
+        print_error("Directorio no válido.")
+        return 1
+    if args.stream:
+        if args.index:
+            print_error("--stream no se puede combinar con --index.")
+            return 1
+        return _stream_search(args)
+    if args.index:
+        results = indexer.indexed_search(args.directory, args.pattern)
+    else:
+        results = analyzer.analyze_content(
+            args.directory,
+            args.pattern,
+            args.parallel,
+            args.workers,
+            args.chunk_size or analyzer.DEFAULT_CHUNK_SIZE,
+            not args.no_cache,
+        )
+    if results:
+        print_success(f"Se encontraron coincidencias en {len(results)} archivos.")
+        if args.report:
+            reporter.generate_txt_report(
+                f"Búsqueda de '{args.pattern}'", results, args.report
+            )
+    else:
+        print_info("No se encontraron coincidencias.")
+    return 0
+
+
+def read_patterns(path):
+    """Lee un archivo de patrones (uno por línea, sin líneas vacías)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def pattern_set_summary(results):
+    """Muestra cuántas coincidencias tuvo cada patrón y devuelve los datos del reporte."""
+    data = {}
+    for pattern, files in results.items():
+        lines = [
+            f"{filepath}: {match}" for filepath, matches in files.items() for match in matches
+        ]
+        print_info(f"'{pattern}': {len(lines)} líneas en {len(files)} archivos")
+        data[pattern] = lines
+    return data
+
+
+def cmd_msearch(args):
+    from src import analyzer, reporter
+
+    if not os.path.isdir(args.directory):
+        print_error("Directorio no válido.")
+        return 1
+    patterns = list(args.patterns)
+    if args.file:
+        try:
+            patterns += read_patterns(args.file)
+        except OSError as e:
+            print_error(f"No se pudo leer {args.file}: {e}")
+            return 1
+    if not patterns:
+        print_error("Indique al menos un patrón con -e o --file.")
+        return 1
+
+    results = analyzer.analyze_patterns(
+        args.directory,
+        patterns,
+        args.parallel,
+        args.workers,
+        args.chunk_size or analyzer.DEFAULT_CHUNK_SIZE,
+    )
+    data = pattern_set_summary(results)
+    if args.report:
+        reporter.generate_txt_report(
+            f"Búsqueda de {len(patterns)} patrones", data, args.report
+        )
+    return 0
+
+
+def cmd_query(args):
+    from src import analyzer, reporter
+
+    if not os.path.exists(args.path):
+        print_error("Ruta no válida.")
+        return 1
+    result = analyzer.query_table(
+        args.path,
+        args.where,
+        args.group_by,
+        args.agg or ["count"],
+        args.log_regex,
+        args.delimiter,
+    )
+    if result is None:
+        return 1
+    headers, rows = result
+    print_success(f"{len(rows)} grupos.")
+    reporter.generate_csv_report(rows, headers, args.output)
+    return 0
+
+
+def cmd_count(args):
+    from src import analyzer
+
+    if not os.path.exists(args.file):
+        print_error("Ruta no válida.")
+        return 1
+    stats = analyzer.text_statistics(
+        args.file,
+        args.top,
+        args.parallel,
+        args.workers,
+        args.chunk_size or analyzer.DEFAULT_CHUNK_SIZE,
+    )
+    print_success(
+        f"{stats['files']} archivos: {stats['words']} palabras, "
+        f"{stats['lines']} líneas, {stats['bytes']} bytes."
+    )
+    for token, freq in stats["top"]:
+        print_info(f"{token}: {freq}")
+    return 0
+
+
+def cmd_snapshot(args):
+    from src import auditor
+
+    if not os.path.isdir(args.directory):
+        print_error("Directorio no válido.")
+        return 1
+    if args.history:
+        if auditor.record_history(args.directory, args.history, args.hash) is None:
+            return 1
+    else:
+        auditor.take_snapshot(args.directory, args.hash)
+    return 0
+
+
+def cmd_compare(args):
+    from src import auditor, reporter
+
+    if not os.path.isdir(args.directory):
+        print_error("Directorio no válido.")
+        return 1
+    diff = auditor.compare_snapshot(args.directory, args.hash)
+    if diff is None:
+        return 1
+    print_info(f"Agregados: {len(diff['added'])}")
+    print_info(f"Eliminados: {len(diff['removed'])}")
+    print_info(f"Modificados: {len(diff['modified'])}")
+    if args.report:
+        reporter.generate_txt_report("Auditoría de Cambios", diff, args.report)
+    return 0
+
+
+def cmd_report(args):
+    from src import reporter
+
+    try:
+        with open(args.input, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print_error(f"No se pudo leer {args.input}: {e}")
+        return 1
+    if args.format == "txt":
+        reporter.generate_txt_report(args.title, data, args.output or "report.txt")
+    else:
+        if not isinstance(data, list) or not data:
+            print_error("El formato CSV requiere una lista de filas con cabecera.")
+            return 1
+        reporter.generate_csv_report(data[1:], data[0], args.output or "report.csv")
+    return 0
+
+
+def cmd_cache(args):
+    from src.cache import get_cache
+
+    cache = get_cache()
+    if args.clear:
+        cache.clear()
+        print_success("Caché de resultados vaciada.")
+        return 0
+    entries, size = cache.stats()
+    print_info(f"Caché de resultados: {entries} entradas, {size} bytes.")
+    return 0
+
+
+def _job_resources(args):
+    """
+    Recursos que usa un comando: los archivos compartidos que escribe
+    ("snapshot", "digest", "index", "cache") y la ruta sobre la que trabaja.
+    """
+    shared = set()
+    # Todos comparten el mismo archivo de snapshot / base de datos del índice
+    if args.command == "compare" or (args.command == "snapshot" and not args.history):
+        shared.add("snapshot")
+    # La caché de hashes de contenido (digest_cache.json)
+    if args.command == "dedup" or getattr(args, "hash", False):
+        shared.add("digest")
+    if args.command == "search" and args.index:
+        shared.add("index")
+    if args.command == "cache":
+        return {"cache"}, None
+    target = (
+        getattr(args, "directory", None)
+        or getattr(args, "file", None)
+        or getattr(args, "path", None)
+        or ""
+    )
+    if (getattr(args, "file", None) or getattr(args, "path", None)) and not os.path.isdir(
+        target
+    ):
+        target = os.path.dirname(target)
+    return shared, os.path.join(os.path.abspath(target), "")
+
+
+def _group_jobs(jobs):
+    """
+    Reparte los trabajos en grupos independientes. Dos trabajos van al mismo
+    grupo (y se ejecutan en orden) si escriben el mismo archivo compartido o si
+    la ruta de uno contiene a la del otro; los grupos se ejecutan en paralelo.
+    """
+    groups = []
+    for line_num, job in jobs:
+        shared, path = _job_resources(job)
+        paths = [path] if path else []
+        jobs_in_order, independent = [], []
+        for group in groups:
+            if group["shared"] & shared or any(
+                p.startswith(other) or other.startswith(p)
+                for p in paths
+                for other in group["paths"]
+            ):
+                shared = shared | group["shared"]
+                paths = paths + group["paths"]
+                jobs_in_order.extend(group["jobs"])
+            else:
+                independent.append(group)
+        jobs_in_order.sort(key=lambda item: item[0])
+        jobs_in_order.append((line_num, job))
+        independent.append({"shared": shared, "paths": paths, "jobs": jobs_in_order})
+        groups = independent
+    return [group["jobs"] for group in groups]
+
+
+def _run_group(jobs):
+    failures = 0
+    for line_num, args in jobs:
+        try:
+            code = COMMANDS[args.command](args)
+        except Exception as e:
+            print_error(f"Trabajo de la línea {line_num} falló: {e}")
+            code = 1
+        failures += code != 0
+    return failures
+
+
+def cmd_batch(args):
+    from concurrent.futures import ThreadPoolExecutor
+
+    parser = build_parser()
+    jobs = []
+    try:
+        with open(args.jobfile, "r", encoding="utf-8") as f:
+            lines = list(f)
+    except OSError as e:
+        print_error(f"No se pudo leer {args.jobfile}: {e}")
+        return 1
+
+    for line_num, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            job = parser.parse_args(shlex.split(line))
+        except SystemExit:
+            print_error(f"Línea {line_num} inválida: {line}")
+            return 1
+        if job.command == "batch":
+            print_error(f"Línea {line_num}: no se permiten lotes anidados.")
+            return 1
+        options = [
+            "--" + name.replace("_", "-")
+            for name in GLOBAL_OPTIONS
+            if getattr(job, name) != parser.get_default(name)
+        ]
+        if options:
+            print_error(
+                f"Línea {line_num}: {', '.join(options)} se aplica a todo el lote; "
+                "páselo antes de 'batch' en la línea de comandos."
+            )
+            return 1
+        jobs.append((line_num, job))
+
+    groups = _group_jobs(jobs)
+    total = len(jobs)
+    if args.profile:
+        # cProfile solo mide el hilo principal: los trabajos se ejecutan en serie
+        print_info("Con --profile los trabajos se ejecutan en serie.")
+        failures = sum(map(_run_group, groups))
+    else:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            failures = sum(executor.map(_run_group, groups))
+
+    if failures:
+        print_error(f"Lote terminado: {failures} de {total} trabajos fallaron.")
+        return 1
+    print_success(f"Lote terminado: {total} trabajos completados.")
+    return 0
+
+
+COMMANDS = {
+    "organize": cmd_organize,
+    "dedup": cmd_dedup,
+    "search": cmd_search,
+    "msearch": cmd_msearch,
+    "query": cmd_query,
+    "count": cmd_count,
+    "snapshot": cmd_snapshot,
+    "compare": cmd_compare,
+    "report": cmd_report,
+    "cache": cmd_cache,
+    "batch": cmd_batch,
+}
+
+
+def _write_profile(profiler, command):
+    import io
+    import pstats
+
+    from src.reporter import REPORT_DIR
+
+    path = os.path.join(REPORT_DIR, f"profile_{command}.prof")
+    profiler.dump_stats(path)
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(20)
+    with open(path[: -len(".prof")] + ".txt", "w", encoding="utf-8") as f:
+        f.write(stream.getvalue())
+    print_success(f"Perfil guardado en {path}")
+
+
+def _write_tracemalloc(command):
+    import tracemalloc
+
+    from src.reporter import REPORT_DIR
+
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    path = os.path.join(REPORT_DIR, f"memoria_{command}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Memoria actual: {current} bytes, pico: {peak} bytes\n\n")
+        for stat in snapshot.statistics("lineno")[:25]:
+            f.write(f"{stat}\n")
+    print_success(f"Consumo de memoria guardado en {path}")
+
+
+def _progress_scope(args):
+    """Progreso del comando; el recorrido previo estima el total cuando hace falta."""
+    import contextlib
+
+    from src.progress import Progress
+
+    if args.command in ("search", "msearch"):
+        from src.analyzer import SEARCH_EXTENSIONS
+
+        return Progress("Buscando...", args.directory, SEARCH_EXTENSIONS)
+    if args.command in ("snapshot", "compare"):
+        return Progress("Recorriendo...", args.directory)
+    messages = {
+        "organize": "Organizando...",
+        "dedup": "Buscando duplicados...",
+        "count": "Contando...",
+        "query": "Consultando...",
+    }
+    if args.command in messages:
+        # El total lo fijan el plan de movimientos o el conteo
+        return Progress(messages[args.command])
+    return contextlib.nullcontext()
+
+
+def run(argv):
+    """Ejecuta la interfaz no interactiva y devuelve el código de salida."""
+    args = build_parser().parse_args(argv)
+    from src import progress
+
+    progress.configure(args.progress)
+    if args.io_bps or args.io_ops or args.io_priority or args.io_adaptive:
+        from src.throttle import SCHEDULER
+
+        if not SCHEDULER.configure(
+            bytes_per_sec=args.io_bps,
+            ops_per_sec=args.io_ops,
+            priority=args.io_priority,
+            adaptive=args.io_adaptive,
+            max_concurrency=args.io_concurrency,
+        ):
+            return 1
+
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    if args.tracemalloc:
+        import tracemalloc
+
+        tracemalloc.start()
+
+    try:
+        if profiler:
+            profiler.enable()
+        with _progress_scope(args):
+            return COMMANDS[args.command](args)
+    finally:
+        if profiler:
+            profiler.disable()
+            _write_profile(profiler, args.command)
+        if args.tracemalloc:
+            _write_tracemalloc(args.command)
+        if args.metrics:
+            from src import reporter
+            from src.utils import get_metrics
+
+            reporter.generate_metrics_report(get_metrics(), f"metricas_{args.command}")
@@ -0,0 +1,138 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.auditor import _hash_files, _load_digest_cache, _save_digest_cache
+from src.throttle import open_read
+from src.utils import log_execution, print_info, print_success, stat_entry, walk_files
+
+# Carpeta (dentro del directorio analizado) a la que se mueven los duplicados
+DUPLICATES_DIR = "_duplicados"
+
+# Bytes del inicio y del final del archivo que entran en el hash parcial
+PARTIAL_BLOCK_SIZE = 64 * 1024
+
+
+def _group_by_size(directory):
+    """
+    Agrupa los archivos por tamaño: {tamaño: {ruta: os.stat_result}}.
+    Se ignoran los archivos vacíos, los enlaces simbólicos, la carpeta de
+    duplicados y los enlaces duros a un inodo ya visto (no ocupan espacio extra).
+    """
+    skip = os.path.join(directory, DUPLICATES_DIR, "")
+    by_size = {}
+    inodes = set()
+    for entry in walk_files(directory, sort=True):
+        if entry.path.startswith(skip):
+            continue
+        try:
+            if entry.is_symlink():
+                continue
+            st = stat_entry(entry)
+        except OSError:
+            continue
+        if st.st_size == 0 or (st.st_dev, st.st_ino) in inodes:
+            continue
+        inodes.add((st.st_dev, st.st_ino))
+        by_size.setdefault(st.st_size, {})[entry.path] = st
+    return by_size
+
+
+def _partial_hash(item):
+    """
+    Hash BLAKE2b del primer y el último bloque del archivo. Si el archivo cabe
+    en esos dos bloques, el hash cubre todo su contenido.
+    """
+    filepath, size = item
+    digest = hashlib.blake2b()
+    try:
+        with open_read(filepath) as f:
+            digest.update(f.read(PARTIAL_BLOCK_SIZE))
+            if size > PARTIAL_BLOCK_SIZE:
+                f.seek(max(PARTIAL_BLOCK_SIZE, size - PARTIAL_BLOCK_SIZE))
+                digest.update(f.read(PARTIAL_BLOCK_SIZE))
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _split_groups(groups, keys):
+    """Parte cada grupo {ruta: stat} según keys[ruta]; descarta los que quedan solos."""
+    result = []
+    for group in groups:
+        buckets = {}
+        for filepath, st in group.items():
+            key = keys.get(filepath)
+            if key is not None:
+                buckets.setdefault(key, {})[filepath] = st
+        result.extend(b for b in buckets.values() if len(b) > 1)
+    return result
+
+
+@log_execution
+def find_duplicates(directory, workers=None):
+    """
+    Busca archivos con el mismo contenido en tres etapas, cada una sobre los
+    candidatos que dejó la anterior:
+    1. tamaño (sin leer los archivos);
+    2. hash parcial del primer y último bloque;
+    3. hash completo (con la caché de hashes del auditor).
+    Los hashes se calculan en paralelo. Devuelve una lista de grupos
+    (tamaño, [rutas], {ruta: os.stat_result}), de mayor a menor espacio
+    recuperable; la primera ruta de cada grupo es la que se conserva.
+    """
+    groups = [g for g in _group_by_size(directory).values() if len(g) > 1]
+    print_info(f"Candidatos por tamaño: {sum(len(g) for g in groups)} archivos.")
+
+    cache = _load_digest_cache(directory)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        items = [(p, st.st_size) for g in groups for p, st in g.items()]
+        partial = dict(
+            zip((p for p, _ in items), executor.map(_partial_hash, items))
+        )
+        groups = _split_groups(groups, partial)
+        print_info(f"Candidatos por hash parcial: {sum(len(g) for g in groups)} archivos.")
+
+        # Los archivos que caben en el hash parcial ya están comparados por completo
+        complete, pending = [], []
+        for group in groups:
+            size = next(iter(group.values())).st_size
+            (complete if size <= 2 * PARTIAL_BLOCK_SIZE else pending).append(group)
+        stats = {p: st for g in pending for p, st in g.items()}
+        groups = complete + _split_groups(pending, _hash_files(stats, cache, executor))
+    _save_digest_cache(cache)
+
+    duplicates = []
+    for group in groups:
+        paths = sorted(group)
+        duplicates.append((group[paths[0]].st_size, paths, group))
+    duplicates.sort(key=lambda d: (-d[0] * (len(d[1]) - 1), d[1][0]))
+
+    wasted = sum(size * (len(paths) - 1) for size, paths, _ in duplicates)
+    print_success(
+        f"{len(duplicates)} grupos de duplicados, {wasted} bytes recuperables."
+    )
+    return duplicates
+
+
+@log_execution
+def report_duplicates(duplicates, filename="duplicados.txt"):
+    """Genera el reporte de duplicados (TXT o, si filename termina en .csv, CSV)."""
+    from src import reporter
+
+    if filename.endswith(".csv"):
+        rows = [
+            (group, size, filepath, "original" if i == 0 else "duplicado")
+            for group, (size, paths, _) in enumerate(duplicates, 1)
+            for i, filepath in enumerate(paths)
+        ]
+        reporter.generate_csv_report(
+            rows, ["grupo", "tamaño", "ruta", "estado"], filename
+        )
+        return
+
+    data = {
+        f"Grupo {i} ({size} bytes, {len(paths) - 1} duplicados)": paths
+        for i, (size, paths, _) in enumerate(duplicates, 1)
+    }
+    reporter.generate_txt_report("Archivos duplicados", data, filename)
@@ -0,0 +1,227 @@
+import os
+import re
+import sqlite3
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from src.analyzer import _find_search_files, _iter_source_matches, _search_source
+from src.utils import log_execution, print_error, print_info, stat_entry
+
+INDEX_FILE = os.path.join("snapshots", "content_index.db")
+
+# Número máximo de filas de postings enviadas a SQLite en cada lote
+INSERT_BATCH = 50000
+
+
+def _connect():
+    """Abre (y crea si hace falta) la base de datos del índice."""
+    os.makedirs(os.path.dirname(INDEX_FILE) or ".", exist_ok=True)
+    conn = sqlite3.connect(INDEX_FILE)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+    if columns and "ctime_ns" not in columns:
+        # Índice de una versión anterior (mtime en segundos): se reconstruye
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS postings")
+            conn.execute("DROP TABLE files")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS files ("
+        "id INTEGER PRIMARY KEY, path TEXT UNIQUE, "
+        "mtime_ns INTEGER, ctime_ns INTEGER, size INTEGER)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS postings ("
+        "trigram TEXT, file_id INTEGER, PRIMARY KEY (trigram, file_id)) WITHOUT ROWID"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id)")
+    return conn
+
+
+def _file_trigrams(file_path):
+    """
+    Devuelve el conjunto de trigramas de cada línea del archivo. De un archivo
+    comprimido se indexa su contenido y de un archivador, el de todos sus
+    miembros de texto. Los errores de lectura se propagan: un archivo leído
+    a medias no debe quedar en el índice.
+    """
+    trigrams = set()
+    for _, _, line in _iter_source_matches(file_path, strict=True):
+        trigrams.update(line[i : i + 3] for i in range(len(line) - 2))
+    return trigrams
+
+
+def _remove_files(conn, file_ids):
+    conn.executemany("DELETE FROM postings WHERE file_id = ?", [(i,) for i in file_ids])
+    conn.executemany("DELETE FROM files WHERE id = ?", [(i,) for i in file_ids])
+
+
+def _index_file(conn, file_path, stamp):
+    """
+    (Re)indexa un archivo. Si no se puede leer entero, queda fuera del índice
+    (y por tanto siempre es candidato) hasta la próxima actualización.
+    """
+    try:
+        trigrams = _file_trigrams(file_path)
+    except Exception as e:
+        print_error(f"No se pudo indexar {file_path}: {e}")
+        return
+    cursor = conn.execute(
+        "INSERT INTO files (path, mtime_ns, ctime_ns, size) VALUES (?, ?, ?, ?)",
+        (file_path, *stamp),
+    )
+    file_id = cursor.lastrowid
+    rows = [(t, file_id) for t in trigrams]
+    for start in range(0, len(rows), INSERT_BATCH):
+        conn.executemany(
+            "INSERT INTO postings (trigram, file_id) VALUES (?, ?)",
+            rows[start : start + INSERT_BATCH],
+        )
+
+
+@log_execution
+def update_index(directory):
+    """
+    Actualiza el índice de forma incremental: solo se reindexan los archivos
+    cuyo tamaño, fecha de modificación o fecha de cambio (en ns) cambió.
+    Devuelve un diccionario {ruta_absoluta: ruta} con los archivos de texto,
+    comprimidos y archivadores actuales del directorio.
+    """
+    current = {}
+    for entry in _find_search_files(directory):
+        try:
+            st = stat_entry(entry)
+        except OSError:
+            continue
+        current[os.path.abspath(entry.path)] = (
+            entry.path,
+            (st.st_mtime_ns, st.st_ctime_ns, st.st_size),
+        )
+
+    prefix = os.path.join(os.path.abspath(directory), "")
+    conn = _connect()
+    try:
+        with conn:
+            indexed = {
+                path: (file_id, tuple(stamp))
+                for file_id, path, *stamp in conn.execute(
+                    "SELECT id, path, mtime_ns, ctime_ns, size FROM files"
+                )
+                if path.startswith(prefix)
+            }
+
+            stale = [
+                file_id
+                for path, (file_id, stamp) in indexed.items()
+                if path not in current or current[path][1] != stamp
+            ]
+            _remove_files(conn, stale)
+
+            reindexed = 0
+            for abspath, (_, stamp) in current.items():
+                entry = indexed.get(abspath)
+                if entry is None or entry[1] != stamp:
+                    _index_file(conn, abspath, stamp)
+                    reindexed += 1
+    finally:
+        conn.close()
+
+    print_info(f"Índice actualizado: {reindexed} archivos reindexados de {len(current)}.")
+    return {abspath: info[0] for abspath, info in current.items()}
+
+
+def _literal_runs(parsed):
+    """
+    Extrae las secuencias literales que toda coincidencia debe contener.
+    Las alternativas, repeticiones opcionales y clases se ignoran.
+    """
+    runs = []
+    current = []
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        runs.append("".join(current))
+        current = []
+        if op is sre_parse.SUBPATTERN:
+            _, add_flags, _, sub = av
+            if not add_flags & sre_parse.SRE_FLAG_IGNORECASE:
+                runs.extend(_literal_runs(sub))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            min_count, _, sub = av
+            if min_count >= 1:
+                runs.extend(_literal_runs(sub))
+    runs.append("".join(current))
+    return runs
+
+
+def required_trigrams(pattern):
+    """
+    Trigramas que debe contener cualquier línea que coincida con el patrón.
+    Un conjunto vacío significa que el índice no puede descartar archivos.
+    """
+    parsed = sre_parse.parse(pattern)
+    if parsed.state.flags & sre_parse.SRE_FLAG_IGNORECASE:
+        return set()
+    trigrams = set()
+    for run in _literal_runs(parsed):
+        trigrams.update(run[i : i + 3] for i in range(len(run) - 2))
+    return trigrams
+
+
+def candidate_files(files, pattern):
+    """
+    Filtra los archivos (rutas absolutas) que pueden contener el patrón.
+    Los archivos que no están en el índice se consideran siempre candidatos.
+    """
+    trigrams = required_trigrams(pattern)
+    if not trigrams:
+        return set(files)
+
+    conn = _connect()
+    try:
+        # Los trigramas van en una tabla temporal: un patrón largo superaría el
+        # límite de parámetros de SQLite en una lista IN (...)
+        conn.execute("CREATE TEMP TABLE wanted (trigram TEXT PRIMARY KEY)")
+        conn.executemany("INSERT INTO wanted VALUES (?)", [(t,) for t in trigrams])
+        matching = {
+            path
+            for (path,) in conn.execute(
+                "SELECT f.path FROM wanted w "
+                "JOIN postings p ON p.trigram = w.trigram "
+                "JOIN files f ON f.id = p.file_id "
+                "GROUP BY p.file_id HAVING COUNT(*) = ?",
+                (len(trigrams),),
+            )
+        }
+        indexed = {path for (path,) in conn.execute("SELECT path FROM files")}
+    finally:
+        conn.close()
+    return {f for f in files if f in matching or f not in indexed}
+
+
+@log_execution
+def indexed_search(directory, pattern):
+    """
+    Busca un patrón usando el índice para descartar archivos antes de aplicar
+    la regex. Devuelve el mismo diccionario que analyzer.analyze_content,
+    con los miembros de los archivadores como "archivador::miembro".
+    """
+    results = {}
+    try:
+        regex = re.compile(pattern)
+    except re.error as e:
+        print_error(f"Error en regex: {e}")
+        return results
+
+    files = update_index(directory)
+    candidates = candidate_files(files, pattern)
+    print_info(f"Candidatos tras el índice: {len(candidates)} de {len(files)} archivos.")
+
+    for abspath, filepath in files.items():
+        if abspath in candidates:
+            for path, matches in _search_source(filepath, regex):
+                if matches:
+                    results[path] = matches
+    return results
@@ -4,9 +4,10 @@ import sys
 # Agregar el directorio raíz al path para poder importar módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src import analyzer, auditor, organizer, reporter
+# Los subsistemas (organizer, analyzer, auditor, reporter, cli) se importan
+# dentro de cada menú para que el arranque solo cargue lo que se usa.
+from src.progress import Progress
 from src.utils import (
-    Spinner,
     clear_screen,
     ensure_directories,
     get_valid_input,
@@ -28,15 +29,29 @@ def print_menu():
 
 
 def menu_organizer():
+    from src import organizer
+
     clear_screen()
     print_header("GESTOR DE ORGANIZACIÓN")
     print("1. Organizar por Extensión")
     print("2. Organizar por Tamaño")
     print("3. Renombrar por Patrón (Regex)")
-    print("4. Volver")
-
-    opcion = get_valid_input("Seleccione una opción: ", ["1", "2", "3", "4"])
-    if opcion == "4":
+    print("4. Reanudar ejecución interrumpida")
+    print("5. Deshacer una ejecución")
+    print("6. Buscar archivos duplicados")
+    print("7. Organizar con archivo de reglas")
+    print("8. Volver")
+
+    opcion = get_valid_input(
+        "Seleccione una opción: ", ["1", "2", "3", "4", "5", "6", "7", "8"]
+    )
+    if opcion == "8":
+        return
+    if opcion in ("4", "5"):
+        menu_journals(opcion == "5")
+        return
+    if opcion == "6":
+        menu_duplicates()
         return
 
     directory = get_valid_input("Ingrese la ruta del directorio a organizar: ")
@@ -51,34 +66,103 @@ def menu_organizer():
     if opcion == "3":
         pattern = get_valid_input("Ingrese el patrón Regex a buscar: ")
         replacement = get_valid_input("Ingrese el reemplazo: ")
+    elif opcion == "7":
+        rules_path = get_valid_input("Ingrese la ruta del archivo de reglas (JSON): ")
 
-    with Spinner("Procesando..."):
+    with Progress("Procesando..."):
         if opcion == "1":
             organizer.organize_by_extension(directory, dry_run)
         elif opcion == "2":
             organizer.organize_by_size(directory, dry_run)
         elif opcion == "3":
             organizer.rename_by_pattern(directory, pattern, replacement, dry_run)
+        elif opcion == "7":
+            organizer.organize_by_rules(directory, rules_path, dry_run)
+
+
+def menu_duplicates():
+    """Busca duplicados, guarda el reporte y aplica la acción elegida."""
+    from src import dedup, organizer
+
+    directory = get_valid_input("Ingrese la ruta del directorio a analizar: ")
+    if not os.path.isdir(directory):
+        print_error("Directorio no válido.")
+        return
+
+    with Progress("Buscando duplicados..."):
+        duplicates = dedup.find_duplicates(directory)
+    if not duplicates:
+        print_info("No se encontraron duplicados.")
+        return
+    dedup.report_duplicates(duplicates)
+
+    print("1. Reemplazar por enlaces duros")
+    print("2. Mover a la carpeta de duplicados")
+    print("3. Eliminar")
+    print("4. No hacer nada")
+    choice = get_valid_input("Seleccione una acción: ", ["1", "2", "3", "4"])
+    if choice == "4":
+        return
+    action = {"1": "hardlink", "2": "move", "3": "delete"}[choice]
+    dry_run = get_valid_input("¿Modo simulación (dry-run)? (s/n): ", ["s", "n"]) == "s"
+
+    with Progress("Procesando..."):
+        organizer.remove_duplicates(directory, action, dry_run)
+
+
+def menu_journals(undo):
+    """Lista los diarios del organizador y reanuda o deshace el elegido."""
+    from src import organizer
+
+    wanted = ("completo", "incompleto") if undo else ("incompleto",)
+    journals = [j for j in organizer.list_journals() if j[2] in wanted]
+    if not journals:
+        print_info("No hay ejecuciones disponibles.")
+        return
+
+    for i, (path, operation, status) in enumerate(journals, 1):
+        print(f"{i}. {os.path.basename(path)} ({operation}, {status})")
+    options = [str(i) for i in range(1, len(journals) + 1)]
+    choice = get_valid_input("Seleccione una ejecución: ", options)
+    path = journals[int(choice) - 1][0]
+
+    with Progress("Procesando..."):
+        if undo:
+            organizer.undo_journal(path)
+        else:
+            organizer.resume_journal(path)
 
 
 def menu_analyzer():
+    from src import analyzer, indexer, reporter
+
     clear_screen()
     print_header("ANALIZADOR DE CONTENIDO")
     print("1. Buscar patrón en archivos")
     print("2. Contar palabras en archivo")
-    print("3. Volver")
+    print("3. Buscar patrón usando índice persistente")
+    print("4. Estadísticas de texto (archivo o directorio)")
+    print("5. Buscar varios patrones a la vez")
+    print("6. Consultar CSV o logs (filtrar, agrupar, agregar)")
+    print("7. Volver")
 
-    opcion = get_valid_input("Seleccione una opción: ", ["1", "2", "3"])
+    opcion = get_valid_input(
+        "Seleccione una opción: ", ["1", "2", "3", "4", "5", "6", "7"]
+    )
 
-    if opcion == "1":
+    if opcion in ("1", "3"):
         directory = get_valid_input("Ingrese el directorio a analizar: ")
         if not os.path.isdir(directory):
             print_error("Directorio no válido.")
             return
         pattern = get_valid_input("Ingrese el patrón Regex (ej: email, fecha): ")
 
-        with Spinner("Analizando archivos..."):
-            results = analyzer.analyze_content(directory, pattern)
+        scan = directory if opcion == "1" else None
+        with Progress("Analizando archivos...", scan, analyzer.SEARCH_EXTENSIONS):
+            if opcion == "1":
+                results = analyzer.analyze_content(directory, pattern, use_cache=True)
+            else:
+                results = indexer.indexed_search(directory, pattern)
 
         if results:
             print_success(f"Se encontraron coincidencias en {len(results)} archivos.")
@@ -96,20 +180,117 @@ def menu_analyzer():
             print_error("Archivo no válido.")
             return
 
-        with Spinner("Contando palabras..."):
-            count = analyzer.count_words(filepath)
+        with Progress("Contando palabras..."):
+            count = analyzer.count_words(filepath, use_cache=True)
         print_success(f"El archivo tiene {count} palabras.")
 
+    elif opcion == "4":
+        path = get_valid_input("Ingrese el archivo o directorio: ")
+        if not os.path.exists(path):
+            print_error("Ruta no válida.")
+            return
+
+        with Progress("Calculando estadísticas..."):
+            stats = analyzer.text_statistics(path, parallel=True)
+        print_success(
+            f"{stats['files']} archivos: {stats['words']} palabras, "
+            f"{stats['lines']} líneas, {stats['bytes']} bytes."
+        )
+        print("\nTokens más frecuentes:")
+        for token, freq in stats["top"]:
+            print(f"  {token}: {freq}")
+
+    elif opcion == "5":
+        from src.cli import pattern_set_summary, read_patterns
+
+        directory = get_valid_input("Ingrese el directorio a analizar: ")
+        if not os.path.isdir(directory):
+            print_error("Directorio no válido.")
+            return
+        patterns_path = get_valid_input("Ingrese el archivo de patrones (uno por línea): ")
+        try:
+            patterns = read_patterns(patterns_path)
+        except OSError as e:
+            print_error(f"No se pudo leer {patterns_path}: {e}")
+            return
+
+        with Progress("Analizando archivos...", directory, analyzer.SEARCH_EXTENSIONS):
+            results = analyzer.analyze_patterns(directory, patterns)
+        data = pattern_set_summary(results)
+        save = get_valid_input("¿Guardar reporte? (s/n): ", ["s", "n"])
+        if save == "s":
+            reporter.generate_txt_report(
+                f"Búsqueda de {len(patterns)} patrones", data, "analisis_patrones.txt"
+            )
+
+    elif opcion == "6":
+        path = get_valid_input("Ingrese el archivo o directorio: ")
+        if not os.path.exists(path):
+            print_error("Ruta no válida.")
+            return
+        log_regex = input("Regex de log con grupos con nombre (vacío para CSV): ").strip()
+        group_by = input("Columnas de agrupación (separadas por coma): ")
+        where = input("Filtros (ej: latencia>500; separados por ';'): ")
+        aggregates = input("Agregados (ej: count, avg:latencia): ") or "count"
+
+        with Progress("Consultando..."):
+            result = analyzer.query_table(
+                path,
+                [w.strip() for w in where.split(";") if w.strip()],
+                [c.strip() for c in group_by.split(",") if c.strip()],
+                [a.strip() for a in aggregates.split(",") if a.strip()],
+                log_regex or None,
+            )
+        if result is None:
+            return
+        headers, rows = result
+        print_success(f"{len(rows)} grupos.")
+        for row in rows[:20]:
+            print("  " + ", ".join(str(value) for value in row))
+        reporter.generate_csv_report(rows, headers, "consulta.csv")
+
+
+def show_diff(diff):
+    """Muestra un resumen de cambios y ofrece guardar el reporte."""
+    from src import reporter
+
+    print("\nCambios detectados:")
+    print_info(f"Agregados: {len(diff['added'])}")
+    print_info(f"Eliminados: {len(diff['removed'])}")
+    print_info(f"Modificados: {len(diff['modified'])}")
+
+    save = get_valid_input("¿Guardar reporte de auditoría? (s/n): ", ["s", "n"])
+    if save == "s":
+        reporter.generate_txt_report("Auditoría de Cambios", diff, "auditoria.txt")
+
+
+def select_history_point(directory, prompt):
+    """Muestra los puntos del historial y pide uno por nombre."""
+    from src import auditor
+
+    points = auditor.list_history(directory)
+    for point in points:
+        print(f"  - {point['name']} ({point['timestamp']}, {point['files']} archivos)")
+    return get_valid_input(prompt, [point["name"] for point in points])
+
 
 def menu_auditor():
+    from src import auditor
+
     clear_screen()
     print_header("AUDITOR DE CAMBIOS")
     print("1. Tomar Snapshot (Estado actual)")
     print("2. Comparar con último Snapshot")
-    print("3. Volver")
-
-    opcion = get_valid_input("Seleccione una opción: ", ["1", "2", "3"])
-    if opcion == "3":
+    print("3. Guardar punto en el historial")
+    print("4. Comparar dos puntos del historial")
+    print("5. Compactar historial")
+    print("6. Vigilar cambios en tiempo real")
+    print("7. Volver")
+
+    opcion = get_valid_input(
+        "Seleccione una opción: ", ["1", "2", "3", "4", "5", "6", "7"]
+    )
+    if opcion == "7":
         return
 
     directory = get_valid_input("Ingrese el directorio a auditar: ")
@@ -118,28 +299,57 @@ def menu_auditor():
         print_error("Directorio no válido.")
         return
 
+    if opcion == "6":
+        try:
+            watcher = auditor.ChangeWatcher(directory).start()
+        except OSError as e:
+            print_error(f"No se pudo iniciar la vigilancia: {e}")
+            return
+        print_info("Vigilando cambios. Presione Enter para detener...")
+        input()
+        watcher.stop()
+        show_diff(watcher.changes_since())
+        return
+
+    if opcion in ("4", "5"):
+        if not auditor.list_history(directory):
+            print_error("No existe historial para este directorio.")
+            return
+        if opcion == "4":
+            start = select_history_point(directory, "Punto inicial: ")
+            end = select_history_point(directory, "Punto final: ")
+            diff = auditor.diff_history(directory, start, end)
+            show_diff(diff)
+        else:
+            point = select_history_point(directory, "Compactar hasta el punto: ")
+            auditor.compact_history(directory, point)
+        return
+
+    hash_input = get_valid_input("¿Usar hash de contenido? (s/n): ", ["s", "n"])
+    use_hash = hash_input == "s"
+
     if opcion == "1":
-        with Spinner("Tomando snapshot..."):
-            auditor.take_snapshot(directory)
+        with Progress("Tomando snapshot...", directory):
+            auditor.take_snapshot(directory, use_hash)
     elif opcion == "2":
-        with Spinner("Comparando snapshots..."):
-            diff = auditor.compare_snapshot(directory)
+        with Progress("Comparando snapshots...", directory):
+            diff = auditor.compare_snapshot(directory, use_hash)
 
         if diff:
-            print("\nCambios detectados:")
-            print_info(f"Agregados: {len(diff['added'])}")
-            print_info(f"Eliminados: {len(diff['removed'])}")
-            print_info(f"Modificados: {len(diff['modified'])}")
-
-            save = get_valid_input("¿Guardar reporte de auditoría? (s/n): ", ["s", "n"])
-            if save == "s":
-                reporter.generate_txt_report(
-                    "Auditoría de Cambios", diff, "auditoria.txt"
-                )
+            show_diff(diff)
+    elif opcion == "3":
+        name = get_valid_input("Nombre del punto: ")
+        with Progress("Guardando punto del historial...", directory):
+            auditor.record_history(directory, name, use_hash)
 
 
 def main():
     ensure_directories()
+    if len(sys.argv) > 1:
+        from src import cli
+
+        sys.exit(cli.run(sys.argv[1:]))
+
     while True:
         clear_screen()
         print_menu()
@@ -1,7 +1,13 @@
 import datetime
+import errno
+import json
 import os
 import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from src import progress
+from src.throttle import operation as io_operation
 
 from src.utils import (
     log_execution,
@@ -9,28 +15,430 @@ from src.utils import (
     print_info,
     print_success,
     print_warning,
+    stat_entry,
+    walk_files,
 )
 
+JOURNAL_DIR = "journals"
+
+# Registros "done" que se acumulan antes de hacer fsync del diario
+JOURNAL_SYNC_EVERY = 500
+
+
+def _blocked_folder(target_folder, checked):
+    """
+    Indica si la carpeta destino existe como archivo. El resultado se guarda en
+    `checked` para consultar el disco una sola vez por carpeta.
+    """
+    if target_folder not in checked:
+        checked[target_folder] = os.path.exists(target_folder) and not os.path.isdir(
+            target_folder
+        )
+    return checked[target_folder]
+
+
+def _free_name(name, names):
+    """Devuelve `name` o la primera variante nombre_N.ext que no esté en `names`."""
+    if name not in names:
+        return name
+    base, ext = os.path.splitext(name)
+    counter = 1
+    while f"{base}_{counter}{ext}" in names:
+        counter += 1
+    return f"{base}_{counter}{ext}"
+
+
+def _free_path(path):
+    """Primera variante nombre_N.ext de `path` que no existe en el disco."""
+    base, ext = os.path.splitext(path)
+    counter = 1
+    while os.path.lexists(f"{base}_{counter}{ext}"):
+        counter += 1
+    return f"{base}_{counter}{ext}"
+
+
+def _case_only_rename(src, dst):
+    """Indica si dst es el mismo archivo que src con el nombre en otras mayúsculas."""
+    return (
+        os.path.dirname(src) == os.path.dirname(dst)
+        and os.path.basename(src).lower() == os.path.basename(dst).lower()
+        and os.path.samefile(src, dst)
+    )
+
+
+def _move_no_clobber(src, dst):
+    """
+    Mueve src a dst en el mismo sistema de archivos sin sobrescribir nunca:
+    os.link falla si dst ya existe, aunque haya aparecido después del listado
+    o difiera solo en mayúsculas en un sistema de archivos que no las
+    distingue. Donde no hay enlaces duros se comprueba la existencia antes de
+    os.rename. Devuelve el destino usado (nombre_N.ext si dst estaba ocupado).
+    """
+    while True:
+        try:
+            os.link(src, dst, follow_symlinks=False)
+        except FileExistsError:
+            if _case_only_rename(src, dst):
+                os.rename(src, dst)
+                return dst
+            dst = _free_path(dst)
+            continue
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                raise
+            # Sin enlaces duros (FAT, algunos sistemas de red)
+            if os.path.lexists(dst) and not _case_only_rename(src, dst):
+                dst = _free_path(dst)
+                continue
+            os.rename(src, dst)
+            return dst
+        os.unlink(src)
+        return dst
+
+
+def _cross_device_move(move):
+    src, dst = move
+    try:
+        if os.path.lexists(dst):
+            dst = _free_path(dst)
+        # La copia entre dispositivos lee y escribe el archivo entero
+        with io_operation(os.lstat(src).st_size, kind="move"):
+            shutil.move(src, dst)
+        return dst, None
+    except OSError as e:
+        return dst, (src, dst, e)
+
+
+class MoveJournal:
+    """
+    Diario de solo escritura (JSON Lines) de una ejecución del organizador.
+    Registra el plan completo y cada movimiento realizado; los fsync se hacen
+    por lotes para no frenar el bucle de movimientos.
+    """
+
+    def __init__(self, path, sync_every=JOURNAL_SYNC_EVERY):
+        self.path = path
+        self.sync_every = sync_every
+        self.unsynced = 0
+        self.file = open(path, "a", encoding="utf-8")
+
+    @classmethod
+    def create(cls, operation, directory):
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        journal = cls(os.path.join(JOURNAL_DIR, f"{timestamp}_{operation}.jsonl"))
+        journal.write(
+            {"op": "begin", "operation": operation, "directory": directory},
+            sync=True,
+        )
+        return journal
+
+    def write(self, record, sync=False):
+        self.file.write(json.dumps(record) + "\n")
+        self.unsynced += 1
+        if sync or self.unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+    @staticmethod
+    def read(path):
+        """Lee los registros del diario, ignorando una última línea incompleta."""
+        records = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        return records
+
+
+def _plan_moves(moves, journal):
+    """
+    Crea las carpetas destino y resuelve colisiones de nombre en memoria
+    contra el listado de cada carpeta. Devuelve (plan, renombrados_por_colision).
+    """
+    listings = {}
+    for folder in sorted({os.path.dirname(dst) for _, dst in moves}):
+        if not os.path.isdir(folder):
+            journal.write({"op": "mkdir", "path": folder})
+            os.makedirs(folder)
+        listings[folder] = set(os.listdir(folder))
+
+    plan = []
+    collisions = 0
+    for src, dst in moves:
+        folder, name = os.path.split(dst)
+        names = listings[folder]
+        free = _free_name(name, names)
+        if free != name:
+            collisions += 1
+            dst = os.path.join(folder, free)
+        names.add(free)
+
+        src_folder, src_name = os.path.split(src)
+        if src_folder in listings:
+            listings[src_folder].discard(src_name)
+
+        journal.write({"op": "plan", "id": len(plan), "src": src, "dst": dst})
+        plan.append((src, dst))
+    journal.sync()
+    return plan, collisions
+
+
+def _record_target(plan, move_id, target, journal):
+    """Anota en el plan y en el diario el nuevo destino de un movimiento."""
+    src, dst = plan[move_id]
+    if target != dst:
+        print_warning(f"{dst} ya existe: {src} se mueve a {target}.")
+        plan[move_id] = (src, target)
+        journal.write({"op": "plan", "id": move_id, "src": src, "dst": target})
+
+
+def _run_plan(plan, ids, journal, workers=None):
+    """
+    Ejecuta los movimientos `ids` del plan sin sobrescribir ningún archivo
+    (ver _move_no_clobber), con un pool de hilos para las copias entre
+    dispositivos. Devuelve (movidos, fallidos).
+    """
+    done = 0
+    failed = []
+    cross_device = []
+    progress.set_total(len(ids))
+    for move_id in ids:
+        src, dst = plan[move_id]
+        try:
+            with io_operation():
+                target = _move_no_clobber(src, dst)
+            _record_target(plan, move_id, target, journal)
+            journal.write({"op": "done", "id": move_id})
+            done += 1
+            progress.advance()
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                cross_device.append(move_id)
+            else:
+                failed.append((src, dst, e))
+                progress.advance()
+
+    if cross_device:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            moves = [plan[move_id] for move_id in cross_device]
+            for move_id, (target, error) in zip(
+                cross_device, executor.map(_cross_device_move, moves)
+            ):
+                progress.advance()
+                if error is None:
+                    _record_target(plan, move_id, target, journal)
+                    journal.write({"op": "done", "id": move_id})
+                    done += 1
+                else:
+                    failed.append(error)
+    return done, failed
+
+
+def execute_moves(moves, operation="mover", directory=None, workers=None):
+    """
+    Ejecuta una lista de movimientos (origen, destino) como un plan por lotes:
+    - crea todas las carpetas destino una sola vez al inicio;
+    - resuelve colisiones de nombre en memoria contra el listado de cada carpeta;
+    - mueve sin sobrescribir en el mismo sistema de archivos (un destino que
+      aparece después del listado recibe nombre_N.ext) y usa un pool de hilos
+      para las copias entre dispositivos.
+    Todo el plan y su avance quedan en un diario en JOURNAL_DIR, con rutas
+    absolutas, que permite reanudar (resume_journal) o deshacer (undo_journal)
+    la ejecución desde cualquier directorio de trabajo.
+    Devuelve (movidos, renombrados_por_colision, fallidos).
+    """
+    moves = [(os.path.abspath(src), os.path.abspath(dst)) for src, dst in moves]
+    if directory is not None:
+        directory = os.path.abspath(directory)
+    journal = MoveJournal.create(operation, directory)
+    try:
+        plan, collisions = _plan_moves(moves, journal)
+        done, failed = _run_plan(plan, range(len(plan)), journal, workers)
+        journal.write({"op": "end"})
+    finally:
+        journal.close()
+    return done, collisions, failed
+
+
+def _journal_state(records):
+    """Resume un diario: (cabecera, plan, ids_hechos, ids_deshechos, carpetas, fin)."""
+    plan = {}
+    done, undone = set(), set()
+    folders = []
+    finished = False
+    for record in records:
+        op = record["op"]
+        if op == "plan":
+            plan[record["id"]] = (record["src"], record["dst"])
+        elif op == "done":
+            done.add(record["id"])
+        elif op == "undone":
+            undone.add(record["id"])
+        elif op == "mkdir":
+            folders.append(record["path"])
+        elif op == "end":
+            finished = True
+    return records[0], plan, done, undone, folders, finished
+
+
+def list_journals():
+    """Devuelve [(ruta, operación, estado)] de los diarios, del más reciente al más antiguo."""
+    journals = []
+    if not os.path.isdir(JOURNAL_DIR):
+        return journals
+    for name in sorted(os.listdir(JOURNAL_DIR), reverse=True):
+        path = os.path.join(JOURNAL_DIR, name)
+        records = MoveJournal.read(path)
+        if not records:
+            continue
+        header, _, _, undone, _, finished = _journal_state(records)
+        if records[-1]["op"] == "undo_end":
+            status = "deshecho"
+        elif undone:
+            status = "deshecho parcialmente"
+        elif finished:
+            status = "completo"
+        else:
+            status = "incompleto"
+        journals.append((path, header["operation"], status))
+    return journals
+
+
+@log_execution
+def resume_journal(path, workers=None):
+    """Reanuda una ejecución interrumpida saltando los movimientos ya completados."""
+    header, plan, done, undone, folders, finished = _journal_state(
+        MoveJournal.read(path)
+    )
+    if undone:
+        print_error("La ejecución fue deshecha; no se puede reanudar.")
+        return 0
+    if finished:
+        print_info("La ejecución ya estaba completa.")
+        return 0
+
+    journal = MoveJournal(path)
+    try:
+        for folder in folders:
+            os.makedirs(folder, exist_ok=True)
+        pending = []
+        for move_id in sorted(plan):
+            if move_id in done:
+                continue
+            src, dst = plan[move_id]
+            # El movimiento se hizo pero su registro no llegó al disco
+            if not os.path.exists(src) and os.path.exists(dst):
+                journal.write({"op": "done", "id": move_id})
+                continue
+            pending.append(move_id)
+        moved, failed = _run_plan(plan, pending, journal, workers)
+        journal.write({"op": "end"})
+    finally:
+        journal.close()
+
+    _report_moves(moved, 0, failed, "mover")
+    print_success(f"Reanudada '{header['operation']}': {moved} movimientos pendientes completados.")
+    return moved
+
+
+@log_execution
+def undo_journal(path):
+    """
+    Deshace una ejecución reproduciendo su diario en orden inverso. Un archivo
+    cuyo origen vuelve a existir no se sobrescribe: se informa y se omite.
+    Si algo no se pudo restaurar, el diario no se marca como deshecho y la
+    operación puede repetirse (los movimientos ya deshechos se saltan).
+    """
+    header, plan, done, undone, folders, _ = _journal_state(MoveJournal.read(path))
+
+    journal = MoveJournal(path)
+    restored = 0
+    failures = 0
+    try:
+        for move_id in sorted(plan, reverse=True):
+            if move_id in undone:
+                continue
+            src, dst = plan[move_id]
+            completed = move_id in done or (
+                not os.path.exists(src) and os.path.exists(dst)
+            )
+            if not completed:
+                continue
+            if os.path.lexists(src):
+                print_warning(f"No se restaura {dst}: {src} ya existe.")
+                failures += 1
+                continue
+            try:
+                os.makedirs(os.path.dirname(src) or ".", exist_ok=True)
+                # shutil.move también deshace los movimientos entre dispositivos
+                shutil.move(dst, src)
+            except OSError as e:
+                print_error(f"No se pudo restaurar {dst} a {src}: {e}")
+                failures += 1
+                continue
+            journal.write({"op": "undone", "id": move_id})
+            restored += 1
+
+        for folder in reversed(folders):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass
+        if not failures:
+            journal.write({"op": "undo_end"})
+    finally:
+        journal.close()
+
+    if failures:
+        print_warning(
+            f"Deshecha en parte '{header['operation']}': {restored} archivos "
+            f"restaurados, {failures} pendientes."
+        )
+        return restored
+    print_success(f"Deshecha '{header['operation']}': {restored} archivos restaurados.")
+    return restored
+
+
+def _report_moves(done, collisions, failed, verb):
+    """Muestra un resumen del plan ejecutado en lugar de una línea por archivo."""
+    for src, dst, e in failed:
+        print_error(f"No se pudo {verb} {src} a {dst}: {e}")
+    print_info(
+        f"Completados: {done}, renombrados por colisión: {collisions}, "
+        f"fallidos: {len(failed)}"
+    )
+
 
 @log_execution
 def organize_by_extension(directory, dry_run=False):
     """Organiza archivos en carpetas según su extensión."""
     actions = []
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        if os.path.isfile(filepath):
-            ext = filename.split(".")[-1] if "." in filename else "no_ext"
-            target_folder = os.path.join(directory, ext)
-
-            if os.path.exists(target_folder) and not os.path.isdir(target_folder):
-                print_error(
-                    f"No se puede usar la carpeta '{ext}' porque existe un archivo con ese nombre. Saltando {filename}."
-                )
-                continue
+    checked = {}
+    for entry in walk_files(directory, max_depth=0):
+        filename = entry.name
+        ext = filename.split(".")[-1] if "." in filename else "no_ext"
+        target_folder = os.path.join(directory, ext)
 
-            target_path = os.path.join(target_folder, filename)
+        if _blocked_folder(target_folder, checked):
+            print_error(
+                f"No se puede usar la carpeta '{ext}' porque existe un archivo con ese nombre. Saltando {filename}."
+            )
+            continue
 
-            actions.append((filepath, target_path, target_folder))
+        target_path = os.path.join(target_folder, filename)
+
+        actions.append((entry.path, target_path, target_folder))
 
     if dry_run:
         print_warning("\n[MODO SIMULACIÓN] Se realizarían los siguientes cambios:")
@@ -38,23 +446,11 @@ def organize_by_extension(directory, dry_run=False):
             print_info(f"Mover: {src} -> {dst}")
     else:
         print_info("\nRealizando cambios:")
-        for src, dst, folder in actions:
-            if not os.path.exists(folder):
-                os.makedirs(folder)
-
-            if os.path.exists(dst):
-                base, ext = os.path.splitext(dst)
-                counter = 1
-                while os.path.exists(dst):
-                    dst = f"{base}_{counter}{ext}"
-                    counter += 1
-                print_warning(
-                    f"El archivo destino ya existe. Se moverá a: {os.path.basename(dst)}"
-                )
-
-            shutil.move(src, dst)
-            print_info(f"Movido: {src} -> {dst}")
-        print_success(f"Se organizaron {len(actions)} archivos por extensión.")
+        done, collisions, failed = execute_moves(
+            [(src, dst) for src, dst, _ in actions], "organize_by_extension", directory
+        )
+        _report_moves(done, collisions, failed, "mover")
+        print_success(f"Se organizaron {done} archivos por extensión.")
     return actions
 
 
@@ -62,27 +458,30 @@ def organize_by_extension(directory, dry_run=False):
 def organize_by_size(directory, dry_run=False):
     """Organiza archivos en carpetas: Pequeño (<1MB), Mediano (1-10MB), Grande (>10MB)."""
     actions = []
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        if os.path.isfile(filepath):
-            size_mb = os.path.getsize(filepath) / (1024 * 1024)
-            if size_mb < 1:
-                folder_name = "Pequeno"
-            elif size_mb < 10:
-                folder_name = "Mediano"
-            else:
-                folder_name = "Grande"
+    checked = {}
+    for entry in walk_files(directory, max_depth=0):
+        filename = entry.name
+        try:
+            size_mb = stat_entry(entry).st_size / (1024 * 1024)
+        except OSError:
+            continue
+        if size_mb < 1:
+            folder_name = "Pequeno"
+        elif size_mb < 10:
+            folder_name = "Mediano"
+        else:
+            folder_name = "Grande"
 
-            target_folder = os.path.join(directory, folder_name)
+        target_folder = os.path.join(directory, folder_name)
 
-            if os.path.exists(target_folder) and not os.path.isdir(target_folder):
-                print_error(
-                    f"No se puede usar la carpeta '{folder_name}' porque existe un archivo con ese nombre. Saltando {filename}."
-                )
-                continue
+        if _blocked_folder(target_folder, checked):
+            print_error(
+                f"No se puede usar la carpeta '{folder_name}' porque existe un archivo con ese nombre. Saltando {filename}."
+            )
+            continue
 
-            target_path = os.path.join(target_folder, filename)
-            actions.append((filepath, target_path, target_folder))
+        target_path = os.path.join(target_folder, filename)
+        actions.append((entry.path, target_path, target_folder))
 
     if dry_run:
         print_warning("\n[MODO SIMULACIÓN] Se realizarían los siguientes cambios:")
@@ -90,23 +489,11 @@ def organize_by_size(directory, dry_run=False):
             print_info(f"Mover: {src} -> {dst}")
     else:
         print_info("\nRealizando cambios:")
-        for src, dst, folder in actions:
-            if not os.path.exists(folder):
-                os.makedirs(folder)
-
-            if os.path.exists(dst):
-                base, ext = os.path.splitext(dst)
-                counter = 1
-                while os.path.exists(dst):
-                    dst = f"{base}_{counter}{ext}"
-                    counter += 1
-                print_warning(
-                    f"El archivo destino ya existe. Se moverá a: {os.path.basename(dst)}"
-                )
-
-            shutil.move(src, dst)
-            print_info(f"Movido: {src} -> {dst}")
-        print_success(f"Se organizaron {len(actions)} archivos por tamaño.")
+        done, collisions, failed = execute_moves(
+            [(src, dst) for src, dst, _ in actions], "organize_by_size", directory
+        )
+        _report_moves(done, collisions, failed, "mover")
+        print_success(f"Se organizaron {done} archivos por tamaño.")
     return actions
 
 
@@ -120,14 +507,13 @@ def rename_by_pattern(directory, pattern, replacement, dry_run=False):
         print_error(f"Error en la expresión regular: {e}")
         return []
 
-    for filename in os.listdir(directory):
-        filepath = os.path.join(directory, filename)
-        if os.path.isfile(filepath):
-            if regex.search(filename):
-                new_filename = regex.sub(replacement, filename)
-                new_filepath = os.path.join(directory, new_filename)
-                if filename != new_filename:
-                    actions.append((filepath, new_filepath))
+    for entry in walk_files(directory, max_depth=0):
+        filename = entry.name
+        if regex.search(filename):
+            new_filename = regex.sub(replacement, filename)
+            new_filepath = os.path.join(directory, new_filename)
+            if filename != new_filename:
+                actions.append((entry.path, new_filepath))
 
     if dry_run:
         print_warning("\n[MODO SIMULACIÓN] Se realizarían los siguientes cambios:")
@@ -135,21 +521,164 @@ def rename_by_pattern(directory, pattern, replacement, dry_run=False):
             print_info(f"Renombrar: {src} -> {dst}")
     else:
         print_info("\nRealizando cambios:")
-        for src, dst in actions:
-            if os.path.exists(dst):
-                base, ext = os.path.splitext(dst)
-                counter = 1
-                while os.path.exists(dst):
-                    dst = f"{base}_{counter}{ext}"
-                    counter += 1
-                print_warning(
-                    f"El archivo destino ya existe. Se renombrará a: {os.path.basename(dst)}"
-                )
+        done, collisions, failed = execute_moves(
+            actions, "rename_by_pattern", directory
+        )
+        _report_moves(done, collisions, failed, "renombrar")
+        print_success(f"Se procesaron {len(actions)} archivos.")
+    return actions
+
+
+@log_execution
+def organize_by_rules(directory, rules_path, dry_run=False, max_depth=None):
+    """
+    Organiza archivos según un archivo de reglas (ver src/rules.py). Recorre
+    el árbol completo (o hasta `max_depth`); las carpetas destino son relativas
+    a `directory`.
+    """
+    from src.rules import load_rules
+
+    table = load_rules(rules_path)
+    if table is None:
+        return []
+
+    actions = []
+    checked = {}
+    for entry in walk_files(directory, max_depth=max_depth):
+        try:
+            st = stat_entry(entry)
+        except OSError:
+            continue
+        rule = table.match(entry.name, st.st_size, st.st_mtime)
+        if rule is None:
+            continue
+        target = table.target(rule, entry.name, st.st_mtime)
+        if target is None:
+            continue
+        relative = os.path.normpath(target)
+        if os.path.isabs(relative) or relative.split(os.sep)[0] == "..":
+            print_error(f"El destino '{target}' queda fuera del directorio. Saltando {entry.name}.")
+            continue
+        target_folder = os.path.normpath(os.path.join(directory, relative))
+        target_path = os.path.join(target_folder, entry.name)
+        if os.path.normpath(entry.path) == target_path:
+            continue
+
+        # Cualquier carpeta intermedia que exista como archivo bloquea el destino
+        folder = directory
+        blocked = False
+        for part in relative.split(os.sep):
+            folder = os.path.join(folder, part)
+            if part != "." and _blocked_folder(folder, checked):
+                blocked = True
+                break
+        if blocked:
+            print_error(
+                f"No se puede usar la carpeta '{target}' porque existe un archivo en la ruta. Saltando {entry.name}."
+            )
+            continue
 
+        actions.append((entry.path, target_path, target_folder))
+
+    if dry_run:
+        print_warning("\n[MODO SIMULACIÓN] Se realizarían los siguientes cambios:")
+        for src, dst, folder in actions:
+            print_info(f"Mover: {src} -> {dst}")
+    else:
+        print_info("\nRealizando cambios:")
+        done, collisions, failed = execute_moves(
+            [(src, dst) for src, dst, _ in actions], "organize_by_rules", directory
+        )
+        _report_moves(done, collisions, failed, "mover")
+        print_success(f"Se organizaron {done} archivos según las reglas.")
+    return actions
+
+
+def _unchanged(filepath, st):
+    """Comprueba que el archivo sigue igual que cuando se calculó su hash."""
+    try:
+        current = os.stat(filepath)
+    except OSError:
+        return False
+    return (current.st_size, current.st_mtime_ns) == (st.st_size, st.st_mtime_ns)
+
+
+def _link_duplicate(original, duplicate):
+    """Reemplaza el duplicado por un enlace duro al original de forma atómica."""
+    tmp = f"{duplicate}.dedup_tmp"
+    os.link(original, tmp)
+    try:
+        os.replace(tmp, duplicate)
+    except OSError:
+        os.remove(tmp)
+        raise
+
+
+@log_execution
+def remove_duplicates(directory, action="move", dry_run=False, workers=None):
+    """
+    Busca archivos duplicados (dedup.find_duplicates) y conserva solo la primera
+    copia de cada grupo. Según `action`, el resto se:
+    - "hardlink": reemplaza por un enlace duro al original;
+    - "move": mueve a DUPLICATES_DIR dentro del directorio (se puede deshacer);
+    - "delete": elimina.
+    Antes de tocar un archivo se comprueba que no cambió desde que se comparó.
+    """
+    from src import dedup
+
+    if action not in ("hardlink", "move", "delete"):
+        print_error(f"Acción no válida: {action}")
+        return []
+
+    duplicates = dedup.find_duplicates(directory, workers)
+    actions = [
+        (paths[0], duplicate, stats[duplicate], stats[paths[0]])
+        for _, paths, stats in duplicates
+        for duplicate in paths[1:]
+    ]
+
+    if not actions:
+        print_info("No hay duplicados que procesar.")
+        return actions
+
+    verbs = {"hardlink": "Enlazar", "move": "Mover", "delete": "Eliminar"}
+    if dry_run:
+        print_warning("\n[MODO SIMULACIÓN] Se realizarían los siguientes cambios:")
+        for original, duplicate, _, _ in actions:
+            print_info(f"{verbs[action]}: {duplicate} (original: {original})")
+        return actions
+
+    print_info("\nRealizando cambios:")
+    safe = [a for a in actions if _unchanged(a[1], a[2]) and _unchanged(a[0], a[3])]
+    skipped = len(actions) - len(safe)
+    if skipped:
+        print_warning(f"{skipped} archivos cambiaron desde la comparación y se omiten.")
+
+    if action == "move":
+        target = os.path.join(directory, dedup.DUPLICATES_DIR)
+        moves = [
+            (duplicate, os.path.join(target, os.path.relpath(duplicate, directory)))
+            for _, duplicate, _, _ in safe
+        ]
+        done, collisions, failed = execute_moves(
+            moves, "remove_duplicates", directory, workers
+        )
+        _report_moves(done, collisions, failed, "mover")
+    else:
+        done, failed = 0, []
+        for original, duplicate, _, _ in safe:
             try:
-                os.rename(src, dst)
-                print_info(f"Renombrado: {src} -> {dst}")
+                if action == "hardlink":
+                    _link_duplicate(original, duplicate)
+                else:
+                    os.remove(duplicate)
+                done += 1
             except OSError as e:
-                print_error(f"No se pudo renombrar {src} a {dst}: {e}")
-        print_success(f"Se procesaron {len(actions)} archivos.")
+                failed.append((duplicate, original, e))
+        for duplicate, original, e in failed:
+            print_error(f"No se pudo procesar {duplicate} (original: {original}): {e}")
+
+    failed_paths = {f[0] for f in failed}
+    freed = sum(st.st_size for _, duplicate, st, _ in safe if duplicate not in failed_paths)
+    print_success(f"Se procesaron {done} duplicados ({freed} bytes).")
     return actions
@@ -0,0 +1,261 @@
+"""
+Progreso de las tareas largas: archivos y bytes procesados, velocidad y
+tiempo restante estimado.
+
+Los bucles de trabajo (búsqueda, conteo, snapshot, movimientos) informan
+con advance(); el total se estima con un recorrido rápido en segundo plano
+o se fija con set_total() cuando se conoce de antemano. La salida se limita
+a unas pocas escrituras por segundo y depende del modo:
+- "tty": una línea de estado que se reescribe en su sitio;
+- "json": una línea JSON por actualización en stderr, para otros programas;
+- "quiet": nada;
+- "auto" (por defecto): "tty" si la salida es una terminal y, si no, "quiet".
+
+Los mensajes de print_info y compañía pasan por emit(), que borra la línea
+de estado antes de escribir; la línea vuelve con la siguiente actualización.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+MODES = ("auto", "tty", "json", "quiet")
+
+# Intervalo mínimo entre escrituras de la línea de estado y de las líneas JSON
+TTY_INTERVAL = 0.2
+JSON_INTERVAL = 1.0
+
+# Sin avances, la línea se redibuja cada IDLE_INTERVAL (para el tiempo transcurrido)
+IDLE_INTERVAL = 1.0
+
+_mode = "auto"
+_active = None
+_lock = threading.RLock()
+
+
+def configure(mode):
+    """Fija el modo de salida del progreso (ver MODES)."""
+    global _mode
+    if mode not in MODES:
+        raise ValueError(f"modo de progreso no válido: {mode}")
+    _mode = mode
+
+
+def _resolve_mode():
+    if _mode == "auto":
+        return "tty" if sys.stdout.isatty() else "quiet"
+    return _mode
+
+
+def format_bytes(value):
+    """1536 -> "1.5 KB"."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+def _format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _prescan(progress, directory, extensions, max_depth):
+    """Cuenta archivos y bytes del directorio sin pasar por las métricas."""
+    files = size = 0
+    stack = [(directory, 0)]
+    while stack and not progress.stopped.is_set():
+        path, depth = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if max_depth is None or depth < max_depth:
+                                stack.append((entry.path, depth + 1))
+                        elif entry.is_file():
+                            if extensions and not entry.name.endswith(extensions):
+                                continue
+                            files += 1
+                            size += entry.stat().st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    if not progress.stopped.is_set() and progress.total_files is None:
+        progress.total_files, progress.total_bytes = files, size
+
+
+class Progress:
+    """
+    Contexto de una tarea con progreso. Uso:
+
+    with Progress("Buscando...", directory=ruta):
+        # los bucles llaman a progress.advance(archivos, bytes)
+    """
+
+    def __init__(self, message, directory=None, extensions=None, max_depth=None):
+        self.message = message
+        self.scan = (directory, extensions, max_depth)
+        self.files = 0
+        self.bytes = 0
+        self.total_files = None
+        self.total_bytes = None
+        self.stopped = threading.Event()
+        self.drawn = False
+        self.next_write = 0.0
+
+    def __enter__(self):
+        global _active
+        self.mode = _resolve_mode()
+        self.start = time.monotonic()
+        self.previous = _active
+        from src.utils import COUNTERS
+
+        self.counters = COUNTERS
+        self.visited = COUNTERS["files_visited"]
+        directory, extensions, max_depth = self.scan
+        if directory is not None and os.path.isdir(directory) and self.mode != "quiet":
+            threading.Thread(
+                target=_prescan,
+                args=(self, directory, extensions, max_depth),
+                daemon=True,
+            ).start()
+        if self.mode != "quiet":
+            threading.Thread(target=self._tick, daemon=True).start()
+            with _lock:
+                self._write(time.monotonic())
+        _active = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        global _active
+        self.stopped.set()
+        _active = self.previous
+        with _lock:
+            if self.mode == "json":
+                self._write_json(time.monotonic(), done=True)
+            elif self.drawn:
+                sys.stdout.write("\r\033[K")
+                sys.stdout.flush()
+                self.drawn = False
+
+    def _tick(self):
+        """Redibuja cuando no hay avances, sin competir con ellos."""
+        while not self.stopped.wait(IDLE_INTERVAL):
+            now = time.monotonic()
+            if now >= self.next_write:
+                with _lock:
+                    if not self.stopped.is_set():
+                        self._write(now)
+
+    def advance(self, files=1, nbytes=0):
+        self.files += files
+        self.bytes += nbytes
+        if self.mode != "quiet":
+            now = time.monotonic()
+            if now >= self.next_write:
+                with _lock:
+                    self._write(now)
+
+    def state(self, now):
+        """Estado actual: avance, totales, velocidad (bytes/s) y segundos restantes."""
+        elapsed = max(now - self.start, 1e-9)
+        rate = self.bytes / elapsed
+        eta = None
+        if self.total_bytes and self.bytes and rate:
+            eta = max(self.total_bytes - self.bytes, 0) / rate
+        elif self.total_files and self.files:
+            eta = max(self.total_files - self.files, 0) * elapsed / self.files
+        return {
+            "task": self.message,
+            "files": self.files,
+            "total_files": self.total_files,
+            "bytes": self.bytes,
+            "total_bytes": self.total_bytes,
+            "visited": self.counters["files_visited"] - self.visited,
+            "elapsed_s": round(elapsed, 1),
+            "rate_bps": round(rate),
+            "eta_s": None if eta is None else round(eta, 1),
+        }
+
+    def _write(self, now):
+        if self.mode == "json":
+            self._write_json(now)
+        else:
+            self._draw(now)
+
+    def _write_json(self, now, done=False):
+        self.next_write = now + JSON_INTERVAL
+        sys.stderr.write(json.dumps({**self.state(now), "done": done}, ensure_ascii=False))
+        sys.stderr.write("\n")
+        sys.stderr.flush()
+
+    def _draw(self, now):
+        self.next_write = now + TTY_INTERVAL
+        state = self.state(now)
+        parts = [self.message]
+        if state["total_files"] is not None:
+            parts.append(f"{state['files']}/{state['total_files']} archivos")
+        elif state["files"]:
+            parts.append(f"{state['files']} archivos")
+        elif state["visited"]:
+            parts.append(f"{state['visited']} recorridos")
+        if state["bytes"]:
+            done = format_bytes(state["bytes"])
+            if state["total_bytes"]:
+                done += f"/{format_bytes(state['total_bytes'])}"
+            parts.append(done)
+            parts.append(f"{format_bytes(state['rate_bps'])}/s")
+        parts.append(_format_duration(state["elapsed_s"]))
+        if state["eta_s"] is not None:
+            parts.append(f"ETA {_format_duration(state['eta_s'])}")
+        sys.stdout.write(f"\r\033[K\033[36m{' · '.join(parts)}\033[0m")
+        sys.stdout.flush()
+        self.drawn = True
+
+
+def advance(files=1, nbytes=0):
+    """Informa a la tarea activa (si la hay) de `files` archivos y `nbytes` bytes hechos."""
+    progress = _active
+    if progress is not None:
+        progress.advance(files, nbytes)
+
+
+def set_total(files=None, nbytes=None):
+    """Fija el total de la tarea activa cuando se conoce con exactitud."""
+    progress = _active
+    if progress is not None:
+        progress.total_files = files
+        progress.total_bytes = nbytes
+
+
+def emit(text):
+    """
+    Escribe una línea en la consola sin mezclarla con la línea de estado: la
+    borra antes de escribir y se vuelve a dibujar con el siguiente avance,
+    así que muchos mensajes seguidos no multiplican las escrituras.
+    """
+    progress = _active
+    if progress is None or progress.mode != "tty":
+        print(text)
+        return
+    with _lock:
+        if progress.drawn:
+            sys.stdout.write("\r\033[K")
+            progress.drawn = False
+        print(text)
+
+
+def _reset_after_fork():
+    # Los procesos hijos de los pools no dibujan el progreso del padre
+    global _active, _lock
+    _active = None
+    _lock = threading.RLock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
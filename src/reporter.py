@@ -1,11 +1,20 @@
+import contextlib
 import csv
 import datetime
+import gzip
+import io
+import json
 import os
 
 from src.utils import log_execution, print_error, print_success
 
 REPORT_DIR = "reports"
 
+# Buffer de escritura de los reportes en streaming
+REPORT_BUFFER = 1024 * 1024
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
 
 @log_execution
 def generate_txt_report(title, data, filename="report.txt"):
@@ -48,4 +57,155 @@ def generate_csv_report(data_list, headers, filename="report.csv"):
             writer.writerows(data_list)
         print_success(f"Reporte CSV generado en: {filepath}")
     except Exception as e:
-        print_error(f"Error generando CSV: {e}")
\ No newline at end of file
+        print_error(f"Error generando CSV: {e}")
+
+
+@contextlib.contextmanager
+def _open_report(filepath, compression=None):
+    """
+    Abre un reporte para escritura en texto con un buffer grande, comprimido
+    opcionalmente con gzip o zstd (este último requiere el paquete zstandard).
+    """
+    with contextlib.ExitStack() as stack:
+        if compression is None:
+            yield stack.enter_context(
+                open(filepath, "w", encoding="utf-8", newline="", buffering=REPORT_BUFFER)
+            )
+            return
+        if compression == "zstd":
+            import zstandard
+        raw = stack.enter_context(open(filepath, "wb", buffering=REPORT_BUFFER))
+        if compression == "gzip":
+            binary = stack.enter_context(gzip.GzipFile(fileobj=raw, mode="wb"))
+        else:
+            binary = stack.enter_context(zstandard.ZstdCompressor().stream_writer(raw))
+        yield stack.enter_context(
+            io.TextIOWrapper(binary, encoding="utf-8", newline="", write_through=False)
+        )
+
+
+def _stream_report(kind, filename, compression, write):
+    """
+    Escribe un reporte en streaming con la función write(f) y devuelve
+    el número de filas escritas (None si hubo un error).
+    """
+    if compression not in (None, *COMPRESSION_SUFFIXES):
+        print_error(f"Compresión no soportada: {compression}")
+        return None
+    suffix = COMPRESSION_SUFFIXES.get(compression, "")
+    if not filename.endswith(suffix):
+        filename += suffix
+    filepath = os.path.join(REPORT_DIR, filename)
+
+    try:
+        with _open_report(filepath, compression) as f:
+            rows = write(f)
+    except ImportError:
+        print_error("La compresión zstd requiere el paquete 'zstandard'.")
+        return None
+    except Exception as e:
+        print_error(f"Error generando {kind}: {e}")
+        return None
+    print_success(f"Reporte {kind} generado en: {filepath} ({rows} filas)")
+    return rows
+
+
+@log_execution
+def stream_txt_report(title, matches, filename="report.txt", compression=None):
+    """
+    Genera un reporte TXT a partir de un iterador de (archivo, línea, texto)
+    sin cargar los resultados en memoria. Las coincidencias consecutivas del
+    mismo archivo se agrupan igual que en generate_txt_report.
+    """
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def write(f):
+        f.write(f"REPORTE: {title}\n")
+        f.write(f"FECHA: {timestamp}\n")
+        f.write("=" * 40 + "\n\n")
+        rows = 0
+        current = None
+        for filepath, line_num, line in matches:
+            if filepath != current:
+                if current is not None:
+                    f.write("\n")
+                f.write(f"{filepath}:\n")
+                current = filepath
+            f.write(f"  - {(line_num, line)}\n")
+            rows += 1
+        if current is not None:
+            f.write("\n")
+        return rows
+
+    return _stream_report("TXT", filename, compression, write)
+
+
+@log_execution
+def stream_csv_report(rows, headers, filename="report.csv", compression=None):
+    """Genera un reporte CSV a partir de un iterador de filas."""
+
+    def write(f):
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
+
+    return _stream_report("CSV", filename, compression, write)
+
+
+@log_execution
+def stream_jsonl_report(rows, fields, filename="report.jsonl", compression=None):
+    """
+    Genera un reporte JSON Lines a partir de un iterador de filas: cada fila
+    se escribe como un objeto con las claves de fields.
+    """
+
+    def write(f):
+        count = 0
+        for row in rows:
+            f.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+        return count
+
+    return _stream_report("JSONL", filename, compression, write)
+
+
+@log_execution
+def generate_metrics_report(metrics, basename="metrics"):
+    """
+    Genera el reporte de métricas de una ejecución en JSON (basename.json)
+    y como tabla de texto (basename.txt).
+    """
+    json_path = os.path.join(REPORT_DIR, f"{basename}.json")
+    txt_path = os.path.join(REPORT_DIR, f"{basename}.txt")
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": timestamp, **metrics}, f, indent=4)
+
+    rows = sorted(
+        metrics["functions"].items(), key=lambda item: item[1]["wall_s"], reverse=True
+    )
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write("REPORTE: Métricas de ejecución\n")
+        f.write(f"FECHA: {timestamp}\n")
+        f.write("=" * 40 + "\n\n")
+        f.write(
+            f"{'Función':<28} {'Llamadas':>9} {'Errores':>8} "
+            f"{'Real (s)':>10} {'CPU (s)':>10} {'Media (ms)':>11}\n"
+        )
+        for name, values in rows:
+            mean_ms = values["wall_s"] * 1000 / values["calls"]
+            f.write(
+                f"{name:<28} {values['calls']:>9} {values['errors']:>8} "
+                f"{values['wall_s']:>10.3f} {values['cpu_s']:>10.3f} {mean_ms:>11.3f}\n"
+            )
+        f.write("\nContadores:\n")
+        for name, value in metrics["counters"].items():
+            f.write(f"  {name}: {value}\n")
+
+    print_success(f"Reporte de métricas generado en: {txt_path} y {json_path}")
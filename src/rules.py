@@ -0,0 +1,248 @@
+"""
+Reglas declarativas del organizador.
+
+Un archivo de reglas es un JSON con una lista ordenada de reglas; gana la
+primera que coincide con cada archivo:
+
+    {
+        "rules": [
+            {"glob": "*.tmp", "target": null},
+            {"regex": "^factura_\\d+", "ignore_case": true, "target": "Facturas/{year}"},
+            {"extensions": ["jpg", "png"], "target": "Imagenes/{year}/{month}"},
+            {"size": {"min": "100MB"}, "target": "Grandes"},
+            {"age_days": {"min": 365}, "target": "Archivo/{year}"},
+            {"target": "Otros/{ext}"}
+        ]
+    }
+
+Cada regla usa un solo criterio: "extensions" (también compuestas, como
+"tar.gz", que se comparan con cada sufijo del nombre), "glob" (sobre el nombre
+completo), "regex" (búsqueda en el nombre), "size" (bytes o "10MB", mínimo
+incluido y máximo excluido), "age_days" (días desde la última modificación)
+o ninguno (regla por defecto). "target" es la carpeta destino relativa al
+directorio organizado; admite {year}, {month}, {day} (de la fecha de
+modificación), {ext} y {rule}. Un target null deja el archivo donde está.
+
+Las reglas se compilan una sola vez en una tabla de despacho: un dict para
+las extensiones, búsqueda binaria sobre umbrales ordenados para tamaños y
+antigüedades, y una única regex combinada para los nombres. Así el coste
+por archivo es constante, sin importar cuántas reglas haya. Las regex con
+referencias a grupos (\\1, (?P=nombre)) o grupos con nombre no se pueden
+combinar sin cambiar su numeración, y se comprueban cada una por separado.
+"""
+
+import bisect
+import datetime
+import fnmatch
+import json
+import re
+import string
+import time
+
+from src.utils import print_error
+
+SELECTORS = ("extensions", "glob", "regex", "size", "age_days")
+TEMPLATE_FIELDS = {"year", "month", "day", "ext", "rule"}
+
+_SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3, "TB": 1024**4}
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?B)?\s*$", re.IGNORECASE)
+
+
+def parse_size(value):
+    """Convierte 1024, "1.5MB" o "10 kb" en bytes."""
+    if isinstance(value, (int, float)):
+        return value
+    match = _SIZE_RE.match(str(value))
+    if not match:
+        raise ValueError(f"tamaño no válido: {value!r}")
+    number, unit = match.groups()
+    return float(number) * _SIZE_UNITS[(unit or "B").upper()]
+
+
+def _interval_table(bounds):
+    """
+    Compila rangos [mínimo, máximo) en (umbrales, ganadores): para el valor v,
+    ganadores[bisect_right(umbrales, v)] es el índice de la primera regla
+    cuyo rango contiene v (o None).
+    """
+    thresholds = sorted({b for _, low, high in bounds for b in (low, high) if b is not None})
+    winners = []
+    for i in range(len(thresholds) + 1):
+        low = thresholds[i - 1] if i > 0 else None
+        high = thresholds[i] if i < len(thresholds) else None
+        winner = None
+        for index, rule_low, rule_high in bounds:
+            if (rule_low is None or (low is not None and rule_low <= low)) and (
+                rule_high is None or (high is not None and high <= rule_high)
+            ):
+                winner = index
+                break
+        winners.append(winner)
+    return thresholds, winners
+
+
+def _check_template(target, index):
+    if target is None:
+        return
+    for _, field, _, _ in string.Formatter().parse(target):
+        if field is not None and field not in TEMPLATE_FIELDS:
+            raise ValueError(f"regla {index}: campo desconocido en target: {{{field}}}")
+
+
+def _uses_groups(compiled):
+    """Indica si la regex tiene grupos con nombre o referencias a grupos."""
+    from src.analyzer import _uses_group_refs
+
+    return bool(compiled.groupindex) or _uses_group_refs(compiled.pattern)
+
+
+class RuleTable:
+    """Tabla de despacho compilada a partir de una lista de reglas."""
+
+    def __init__(self, rules, now=None):
+        self.now = time.time() if now is None else now
+        self.targets = []
+        self.names = []
+        self.extensions = {}
+        self.default = None
+        name_patterns = []
+        # Reglas de nombre que no entran en la regex combinada: (índice, búsqueda)
+        self.name_checks = []
+        sizes, ages = [], []
+
+        for index, rule in enumerate(rules):
+            selectors = [key for key in SELECTORS if key in rule]
+            if len(selectors) > 1:
+                raise ValueError(f"regla {index}: usa más de un criterio ({', '.join(selectors)})")
+            if "target" not in rule:
+                raise ValueError(f"regla {index}: falta 'target'")
+            _check_template(rule["target"], index)
+            self.targets.append(rule["target"])
+            self.names.append(rule.get("name", f"regla_{index}"))
+
+            if not selectors:
+                if self.default is None:
+                    self.default = index
+                continue
+            selector = selectors[0]
+            value = rule[selector]
+            if selector == "extensions":
+                for ext in value:
+                    self.extensions.setdefault(ext.lower().lstrip("."), index)
+            elif selector in ("glob", "regex"):
+                pattern = fnmatch.translate(value) if selector == "glob" else value
+                flags = re.IGNORECASE if rule.get("ignore_case") else 0
+                try:
+                    compiled = re.compile(pattern, flags)
+                except re.error as e:
+                    raise ValueError(f"regla {index}: regex no válida: {e}") from None
+                if selector == "regex" and _uses_groups(compiled):
+                    self.name_checks.append((index, compiled.search))
+                    continue
+                if selector == "regex":
+                    # Búsqueda en cualquier posición del nombre
+                    pattern = f"(?s:.*?)(?:{pattern})"
+                if rule.get("ignore_case"):
+                    pattern = f"(?i:{pattern})"
+                name_patterns.append((index, f"(?P<r{index}>{pattern})", compiled))
+            elif selector == "size":
+                low, high = value.get("min"), value.get("max")
+                sizes.append(
+                    (
+                        index,
+                        None if low is None else parse_size(low),
+                        None if high is None else parse_size(high),
+                    )
+                )
+            else:
+                ages.append((index, value.get("min"), value.get("max")))
+
+        # Una sola regex: con match() en la posición 0 gana la primera
+        # alternativa que coincide, es decir, la regla de menor índice
+        self.name_regex = None
+        if name_patterns:
+            try:
+                self.name_regex = re.compile("|".join(p for _, p, _ in name_patterns))
+            except re.error:
+                # p. ej. flags globales dentro de una regex: cada una por separado
+                self.name_checks.extend(
+                    (index, compiled.search if "regex" in rules[index] else compiled.match)
+                    for index, _, compiled in name_patterns
+                )
+        self.name_checks.sort()
+        self.size_table = _interval_table(sizes)
+        self.age_table = _interval_table(ages)
+        self.has_sizes = bool(sizes)
+        self.has_ages = bool(ages)
+
+    @staticmethod
+    def _lookup(table, value):
+        thresholds, winners = table
+        return winners[bisect.bisect_right(thresholds, value)]
+
+    def match(self, name, size, mtime):
+        """Índice de la primera regla que coincide con el archivo, o None."""
+        candidates = []
+        if self.extensions:
+            # "a.tar.gz" se busca como "tar.gz" y como "gz"
+            parts = name.lower().lstrip(".").split(".")
+            indexes = [
+                self.extensions[ext]
+                for ext in (".".join(parts[i:]) for i in range(1, len(parts)))
+                if ext in self.extensions
+            ]
+            if indexes:
+                candidates.append(min(indexes))
+        if self.name_regex is not None:
+            found = self.name_regex.match(name)
+            if found:
+                candidates.append(int(found.lastgroup[1:]))
+        for index, check in self.name_checks:
+            if check(name):
+                candidates.append(index)
+                break
+        if self.has_sizes:
+            index = self._lookup(self.size_table, size)
+            if index is not None:
+                candidates.append(index)
+        if self.has_ages:
+            index = self._lookup(self.age_table, (self.now - mtime) / 86400)
+            if index is not None:
+                candidates.append(index)
+        if self.default is not None:
+            candidates.append(self.default)
+        return min(candidates, default=None)
+
+    def target(self, index, name, mtime):
+        """Carpeta destino (relativa) de la regla para el archivo, o None si se ignora."""
+        template = self.targets[index]
+        if template is None or "{" not in template:
+            return template
+        date = datetime.datetime.fromtimestamp(mtime)
+        dot = name.rfind(".")
+        return template.format(
+            year=f"{date.year:04d}",
+            month=f"{date.month:02d}",
+            day=f"{date.day:02d}",
+            ext=name[dot + 1 :].lower() if dot > 0 else "no_ext",
+            rule=self.names[index],
+        )
+
+
+def load_rules(path):
+    """Lee y compila un archivo de reglas. Devuelve la RuleTable o None si hay errores."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print_error(f"No se pudo leer el archivo de reglas {path}: {e}")
+        return None
+    rules = data.get("rules") if isinstance(data, dict) else data
+    if not isinstance(rules, list):
+        print_error("El archivo de reglas debe contener una lista 'rules'.")
+        return None
+    try:
+        return RuleTable(rules)
+    except (ValueError, TypeError, AttributeError) as e:
+        print_error(f"Reglas no válidas: {e}")
+        return None
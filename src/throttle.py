@@ -0,0 +1,315 @@
+"""
+Planificador de E/S compartido por las lecturas, los recorridos de
+directorios y los movimientos de archivos.
+
+Por defecto está inactivo y no añade coste. Al configurarlo limita:
+- el caudal (bytes/s) y las operaciones por segundo (stat, scandir, rename),
+  con cubetas de fichas (token bucket) que permiten ráfagas de un segundo;
+- la prioridad de E/S del proceso, al estilo de ionice (high, normal, low,
+  idle), aplicada con ioprio_set en Linux;
+- la concurrencia: con `adaptive`, el número de operaciones simultáneas
+  crece mientras la latencia medida se mantiene y se reduce a la mitad
+  cuando sube (AIMD), para no saturar un disco compartido.
+"""
+
+import contextlib
+import io
+import os
+import platform
+import sys
+import threading
+import time
+
+# Clases y niveles de ioprio (linux/ioprio.h) para cada prioridad
+PRIORITIES = {"high": (2, 0), "normal": (2, 4), "low": (2, 7), "idle": (3, 0)}
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_WHO_PROCESS = 1
+_SYS_IOPRIO_SET = {
+    "x86_64": 251,
+    "i686": 289,
+    "i386": 289,
+    "aarch64": 30,
+    "riscv64": 30,
+    "armv7l": 314,
+    "ppc64le": 273,
+    "s390x": 282,
+}
+
+# Buffer de lectura de los archivos abiertos a través del planificador
+READ_BUFFER = 1024 * 1024
+
+# Concurrencia máxima por defecto en modo adaptativo
+DEFAULT_MAX_CONCURRENCY = 8
+
+# La concurrencia se reduce cuando la latencia media supera este factor de la
+# mínima observada, como mucho una vez por BACKOFF_INTERVAL segundos
+LATENCY_FACTOR = 2.0
+BACKOFF_INTERVAL = 0.5
+
+# Peso de cada muestra en la media móvil de la latencia
+LATENCY_SMOOTHING = 0.2
+
+
+class _TokenBucket:
+    """Cubeta de fichas con capacidad de un segundo de presupuesto."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.stamp = time.monotonic()
+
+    def reserve(self, amount):
+        """
+        Descuenta `amount` fichas y devuelve los segundos que hay que esperar
+        hasta que el saldo vuelva a ser positivo. Las peticiones mayores que la
+        capacidad se aceptan dejando el saldo en negativo.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        self.tokens -= amount
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class IOScheduler:
+    """
+    Planificador de E/S del proceso. Las operaciones pasan por acquire()
+    (presupuesto), slot() (concurrencia) y record() (latencia medida).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        self.configure()
+
+    def configure(
+        self,
+        bytes_per_sec=None,
+        ops_per_sec=None,
+        priority=None,
+        adaptive=False,
+        max_concurrency=None,
+    ):
+        """
+        (Re)configura el planificador. Sin argumentos queda inactivo.
+        Devuelve False si la prioridad no es válida.
+        """
+        if priority is not None and priority not in PRIORITIES:
+            from src.utils import print_error
+
+            print_error(
+                f"Prioridad de E/S no válida: {priority} "
+                f"(opciones: {', '.join(PRIORITIES)})"
+            )
+            return False
+        with self.lock:
+            self.bytes_per_sec = bytes_per_sec
+            self.ops_per_sec = ops_per_sec
+            self.priority = priority
+            self.adaptive = adaptive
+            self.max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+            self.byte_bucket = _TokenBucket(bytes_per_sec) if bytes_per_sec else None
+            self.op_bucket = _TokenBucket(ops_per_sec) if ops_per_sec else None
+            # Con prioridad idle se empieza con una sola operación a la vez
+            self.limit = 1 if priority == "idle" else self.max_concurrency
+            self.in_flight = 0
+            self.latencies = {}
+            self.successes = 0
+            self.last_backoff = 0.0
+            self.throttled_s = 0.0
+            self.backoffs = 0
+            self.active = bool(bytes_per_sec or ops_per_sec or adaptive)
+            self.ready.notify_all()
+        if priority is not None:
+            _set_io_priority(priority)
+        return True
+
+    def worker_config(self, workers):
+        """
+        Configuración para cada uno de `workers` procesos hijos: el presupuesto
+        se reparte entre ellos para que el total no supere el configurado. La
+        prioridad de E/S no se incluye porque los hijos la heredan del proceso.
+        """
+        workers = max(1, workers or os.cpu_count() or 1)
+        return {
+            "bytes_per_sec": self.bytes_per_sec and self.bytes_per_sec / workers,
+            "ops_per_sec": self.ops_per_sec and self.ops_per_sec / workers,
+            "adaptive": self.adaptive,
+            "max_concurrency": max(1, self.limit // workers),
+        }
+
+    def acquire(self, nbytes=0, ops=1):
+        """Espera hasta que haya presupuesto para `ops` operaciones y `nbytes` bytes."""
+        if not self.active:
+            return
+        with self.lock:
+            wait = 0.0
+            if self.op_bucket is not None and ops:
+                wait = self.op_bucket.reserve(ops)
+            if self.byte_bucket is not None and nbytes:
+                wait = max(wait, self.byte_bucket.reserve(nbytes))
+            self.throttled_s += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, seconds, kind="read"):
+        """
+        Registra la latencia de una operación y ajusta la concurrencia:
+        +1 tras `limit` operaciones sin degradación, mitad si la latencia sube.
+        Cada tipo de operación ("read", "meta", "move") tiene su propia
+        referencia, porque sus latencias no son comparables entre sí.
+        """
+        if not self.adaptive:
+            return
+        with self.lock:
+            state = self.latencies.get(kind)
+            if state is None:
+                state = self.latencies[kind] = [seconds, seconds]
+            else:
+                state[0] += (seconds - state[0]) * LATENCY_SMOOTHING
+                state[1] = min(state[1], state[0])
+            latency, baseline = state
+            if latency > baseline * LATENCY_FACTOR:
+                now = time.monotonic()
+                if now - self.last_backoff >= BACKOFF_INTERVAL and self.limit > 1:
+                    self.limit = max(1, self.limit // 2)
+                    self.last_backoff = now
+                    self.backoffs += 1
+                    # La referencia se relaja por si la carga del disco cambió
+                    state[1] = baseline * 1.1
+                self.successes = 0
+                return
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.max_concurrency:
+                self.limit += 1
+                self.successes = 0
+                self.ready.notify()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Reserva un hueco de concurrencia durante la operación (modo adaptativo)."""
+        if not self.adaptive:
+            yield
+            return
+        with self.lock:
+            while self.in_flight >= self.limit:
+                self.ready.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.ready.notify()
+
+    def stats(self):
+        """Estado del planificador para las métricas de la ejecución."""
+        with self.lock:
+            return {
+                "active": self.active,
+                "bytes_per_sec": self.bytes_per_sec,
+                "ops_per_sec": self.ops_per_sec,
+                "priority": self.priority,
+                "concurrency": self.limit if self.adaptive else None,
+                "latency_ms": {
+                    kind: round(latency * 1000, 3)
+                    for kind, (latency, _) in self.latencies.items()
+                },
+                "backoffs": self.backoffs,
+                "throttled_s": round(self.throttled_s, 3),
+            }
+
+
+class _ThrottledRaw(io.RawIOBase):
+    """Archivo de solo lectura cuyas lecturas pasan por el planificador."""
+
+    def __init__(self, raw, scheduler):
+        self.raw = raw
+        self.scheduler = scheduler
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return self.raw.seekable()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.raw.seek(offset, whence)
+
+    def tell(self):
+        return self.raw.tell()
+
+    def fileno(self):
+        return self.raw.fileno()
+
+    def readinto(self, buffer):
+        with self.scheduler.slot():
+            start = time.perf_counter()
+            n = self.raw.readinto(buffer)
+            self.scheduler.record(time.perf_counter() - start)
+        if n:
+            self.scheduler.acquire(n)
+        return n
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+
+def open_read(path, scheduler=None):
+    """
+    Abre un archivo en binario para leerlo. Si el planificador está activo,
+    las lecturas respetan su presupuesto y su concurrencia.
+    """
+    scheduler = scheduler or SCHEDULER
+    if not scheduler.active:
+        return open(path, "rb")
+    raw = open(path, "rb", buffering=0)
+    return io.BufferedReader(_ThrottledRaw(raw, scheduler), buffer_size=READ_BUFFER)
+
+
+@contextlib.contextmanager
+def operation(nbytes=0, kind="meta"):
+    """
+    Envuelve una operación de metadatos o un movimiento: espera presupuesto
+    (una operación más `nbytes`), ocupa un hueco y registra su latencia.
+    """
+    if not SCHEDULER.active:
+        yield
+        return
+    SCHEDULER.acquire(nbytes)
+    with SCHEDULER.slot():
+        start = time.perf_counter()
+        yield
+        SCHEDULER.record(time.perf_counter() - start, kind)
+
+
+def _set_io_priority(priority):
+    """Aplica la prioridad de E/S al proceso con ioprio_set (solo Linux)."""
+    from src.utils import print_warning
+
+    number = _SYS_IOPRIO_SET.get(platform.machine())
+    if not sys.platform.startswith("linux") or number is None:
+        print_warning("La prioridad de E/S solo se aplica en Linux; se ignora.")
+        return False
+    import ctypes
+    import ctypes.util
+
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    ioclass, level = PRIORITIES[priority]
+    value = (ioclass << _IOPRIO_CLASS_SHIFT) | level
+    if libc.syscall(number, _IOPRIO_WHO_PROCESS, 0, value) != 0:
+        error = ctypes.get_errno()
+        print_warning(
+            f"No se pudo aplicar la prioridad de E/S '{priority}': {os.strerror(error)}"
+        )
+        return False
+    return True
+
+
+SCHEDULER = IOScheduler()
+
+
+def init_worker(config):
+    """Inicializador de los procesos hijos: aplica su parte del presupuesto."""
+    SCHEDULER.configure(**config)
@@ -1,140 +1,438 @@
+import atexit
 import datetime
+import fnmatch
 import functools
+import itertools
 import logging
-import logging.handlers
 import os
 import sys
 import threading
 import time
 
-from colorama import Fore, Style, init
+# Solo constantes ANSI: importarlas no tiene efectos secundarios
+from colorama import Fore, Style
 
-# Inicializar colorama
-init(autoreset=True)
+from src.progress import emit
+from src.throttle import SCHEDULER
 
 # Configuración de Logging
 LOG_DIR = "logs"
 LOG_FILE = os.path.join(LOG_DIR, "audit.log")
 
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
+file_formatter = logging.Formatter(
+    "[%(asctime)s] %(levelname)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+
+class LazyRotatingFileHandler(logging.Handler):
+    """
+    Handler que crea la carpeta de logs y abre el archivo con rotación
+    (max 1MB, guarda 5 archivos previos) recién al escribir el primer registro,
+    para que importar el módulo no tenga efectos secundarios.
+    Con `rotate=False` solo añade al archivo (lo usan los procesos hijos, que
+    no deben rotar el archivo que está escribiendo el padre).
+    """
+
+    def __init__(self, rotate=True):
+        super().__init__()
+        self.rotate = rotate
+        self._handler = None
+
+    def emit(self, record):
+        if self._handler is None:
+            import logging.handlers
+
+            os.makedirs(LOG_DIR, exist_ok=True)
+            if self.rotate:
+                self._handler = logging.handlers.RotatingFileHandler(
+                    LOG_FILE, maxBytes=1024 * 1024, backupCount=5, encoding="utf-8"
+                )
+            else:
+                self._handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+            self._handler.setFormatter(file_formatter)
+        self._handler.emit(record)
+
+    def close(self):
+        # El archivo se vuelve a abrir con el siguiente registro
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+        super().close()
+
+
+# Las llamadas de log_execution se registran en DEBUG, una de cada N por función
+LOG_SAMPLE_EVERY = 100
+
+# Métricas de la ejecución actual, agregadas en memoria:
+# {función: [llamadas, errores, tiempo_real, tiempo_cpu]} (tiempos inclusivos, en s)
+METRICS = {}
+# Funciones marcadas como "hot" (solo métricas agregadas, sin logs por llamada)
+HOT_FUNCTIONS = set()
+# Contadores de E/S: bytes leídos, archivos visitados, llamadas stat, ...
+COUNTERS = {
+    "bytes_read": 0,
+    "files_visited": 0,
+    "dirs_scanned": 0,
+    "stat_calls": 0,
+    "cache_hits": 0,
+    "cache_misses": 0,
+}
+
+file_handler = LazyRotatingFileHandler()
+_log_listener = None
+_log_lock = threading.Lock()
+# Protege METRICS y COUNTERS: los trabajos de un lote se ejecutan en hilos
+_metrics_lock = threading.Lock()
+
+
+class _DeferredLogging(logging.Handler):
+    """
+    Handler inicial del logger: con el primer registro arranca el pipeline en
+    segundo plano (start_logging) y se retira, así que no añade coste después.
+    """
+
+    def emit(self, record):
+        start_logging()
+        logger.handle(record)
+
+
+def start_logging():
+    """
+    Conecta el logger a una cola: el hilo que registra solo encola el registro
+    y un QueueListener en segundo plano lo formatea y escribe en el archivo.
+    """
+    global _log_listener
+    with _log_lock:
+        if _log_listener is not None:
+            return
+        import logging.handlers
+        import queue
+
+        class _KitQueueHandler(logging.handlers.QueueHandler):
+            # El formateo (%-style) queda para el hilo del listener
+            def prepare(self, record):
+                return record
+
+        log_queue = queue.SimpleQueue()
+        _log_listener = logging.handlers.QueueListener(
+            log_queue, file_handler, respect_handler_level=True
+        )
+        _log_listener.start()
+        for handler in list(logger.handlers):
+            if isinstance(handler, _DeferredLogging):
+                logger.removeHandler(handler)
+        logger.addHandler(_KitQueueHandler(log_queue))
+
+
+def stop_logging():
+    """Registra los contadores agregados y vacía la cola de logs en el archivo."""
+    global _log_listener
+    for name in HOT_FUNCTIONS:
+        calls, errors, wall, _ = METRICS[name]
+        if calls:
+            logger.info(
+                "Resumen '%s': %d llamadas, %d errores, %.3f s.", name, calls, errors, wall
+            )
+    with _log_lock:
+        if _log_listener is None:
+            return
+        _log_listener.stop()
+        _log_listener = None
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(_DeferredLogging())
+
+
+def _log_directly_after_fork():
+    # Los procesos hijos de los pools heredan el handler de la cola pero no el
+    # hilo que la vacía, y terminan sin pasar por atexit: escriben directamente
+    # en el archivo
+    global _log_listener, _log_lock, _metrics_lock
+    _log_listener = None
+    _log_lock = threading.Lock()
+    _metrics_lock = threading.Lock()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(LazyRotatingFileHandler(rotate=False))
+
 
 # Configurar logger
 logger = logging.getLogger("ProyectoKIT")
 logger.setLevel(logging.INFO)
+logger.addHandler(_DeferredLogging())
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_log_directly_after_fork)
 
-# Handler para archivo con rotación (max 1MB, guarda 5 archivos previos)
-file_handler = logging.handlers.RotatingFileHandler(
-    LOG_FILE, maxBytes=1024 * 1024, backupCount=5, encoding="utf-8"
-)
-file_formatter = logging.Formatter(
-    "[%(asctime)s] %(levelname)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
-)
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+_console_ready = False
+
+
+def init_console():
+    """Inicializa colorama la primera vez que se escribe en la consola."""
+    global _console_ready
+    if not _console_ready:
+        from colorama import init
+
+        init(autoreset=True)
+        _console_ready = True
 
 
 def print_success(message):
-    print(f"{Fore.GREEN}[✔] {message}")
-    logger.info(f"Éxito: {message}")
+    init_console()
+    emit(f"{Fore.GREEN}[✔] {message}")
+    logger.info("Éxito: %s", message)
 
 
 def print_error(message):
-    print(f"{Fore.RED}[✘] {message}")
-    logger.error(f"Error: {message}")
+    init_console()
+    emit(f"{Fore.RED}[✘] {message}")
+    logger.error("Error: %s", message)
 
 
 def print_warning(message):
-    print(f"{Fore.YELLOW}[!] {message}")
-    logger.warning(f"Advertencia: {message}")
+    init_console()
+    emit(f"{Fore.YELLOW}[!] {message}")
+    logger.warning("Advertencia: %s", message)
 
 
 def print_info(message):
-    print(f"{Fore.CYAN}[i] {message}")
-    logger.info(f"Info: {message}")
+    init_console()
+    emit(f"{Fore.CYAN}[i] {message}")
+    logger.debug("Info: %s", message)
 
 
 def print_header(message):
-    print(f"\n{Fore.MAGENTA}{Style.BRIGHT}{'='*40}")
-    print(f" {message.center(38)}")
-    print(f"{'='*40}")
-    logger.info(f"--- Sección: {message} ---")
+    init_console()
+    emit(f"\n{Fore.MAGENTA}{Style.BRIGHT}{'='*40}")
+    emit(f" {message.center(38)}")
+    emit(f"{'='*40}")
+    logger.info("--- Sección: %s ---", message)
+
 
+def count_metric(name, amount=1):
+    """Suma `amount` al contador de E/S `name`."""
+    with _metrics_lock:
+        COUNTERS[name] = COUNTERS.get(name, 0) + amount
 
-class Spinner:
+
+def with_counters(func, *args):
     """
-    Clase para mostrar una animación de carga en la consola.
-    Uso:
-    with Spinner("Procesando..."):
-        # tarea larga
+    Ejecuta func(*args) y devuelve (resultado, {contador: incremento}) con lo
+    que sumaron los contadores de E/S durante la llamada. Lo usan los procesos
+    hijos de los pools, cuyos contadores no llegan al padre (ver merge_counters).
     """
-
-    def __init__(self, message="Cargando...", delay=0.1):
-        self.spinner = ["|", "/", "-", "\\"]
-        self.delay = delay
-        self.message = message
-        self.running = False
-        self.thread = None
-
-    def spin(self):
-        while self.running:
-            for char in self.spinner:
-                sys.stdout.write(f"\r{Fore.CYAN}{char} {self.message}")
-                sys.stdout.flush()
-                time.sleep(self.delay)
-                if not self.running:
-                    break
-
-    def __enter__(self):
-        self.running = True
-        self.thread = threading.Thread(target=self.spin)
-        self.thread.start()
-        return self
-
-    def __exit__(self, exc_type, exc_value, exc_traceback):
-        self.running = False
-        self.thread.join()
-        sys.stdout.write(f'\r{" " * (len(self.message) + 2)}\r')  # Limpiar línea
-        sys.stdout.flush()
-
-
-def log_execution(func):
+    before = dict(COUNTERS)
+    result = func(*args)
+    deltas = {
+        name: value - before.get(name, 0)
+        for name, value in COUNTERS.items()
+        if value != before.get(name, 0)
+    }
+    return result, deltas
+
+
+def merge_counters(deltas):
+    """Suma a los contadores del proceso los incrementos de un proceso hijo."""
+    for name, amount in deltas.items():
+        count_metric(name, amount)
+
+
+def stat_entry(entry):
+    """DirEntry.stat() contabilizado (la primera llamada es la que va al disco)."""
+    count_metric("stat_calls")
+    if SCHEDULER.active:
+        SCHEDULER.acquire()
+    return entry.stat()
+
+
+def get_metrics():
+    """Devuelve una copia de las métricas de la ejecución actual."""
+    with _metrics_lock:
+        snapshot = {name: tuple(values) for name, values in METRICS.items()}
+        counters = dict(COUNTERS)
+    functions = {
+        name: {
+            "calls": calls,
+            "errors": errors,
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "hot": name in HOT_FUNCTIONS,
+        }
+        for name, (calls, errors, wall, cpu) in snapshot.items()
+        if calls
+    }
+    metrics = {"functions": functions, "counters": counters}
+    if SCHEDULER.active:
+        metrics["io"] = SCHEDULER.stats()
+    return metrics
+
+
+def reset_metrics():
+    """Pone a cero las métricas (por ejemplo, entre trabajos de un lote)."""
+    with _metrics_lock:
+        for values in METRICS.values():
+            values[:] = [0, 0, 0.0, 0.0]
+        for name in COUNTERS:
+            COUNTERS[name] = 0
+
+
+def _add_call(metrics, wall, cpu):
+    with _metrics_lock:
+        metrics[0] += 1
+        metrics[2] += wall
+        metrics[3] += cpu
+
+
+def _add_error(metrics):
+    with _metrics_lock:
+        metrics[1] += 1
+
+
+def log_execution(func=None, *, hot=False):
     """
     Decorador para registrar la ejecución de funciones, sus argumentos y si hubo errores.
+    Además acumula en METRICS llamadas, errores y tiempo real y de CPU de cada función.
+    Las llamadas se registran en DEBUG y solo una de cada LOG_SAMPLE_EVERY.
+    Con `@log_execution(hot=True)` (funciones llamadas una vez por archivo) solo se
+    guardan las métricas, que se registran como resumen al terminar.
     """
+    if func is None:
+        return lambda f: log_execution(f, hot=hot)
+    name = func.__name__
+    metrics = METRICS.setdefault(name, [0, 0, 0.0, 0.0])
+    perf_counter, thread_time = time.perf_counter, time.thread_time
+
+    if hot:
+        HOT_FUNCTIONS.add(name)
+
+        @functools.wraps(func)
+        def hot_wrapper(*args, **kwargs):
+            wall, cpu = perf_counter(), thread_time()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                _add_error(metrics)
+                logger.error("Fallo en '%s': %s", name, e, exc_info=True)
+                raise
+            finally:
+                _add_call(metrics, perf_counter() - wall, thread_time() - cpu)
+
+        return hot_wrapper
+
+    calls = itertools.count()
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        sampled = (
+            logger.isEnabledFor(logging.DEBUG) and next(calls) % LOG_SAMPLE_EVERY == 0
+        )
+        wall, cpu = perf_counter(), thread_time()
         try:
-            logger.info(
-                f"Ejecutando '{func.__name__}' con args: {args}, kwargs: {kwargs}"
-            )
+            if sampled:
+                logger.debug(
+                    "Ejecutando '%s' con args: %s, kwargs: %s", name, args, kwargs
+                )
             result = func(*args, **kwargs)
-            logger.info(f"Finalizado '{func.__name__}' exitosamente.")
+            if sampled:
+                logger.debug("Finalizado '%s' exitosamente.", name)
             return result
         except Exception as e:
-            logger.error(f"Fallo en '{func.__name__}': {str(e)}", exc_info=True)
-            raise e
+            _add_error(metrics)
+            logger.error("Fallo en '%s': %s", name, e, exc_info=True)
+            raise
+        finally:
+            _add_call(metrics, perf_counter() - wall, thread_time() - cpu)
 
     return wrapper
 
 
+def walk_files(
+    directory,
+    extensions=None,
+    patterns=None,
+    max_depth=None,
+    follow_symlinks=False,
+    sort=False,
+    on_directory=None,
+):
+    """
+    Generador que recorre un directorio con os.scandir y devuelve los DirEntry
+    de los archivos encontrados. Cada DirEntry guarda en caché su stat(), así que
+    recorrer el árbol cuesta una sola llamada stat por archivo.
+
+    - extensions: tupla de terminaciones aceptadas (ej: (".txt", ".log")).
+    - patterns: lista de patrones glob sobre el nombre (ej: ["*.csv", "log_*"]).
+    - max_depth: profundidad máxima (0 = solo el directorio indicado, None = sin límite).
+    - follow_symlinks: si se entra en directorios que son enlaces simbólicos.
+    - sort: recorre cada directorio ordenado por nombre, de modo que las rutas
+      salen ordenadas según path_sort_key.
+    - on_directory: función que recibe la ruta de cada directorio antes de listarlo.
+    """
+
+    def _listing(path):
+        if on_directory is not None:
+            on_directory(path)
+        count_metric("dirs_scanned")
+        if SCHEDULER.active:
+            SCHEDULER.acquire()
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            return iter(())
+        if sort:
+            entries.sort(key=lambda e: e.name)
+        return iter(entries)
+
+    # Pila de listados pendientes: un directorio se recorre completo (en orden)
+    # antes de seguir con sus hermanos
+    stack = [(_listing(directory), 0)]
+    while stack:
+        entries, depth = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=follow_symlinks):
+                if max_depth is None or depth < max_depth:
+                    stack.append((_listing(entry.path), depth + 1))
+                continue
+            if not entry.is_file():
+                continue
+        except OSError:
+            continue
+        if extensions and not entry.name.endswith(extensions):
+            continue
+        if patterns and not any(fnmatch.fnmatch(entry.name, p) for p in patterns):
+            continue
+        count_metric("files_visited")
+        yield entry
+
+
+def path_sort_key(path):
+    """Clave de orden de walk_files(sort=True): compara ruta por componentes."""
+    return path.split(os.sep)
+
+
 def ensure_directories():
     """Asegura que existan los directorios necesarios."""
-    for folder in ["logs", "reports", "snapshots", "tests_sample"]:
+    for folder in ["logs", "reports", "snapshots", "journals", "tests_sample"]:
         if not os.path.exists(folder):
             os.makedirs(folder)
 
 
 def clear_screen():
-    """Limpia la pantalla de la consola."""
-    os.system("cls" if os.name == "nt" else "clear")
+    """Limpia la pantalla de la consola (secuencia ANSI, sin lanzar un proceso)."""
+    sys.stdout.write("\033[2J\033[H")
+    sys.stdout.flush()
 
 
 def get_valid_input(prompt, options=None):
     """
     Solicita entrada al usuario y valida contra una lista de opciones si se provee.
     """
+    init_console()
     while True:
         user_input = input(f"{Fore.BLUE}{prompt}").strip()
         if options:
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import cache, utils  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Cada prueba corre en un directorio vacío (el kit usa rutas relativas)."""
+    monkeypatch.chdir(tmp_path)
+    utils.reset_metrics()
+    yield tmp_path
+    # Vaciar los logs mientras el directorio de trabajo es el temporal
+    utils.reset_metrics()
+    utils.stop_logging()
+    utils.file_handler.close()
+    if cache._cache is not None:
+        cache._cache.close()
+        cache._cache = None
+
+
+def write(path, text):
+    """Crea un archivo de texto (y sus carpetas) y devuelve su ruta como str."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def compressed_tree(workdir):
+    """
+    Carpeta con un log normal, uno comprimido, un zip y un tar.gz. Devuelve
+    (carpeta, resultados esperados de buscar r"error \\d").
+    """
+    import gzip
+    import tarfile
+    import zipfile
+
+    folder = workdir / "logs"
+    plain = write(folder / "a.log", "ok\nerror 1\n")
+    with gzip.open(folder / "b.log.gz", "wt") as f:
+        f.write("error 2\nok\n")
+    inner = write(workdir / "c.txt", "nada\nerror 3\n")
+    with zipfile.ZipFile(folder / "d.zip", "w") as z:
+        z.write(inner, "sub/c.txt")
+    with tarfile.open(folder / "e.tar.gz", "w:gz") as t:
+        t.add(inner, "c.txt")
+    return folder, {
+        plain: [(2, "error 1")],
+        str(folder / "b.log.gz"): [(1, "error 2")],
+        f"{folder / 'd.zip'}::sub/c.txt": [(2, "error 3")],
+        f"{folder / 'e.tar.gz'}::c.txt": [(2, "error 3")],
+    }
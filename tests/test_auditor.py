@@ -0,0 +1,192 @@
+import json
+import os
+
+import pytest
+
+from src import auditor, utils
+from tests.conftest import write
+
+
+@pytest.fixture
+def tree(workdir):
+    utils.ensure_directories()
+    folder = workdir / "datos"
+    write(folder / "a.txt", "uno")
+    write(folder / "sub" / "b.txt", "dos")
+    write(folder / "sub" / "c.txt", "tres")
+    return folder
+
+
+def _cache():
+    with open(auditor.DIGEST_CACHE_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _digests():
+    return {path: digest for path, (_, digest) in _cache().items()}
+
+
+def _temp_files():
+    return [name for name in os.listdir("snapshots") if name.endswith(".tmp")]
+
+
+def test_digest_cache_drops_deleted_and_rehashes_modified(tree):
+    auditor.take_snapshot(str(tree), use_hash=True)
+    assert len(_cache()) == 3
+
+    os.remove(tree / "sub" / "b.txt")
+    write(tree / "a.txt", "uno cambiado")
+    auditor.take_snapshot(str(tree), use_hash=True)
+    assert _digests() == {
+        str(tree / "a.txt"): auditor.hash_file(str(tree / "a.txt")),
+        str(tree / "sub" / "c.txt"): auditor.hash_file(str(tree / "sub" / "c.txt")),
+    }
+    assert _temp_files() == []
+
+
+def test_digest_cache_keeps_other_trees(tree, workdir):
+    other = workdir / "otro"
+    write(other / "x.txt", "equis")
+    auditor.take_snapshot(str(tree), use_hash=True)
+    auditor.take_snapshot(str(other), use_hash=True)
+    assert len(_cache()) == 4
+
+    # Un árbol anidado solo poda lo que hay debajo de él
+    os.remove(tree / "a.txt")
+    os.remove(tree / "sub" / "b.txt")
+    auditor.take_snapshot(str(tree / "sub"), use_hash=True)
+    assert sorted(_digests()) == sorted(
+        [str(tree / "a.txt"), str(tree / "sub" / "c.txt"), str(other / "x.txt")]
+    )
+
+
+def test_digest_cache_merges_concurrent_writers(tree, workdir):
+    other = workdir / "otro"
+    write(other / "x.txt", "equis")
+    first = auditor._load_digest_cache(str(tree))
+    second = auditor._load_digest_cache(str(other))
+    with auditor.ThreadPoolExecutor() as executor:
+        auditor._hash_files({str(tree / "a.txt"): os.stat(tree / "a.txt")}, first, executor)
+        auditor._hash_files({str(other / "x.txt"): os.stat(other / "x.txt")}, second, executor)
+    auditor._save_digest_cache(first)
+    auditor._save_digest_cache(second)
+    assert sorted(_digests()) == [str(tree / "a.txt"), str(other / "x.txt")]
+
+
+def test_digest_cache_write_is_atomic(tree, monkeypatch):
+    auditor.take_snapshot(str(tree), use_hash=True)
+    before = _cache()
+    write(tree / "d.txt", "nuevo")
+
+    def fail(obj, f):
+        f.write("{")
+        raise OSError("disco lleno")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(auditor.json, "dump", fail)
+        with pytest.raises(OSError):
+            auditor.take_snapshot(str(tree), use_hash=True)
+    assert _cache() == before
+    assert _temp_files() == []
+
+
+def test_digest_cache_untouched_without_hashing(tree):
+    auditor.take_snapshot(str(tree), use_hash=True)
+    before = _cache()
+    auditor.take_snapshot(str(tree))
+    assert auditor.compare_snapshot(str(tree), use_hash=True) == {
+        "added": [],
+        "removed": [],
+        "modified": [],
+    }
+    assert _cache() == before
+
+
+def test_compare_with_hash_ignores_touch(tree):
+    auditor.take_snapshot(str(tree), use_hash=True)
+    os.utime(tree / "a.txt", ns=(1, 1))
+    path = tree / "sub" / "b.txt"
+    st = os.stat(path)
+    write(path, "DOS")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert auditor.compare_snapshot(str(tree), use_hash=True)["modified"] == [str(path)]
+    assert auditor.compare_snapshot(str(tree))["modified"] == [str(tree / "a.txt")]
+
+
+def test_snapshot_binary_roundtrip(workdir):
+    records = [
+        ("d/a.txt", 1, 10, "00" * auditor.DIGEST_SIZE),
+        ("d/año/b.txt", -5, 0, "ab" * auditor.DIGEST_SIZE),
+        ("d/año/bc.txt", 2**40, 2**33, "cd" * auditor.DIGEST_SIZE),
+    ]
+    assert auditor._write_snapshot(iter(records), True, "s.bin") == 3
+    with open("s.bin", "rb") as f:
+        assert f.read(len(auditor.SNAPSHOT_MAGIC)) == auditor.SNAPSHOT_MAGIC
+        f.seek(0)
+        has_hash, stored = auditor._read_snapshot(f)
+        assert has_hash and list(stored) == records
+
+    plain = [(path, mtime, size, None) for path, mtime, size, _ in records]
+    auditor._write_snapshot(iter(plain), False, "p.bin")
+    with open("p.bin", "rb") as f:
+        has_hash, stored = auditor._read_snapshot(f)
+        assert not has_hash and list(stored) == plain
+    # Las rutas se guardan contra la anterior: sin hash ocupa menos que las rutas
+    assert os.path.getsize("p.bin") < len(auditor.SNAPSHOT_MAGIC) + 1 + 3 * (16 + 12)
+
+    write(workdir / "x.bin", "no es un snapshot")
+    with open("x.bin", "rb") as f, pytest.raises(ValueError):
+        auditor._read_snapshot(f)
+
+
+def test_compare_merges_in_path_order(tree):
+    # "sub-x" va antes que "sub/..." como texto pero después por componentes
+    write(tree / "sub-x.txt", "x")
+    write(tree / "sub" / "z" / "d.txt", "d")
+    auditor.take_snapshot(str(tree))
+
+    os.remove(tree / "sub-x.txt")
+    write(tree / "sub" / "a0.txt", "nuevo")
+    write(tree / "sub" / "c.txt", "tres modificado")
+    write(tree / "zz.txt", "z")
+    assert auditor.compare_snapshot(str(tree)) == {
+        "added": [str(tree / "sub" / "a0.txt"), str(tree / "zz.txt")],
+        "removed": [str(tree / "sub-x.txt")],
+        "modified": [str(tree / "sub" / "c.txt")],
+    }
+
+
+def test_compare_without_snapshot(tree):
+    assert auditor.compare_snapshot(str(tree)) is None
+
+
+def test_history_diff_and_compact(tree):
+    auditor.record_history(str(tree), "v1")
+    write(tree / "nuevo.txt", "n")
+    auditor.record_history(str(tree), "v2")
+    os.remove(tree / "a.txt")
+    write(tree / "nuevo.txt", "n cambiado")
+    auditor.record_history(str(tree), "v3")
+    assert auditor.record_history(str(tree), "v3") is None
+
+    assert [p["name"] for p in auditor.list_history(str(tree))] == ["v1", "v2", "v3"]
+    expected = {
+        "added": [str(tree / "nuevo.txt")],
+        "removed": [str(tree / "a.txt")],
+        "modified": [],
+    }
+    assert auditor.diff_history(str(tree), "v1", "v3") == expected
+    assert auditor.diff_history(str(tree), "v3", "v1") == {
+        "added": expected["removed"],
+        "removed": expected["added"],
+        "modified": [],
+    }
+    assert auditor.diff_history(str(tree), "v2", "v3")["modified"] == [str(tree / "nuevo.txt")]
+
+    assert auditor.compact_history(str(tree), "v2") == 1
+    assert [p["name"] for p in auditor.list_history(str(tree))] == ["v2", "v3"]
+    assert auditor.diff_history(str(tree), "v2", "v3") == {
+        "added": [],
+        "removed": [str(tree / "a.txt")],
+        "modified": [str(tree / "nuevo.txt")],
+    }
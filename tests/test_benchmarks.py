@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import run_benchmarks  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def _listing(root):
+    files = {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(folder, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+def test_generate_tree_is_reproducible(workdir):
+    config = {"files": 40, "depth": 2, "fanout": 2, "min_size": 10, "max_size": 500}
+    synthetic.generate_tree("a", seed=1, **config)
+    synthetic.generate_tree("b", seed=1, **config)
+    synthetic.generate_tree("c", seed=2, **config)
+    first = _listing("a")
+    assert len(first) == 40
+    assert first == _listing("b")
+    assert first != _listing("c")
+    # Los binarios tienen exactamente el tamaño elegido; el texto termina la línea
+    for name, data in first.items():
+        if name.endswith(".jpg"):
+            assert 10 <= len(data) <= 500
+    assert os.path.isdir(os.path.join("a", "dir_1", "dir_0"))
+
+
+def test_generate_flat_has_one_level(workdir):
+    synthetic.generate_flat("plano", files=15, max_size=200, distribution="uniform")
+    assert len(os.listdir("plano")) == 15
+    assert all(os.path.isfile(os.path.join("plano", n)) for n in os.listdir("plano"))
+
+
+def test_compare_with_baseline_flags_regressions(capsys):
+    def results(**medians):
+        return {"results": {name: {"median_s": s} for name, s in medians.items()}}
+
+    baseline = results(rapida=0.100, lenta=0.100)
+    current = results(rapida=0.110, lenta=0.200, nueva=0.050)
+    regressions = run_benchmarks.compare_with_baseline(current, baseline, 20.0)
+    assert [(name, round(change)) for name, _, _, change in regressions] == [("lenta", 100)]
+    assert "nuevo" in capsys.readouterr().out
+
+
+def test_small_run_saves_and_compares_baseline(workdir):
+    command = [
+        sys.executable,
+        os.path.join(ROOT, "benchmarks", "run_benchmarks.py"),
+        "--files", "20",
+        "--depth", "1",
+        "--max-size", "2048",
+        "--repeat", "1",
+        "--output", "resultados.json",
+        "--baseline", "base.json",
+    ]
+    subprocess.run(command + ["--save-baseline"], check=True, capture_output=True)
+    with open("resultados.json", encoding="utf-8") as f:
+        results = json.load(f)
+    assert results["config"]["files"] == 20
+    assert {"analyze_content", "take_snapshot", "organize_by_extension"} <= set(
+        results["results"]
+    )
+    with open("base.json", encoding="utf-8") as f:
+        assert json.load(f) == results
+
+    done = subprocess.run(
+        command + ["--threshold", "1e9"], check=True, capture_output=True, text=True
+    )
+    assert "Sin regresiones." in done.stdout
+
+
+def test_default_outputs_stay_in_benchmarks_dir():
+    folders = {
+        os.path.dirname(run_benchmarks.RESULTS_FILE),
+        os.path.dirname(run_benchmarks.BASELINE_FILE),
+    }
+    assert folders == {os.path.join(ROOT, "benchmarks")}
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from src import analyzer, cache
+from tests.conftest import write
+
+
+def test_library_defaults_do_not_need_snapshots_dir(workdir):
+    path = write(workdir / "a.txt", "uno dos\nerror tres\n")
+    assert not os.path.exists("snapshots")
+    assert analyzer.search_pattern_in_file(path, "error") == [(2, "error tres")]
+    assert analyzer.count_words(path) == 4
+    assert analyzer.analyze_content(str(workdir), "error") == {path: [(2, "error tres")]}
+    assert not os.path.exists("snapshots")
+
+
+def test_cache_creates_its_directory(workdir):
+    path = write(workdir / "a.txt", "error\n")
+    assert analyzer.count_words(path, use_cache=True) == 1
+    assert os.path.exists(cache.CACHE_FILE)
+
+
+def test_cached_search_reuses_and_invalidates(workdir):
+    path = write(workdir / "a.txt", "error 1\nok\n")
+    first = analyzer.analyze_content(str(workdir), "error", use_cache=True)
+    again = analyzer.analyze_content(str(workdir), "error", use_cache=True)
+    assert first == again == {path: [(1, "error 1")]}
+    assert cache.get_cache().hits == 1
+
+    write(workdir / "a.txt", "ok\nerror 2\nerror 3\n")
+    os.utime(path, ns=(1, 1))
+    assert analyzer.analyze_content(str(workdir), "error", use_cache=True) == {
+        path: [(2, "error 2"), (3, "error 3")]
+    }
+
+
+def test_search_stamp_is_taken_before_reading(workdir, monkeypatch):
+    path = write(workdir / "a.txt", "error viejo\n")
+    original = analyzer._search_source
+
+    def search_then_modify(source, regex):
+        results = original(source, regex)
+        write(workdir / "a.txt", "error nuevo\nerror nuevo\n")
+        return results
+
+    monkeypatch.setattr(analyzer, "_search_source", search_then_modify)
+    assert analyzer.search_pattern_in_file(path, "error", use_cache=True) == [
+        (1, "error viejo")
+    ]
+    monkeypatch.setattr(analyzer, "_search_source", original)
+    # El resultado viejo quedó con la huella vieja: no se reutiliza
+    assert analyzer.search_pattern_in_file(path, "error", use_cache=True) == [
+        (1, "error nuevo"),
+        (2, "error nuevo"),
+    ]
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_search_in_file_same_result_with_and_without_cache(compressed_tree, use_cache, capsys):
+    folder, expected = compressed_tree
+    for path, found in expected.items():
+        assert analyzer.search_pattern_in_file(path, r"error \d", use_cache) == found
+        assert analyzer.search_pattern_in_file(path, "inexistente", use_cache) == []
+    for name in ("d.zip", "e.tar.gz"):
+        assert analyzer.search_pattern_in_file(str(folder / name), "error", use_cache) == []
+    assert "es un archivador" in capsys.readouterr().out
+
+
+def test_lru_eviction_keeps_recent_entries(workdir):
+    store = cache.ResultCache(path="c.db", max_bytes=200)
+    paths = [write(workdir / f"{i}.txt", "x") for i in range(10)]
+    for path in paths:
+        store.put(path, "op", "", "v" * 40)
+    assert store.total <= 200
+    assert store.get(paths[-1], "op", "") == "v" * 40
+    assert store.get(paths[0], "op", "") is None
+    store.close()
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from src import cli, utils
+from tests.conftest import write
+
+
+@pytest.fixture
+def logs(workdir):
+    utils.ensure_directories()
+    for name in ("uno", "dos"):
+        for i in range(3):
+            write(workdir / name / f"{i}.log", f"ok\nerror {i}\n" * 50)
+    return workdir
+
+
+def _metrics(name):
+    with open(f"reports/metricas_{name}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_batch_runs_every_job(logs):
+    write(logs / "trabajos.txt", "# comentario\nsearch uno error --no-cache\n\ncount dos\n")
+    assert cli.run(["batch", "trabajos.txt"]) == 0
+
+
+def test_batch_reports_failed_jobs(logs):
+    write(logs / "trabajos.txt", "search uno error --no-cache\nsearch no_existe error\n")
+    assert cli.run(["batch", "trabajos.txt"]) == 1
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "--metrics search uno error",
+        "--progress json search uno error",
+        "--io-bps 1MB count uno",
+        "--io-adaptive count uno",
+        "batch otro.txt",
+        "search",
+    ],
+)
+def test_batch_rejects_invalid_job_lines(logs, line, capsys):
+    write(logs / "trabajos.txt", f"count dos\n{line}\n")
+    assert cli.run(["batch", "trabajos.txt"]) == 1
+    # Ningún trabajo llega a ejecutarse
+    assert "Lote terminado" not in capsys.readouterr().out
+
+
+def test_batch_metrics_match_individual_runs(logs):
+    expected = 0
+    for name in ("uno", "dos"):
+        assert cli.run(["--metrics", "search", name, "error", "--no-cache"]) == 0
+        expected += _metrics("search")["counters"]["bytes_read"]
+        utils.reset_metrics()
+
+    write(logs / "trabajos.txt", "search uno error --no-cache\nsearch dos error --no-cache\n")
+    assert cli.run(["--metrics", "batch", "trabajos.txt", "--workers", "2"]) == 0
+    metrics = _metrics("batch")
+    assert metrics["counters"]["bytes_read"] == expected > 0
+    assert metrics["functions"]["analyze_content"]["calls"] == 2
+
+
+def _groups(lines):
+    parser = cli.build_parser()
+    jobs = [(num, parser.parse_args(line.split())) for num, line in enumerate(lines, 1)]
+    return [[num for num, _ in group] for group in cli._group_jobs(jobs)]
+
+
+def test_batch_groups_nested_targets(logs):
+    (logs / "uno" / "x").mkdir()
+    groups = _groups(
+        ["organize uno/x", "search dos error", "dedup uno --action move", "count uno/x"]
+    )
+    assert sorted(groups) == [[1, 3, 4], [2]]
+
+
+def test_batch_groups_digest_cache_users(logs):
+    groups = _groups(["snapshot uno --hash --history a", "dedup dos", "count dos"])
+    assert groups == [[1, 2, 3]]
+    groups = _groups(["snapshot uno --history a", "snapshot dos --history b"])
+    assert sorted(groups) == [[1], [2]]
+
+
+def test_metric_counters_are_thread_safe(workdir):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def bump(_):
+        for _ in range(20000):
+            utils.count_metric("stat_calls")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(bump, range(4)))
+    assert utils.get_metrics()["counters"]["stat_calls"] == 80000
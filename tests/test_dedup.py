@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from src import dedup, organizer, utils
+from tests.conftest import write
+
+
+@pytest.fixture
+def copies(workdir, monkeypatch):
+    utils.ensure_directories()
+    # Bloques pequeños para probar archivos que no caben en el hash parcial
+    monkeypatch.setattr(dedup, "PARTIAL_BLOCK_SIZE", 4)
+    folder = workdir / "d"
+    write(folder / "a.txt", "contenido A largo")
+    write(folder / "sub" / "a2.txt", "contenido A largo")
+    write(folder / "z.txt", "contenido A largo")
+    # Mismo tamaño, mismo principio y final, distinto en el medio
+    write(folder / "b.txt", "contenido B largo")
+    write(folder / "corto1.txt", "xy")
+    write(folder / "corto2.txt", "xy")
+    write(folder / "vacio1.txt", "")
+    write(folder / "vacio2.txt", "")
+    os.link(folder / "corto1.txt", folder / "enlace.txt")
+    return folder
+
+
+def test_find_duplicates_groups_by_content(copies):
+    found = dedup.find_duplicates(str(copies), workers=2)
+    groups = [(size, paths) for size, paths, _ in found]
+    assert groups == [
+        (17, [str(copies / "a.txt"), str(copies / "sub" / "a2.txt"), str(copies / "z.txt")]),
+        (2, [str(copies / "corto1.txt"), str(copies / "corto2.txt")]),
+    ]
+
+
+def test_report_duplicates(copies):
+    found = dedup.find_duplicates(str(copies))
+    dedup.report_duplicates(found, "dups.csv")
+    with open(os.path.join("reports", "dups.csv"), encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "grupo,tamaño,ruta,estado"
+    assert lines[1] == f"1,17,{copies / 'a.txt'},original"
+    assert len(lines) == 6
+
+
+@pytest.mark.parametrize("action", ["hardlink", "move", "delete"])
+def test_remove_duplicates_keeps_first_copy(copies, action):
+    actions = organizer.remove_duplicates(str(copies), action)
+    assert {a[1] for a in actions} == {
+        str(copies / "sub" / "a2.txt"),
+        str(copies / "z.txt"),
+        str(copies / "corto2.txt"),
+    }
+    for original, duplicate, _, _ in actions:
+        if action == "hardlink":
+            assert os.path.samefile(duplicate, original)
+        else:
+            assert not os.path.exists(duplicate)
+        assert os.path.exists(original)
+    if action == "move":
+        assert os.path.exists(copies / dedup.DUPLICATES_DIR / "sub" / "a2.txt")
+    assert dedup.find_duplicates(str(copies)) == []
+
+
+def test_remove_duplicates_dry_run(copies):
+    before = sorted(os.listdir(copies))
+    assert len(organizer.remove_duplicates(str(copies), "delete", dry_run=True)) == 3
+    assert sorted(os.listdir(copies)) == before
+
+
+def test_dedup_keeps_snapshot_digests(copies):
+    import json
+
+    from src import auditor
+
+    auditor.take_snapshot(str(copies), use_hash=True)
+    with open(auditor.DIGEST_CACHE_FILE, encoding="utf-8") as f:
+        before = json.load(f)
+    assert len(before) == 9
+
+    dedup.find_duplicates(str(copies))
+    with open(auditor.DIGEST_CACHE_FILE, encoding="utf-8") as f:
+        after = json.load(f)
+    assert after.items() >= before.items()
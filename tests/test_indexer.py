@@ -0,0 +1,115 @@
+import os
+
+from src import analyzer, indexer
+from tests.conftest import write
+
+
+def test_required_trigrams():
+    assert indexer.required_trigrams("error") == {"err", "rro", "ror"}
+    assert indexer.required_trigrams(r"ab\d+cde") == {"cde"}
+    assert indexer.required_trigrams("(?i)error") == set()
+    assert indexer.required_trigrams("er|xy") == set()
+
+
+def test_indexed_search_matches_full_search(compressed_tree):
+    folder, expected = compressed_tree
+    assert indexer.indexed_search(str(folder), r"error \d") == expected
+    assert indexer.indexed_search(str(folder), "nada") == {
+        f"{folder / 'd.zip'}::sub/c.txt": [(1, "nada")],
+        f"{folder / 'e.tar.gz'}::c.txt": [(1, "nada")],
+    }
+    assert indexer.indexed_search(str(folder), "inexistente") == {}
+
+
+def test_index_prunes_candidates_and_follows_changes(workdir):
+    folder = workdir / "docs"
+    first = write(folder / "a.txt", "hola mundo\n")
+    write(folder / "b.txt", "adios\n")
+    files = indexer.update_index(str(folder))
+    assert indexer.candidate_files(files, "mundo") == {os.path.abspath(first)}
+
+    write(folder / "b.txt", "otro mundo\n")
+    os.utime(folder / "b.txt", ns=(1, 1))
+    assert indexer.indexed_search(str(folder), "mundo") == analyzer.analyze_content(
+        str(folder), "mundo"
+    )
+    os.remove(first)
+    assert indexer.indexed_search(str(folder), "mundo") == {
+        str(folder / "b.txt"): [(1, "otro mundo")]
+    }
+
+
+def _indexed_paths():
+    conn = indexer._connect()
+    try:
+        return {path for (path,) in conn.execute("SELECT path FROM files")}
+    finally:
+        conn.close()
+
+
+def test_index_detects_same_size_rewrite_with_restored_mtime(workdir):
+    folder = workdir / "docs"
+    path = write(folder / "b.txt", "adios xxxxx\n")
+    indexer.update_index(str(folder))
+    st = os.stat(path)
+    write(folder / "b.txt", "adios mundo\n")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert indexer.indexed_search(str(folder), "mundo") == {path: [(1, "adios mundo")]}
+
+
+def test_partly_unreadable_archive_stays_out_of_the_index(compressed_tree, monkeypatch):
+    folder, expected = compressed_tree
+    archive = str(folder / "d.zip")
+    real_members = analyzer._iter_archive_members
+
+    def failing_members(path):
+        yield from real_members(path)
+        if path == archive:
+            raise OSError("archivo dañado")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(analyzer, "_iter_archive_members", failing_members)
+        indexer.update_index(str(folder))
+        assert archive not in _indexed_paths()
+        # Sin entrada en el índice siempre es candidato
+        files = indexer.update_index(str(folder))
+        assert archive in indexer.candidate_files(files, "nada")
+
+    indexer.update_index(str(folder))
+    assert archive in _indexed_paths()
+
+
+def test_long_literal_pattern_exceeds_sqlite_variable_limit(workdir, monkeypatch):
+    import random
+    import sqlite3
+    import string
+
+    connect = indexer._connect
+
+    def limited_connect():
+        conn = connect()
+        conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        return conn
+
+    monkeypatch.setattr(indexer, "_connect", limited_connect)
+    rng = random.Random(7)
+    literal = "".join(rng.choices(string.ascii_letters + string.digits, k=3000))
+    folder = workdir / "docs"
+    target = write(folder / "a.txt", literal + "\n")
+    write(folder / "b.txt", literal[:1500] + "\n")
+    files = indexer.update_index(str(folder))
+    assert len(indexer.required_trigrams(literal)) > 999
+    assert indexer.candidate_files(files, literal) == {os.path.abspath(target)}
+
+
+def test_index_from_older_schema_is_rebuilt(workdir):
+    import sqlite3
+
+    os.makedirs("snapshots")
+    conn = sqlite3.connect(indexer.INDEX_FILE)
+    conn.execute("CREATE TABLE files (id INTEGER PRIMARY KEY, path TEXT, mtime REAL, size INTEGER)")
+    conn.commit()
+    conn.close()
+    path = write(workdir / "docs" / "a.txt", "hola mundo\n")
+    assert indexer.indexed_search(str(workdir / "docs"), "mundo") == {path: [(1, "hola mundo")]}
+    assert _indexed_paths() == {os.path.abspath(path)}
@@ -0,0 +1,24 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from src import utils
+
+
+def _log_file():
+    with open(utils.LOG_FILE, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_pool_workers_write_to_the_log(workdir):
+    utils.print_warning("desde el padre")
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        list(executor.map(utils.print_warning, ["hijo 1", "hijo 2"]))
+    utils.stop_logging()
+    text = _log_file()
+    for message in ("desde el padre", "hijo 1", "hijo 2"):
+        assert f"Advertencia: {message}" in text
+
+
+def test_workers_forked_before_logging_starts(workdir):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        executor.submit(utils.print_error, "solo el hijo").result()
+    assert "Error: solo el hijo" in _log_file()
@@ -0,0 +1,47 @@
+from src import analyzer, utils
+from tests.conftest import write
+
+
+def _tree(workdir):
+    for i in range(6):
+        write(workdir / "d" / f"{i}.log", f"linea {i} error\n" * (200 * (i + 1)))
+    return str(workdir / "d")
+
+
+def _bytes_read(func, *args, **kwargs):
+    utils.reset_metrics()
+    result = func(*args, **kwargs)
+    return result, utils.get_metrics()["counters"]["bytes_read"]
+
+
+def test_with_counters_returns_deltas():
+    utils.count_metric("bytes_read", 5)
+    result, deltas = utils.with_counters(utils.count_metric, "bytes_read", 7)
+    assert result is None and deltas == {"bytes_read": 7}
+    utils.merge_counters({"bytes_read": 3, "stat_calls": 2})
+    assert utils.COUNTERS["bytes_read"] == 15 and utils.COUNTERS["stat_calls"] == 2
+
+
+def test_parallel_search_counters_reach_parent(workdir):
+    folder = _tree(workdir)
+    serial, serial_bytes = _bytes_read(analyzer.analyze_content, folder, "error")
+    parallel, parallel_bytes = _bytes_read(
+        analyzer.analyze_content, folder, "error", parallel=True, workers=2, chunk_size=4096
+    )
+    assert parallel == serial
+    assert parallel_bytes == serial_bytes > 0
+
+    _, pattern_bytes = _bytes_read(
+        analyzer.analyze_patterns, folder, ["error", "linea 3"], parallel=True, workers=2
+    )
+    assert pattern_bytes > 0
+
+
+def test_parallel_statistics_counters_reach_parent(workdir):
+    folder = _tree(workdir)
+    serial, serial_bytes = _bytes_read(analyzer.text_statistics, folder)
+    parallel, parallel_bytes = _bytes_read(
+        analyzer.text_statistics, folder, parallel=True, workers=2, chunk_size=4096
+    )
+    assert parallel["words"] == serial["words"]
+    assert parallel_bytes == serial_bytes > 0
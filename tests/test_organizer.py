@@ -0,0 +1,234 @@
+import errno
+import os
+
+import pytest
+
+from src import organizer
+from tests.conftest import write
+
+
+def _tree(workdir):
+    folder = workdir / "datos"
+    write(folder / "a.txt", "A")
+    write(folder / "b.jpg", "B")
+    write(folder / "c.txt", "C")
+    return folder
+
+
+def test_organize_by_extension_without_journals_dir(workdir):
+    folder = _tree(workdir)
+    assert not os.path.exists(organizer.JOURNAL_DIR)
+    organizer.organize_by_extension(str(folder))
+    assert sorted(os.listdir(folder)) == ["jpg", "txt"]
+    assert sorted(os.listdir(folder / "txt")) == ["a.txt", "c.txt"]
+
+
+def test_journal_stores_absolute_paths(workdir):
+    _tree(workdir)
+    organizer.organize_by_extension("datos")
+    (path, _, status), = organizer.list_journals()
+    assert status == "completo"
+    records = organizer.MoveJournal.read(path)
+    plans = [r for r in records if r["op"] == "plan"]
+    assert plans and all(os.path.isabs(r["src"]) and os.path.isabs(r["dst"]) for r in plans)
+
+
+def test_undo_restores_files(workdir):
+    folder = _tree(workdir)
+    organizer.organize_by_extension(str(folder))
+    (path, _, _), = organizer.list_journals()
+    assert organizer.undo_journal(path) == 3
+    assert sorted(os.listdir(folder)) == ["a.txt", "b.jpg", "c.txt"]
+    assert organizer.list_journals()[0][2] == "deshecho"
+
+
+def test_undo_does_not_overwrite_recreated_source(workdir):
+    folder = _tree(workdir)
+    organizer.organize_by_extension(str(folder))
+    (path, _, _), = organizer.list_journals()
+    write(folder / "a.txt", "NEW CONTENT")
+
+    assert organizer.undo_journal(path) == 2
+    assert (folder / "a.txt").read_text() == "NEW CONTENT"
+    assert (folder / "txt" / "a.txt").read_text() == "A"
+    # Sin undo_end: se puede reintentar cuando el conflicto se resuelve
+    assert organizer.list_journals()[0][2] == "deshecho parcialmente"
+    (folder / "a.txt").unlink()
+    assert organizer.undo_journal(path) == 1
+    assert (folder / "a.txt").read_text() == "A"
+    assert organizer.list_journals()[0][2] == "deshecho"
+
+
+def test_cross_device_moves_and_undo(workdir, monkeypatch):
+    folder = _tree(workdir)
+    real_link = os.link
+
+    def link(src, dst, **kwargs):
+        if os.path.basename(src) == "b.jpg":
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        real_link(src, dst, **kwargs)
+
+    monkeypatch.setattr(os, "link", link)
+    organizer.organize_by_extension(str(folder))
+    assert (folder / "jpg" / "b.jpg").read_text() == "B"
+
+    (path, _, _), = organizer.list_journals()
+    assert organizer.undo_journal(path) == 3
+    assert (folder / "b.jpg").read_text() == "B"
+    assert organizer.list_journals()[0][2] == "deshecho"
+
+
+def test_resume_completes_interrupted_plan(workdir):
+    folder = _tree(workdir)
+    moves = [
+        (str(folder / "a.txt"), str(folder / "txt" / "a.txt")),
+        (str(folder / "c.txt"), str(folder / "txt" / "c.txt")),
+    ]
+    journal = organizer.MoveJournal.create("mover", str(folder))
+    plan, _ = organizer._plan_moves(moves, journal)
+    os.rename(*plan[0])
+    journal.write({"op": "done", "id": 0})
+    journal.close()
+
+    (path, _, status), = organizer.list_journals()
+    assert status == "incompleto"
+    assert organizer.resume_journal(path) == 1
+    assert sorted(os.listdir(folder / "txt")) == ["a.txt", "c.txt"]
+    assert organizer.list_journals()[0][2] == "completo"
+
+
+def test_collisions_get_a_free_name(workdir):
+    folder = workdir / "x"
+    write(folder / "dest" / "a.txt", "viejo")
+    src = write(folder / "a.txt", "nuevo")
+    done, collisions, failed = organizer.execute_moves([(src, str(folder / "dest" / "a.txt"))])
+    assert (done, collisions, failed) == (1, 1, [])
+    assert (folder / "dest" / "a_1.txt").read_text() == "nuevo"
+    assert (folder / "dest" / "a.txt").read_text() == "viejo"
+
+
+def test_execute_moves_resolves_collisions_within_the_plan(workdir):
+    folder = workdir / "x"
+    write(folder / "dest" / "a.txt", "viejo")
+    moves = [
+        (write(folder / name / "a.txt", name), str(folder / "dest" / "a.txt"))
+        for name in ("uno", "dos")
+    ]
+    # Un archivo que sale de la carpeta destino deja libre su nombre
+    moves.append((str(folder / "dest" / "a.txt"), str(folder / "otra" / "a.txt")))
+    moves.append((write(folder / "tres" / "a.txt", "tres"), str(folder / "dest" / "a.txt")))
+
+    done, collisions, failed = organizer.execute_moves(moves)
+    assert (done, collisions, failed) == (4, 2, [])
+    assert (folder / "dest" / "a_1.txt").read_text() == "uno"
+    assert (folder / "dest" / "a_2.txt").read_text() == "dos"
+    assert (folder / "otra" / "a.txt").read_text() == "viejo"
+    assert (folder / "dest" / "a.txt").read_text() == "tres"
+
+
+def test_execute_moves_cross_device_fallback_and_failures(workdir, monkeypatch):
+    folder = _tree(workdir)
+
+    def link(src, dst, **kwargs):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", link)
+    moves = [
+        (str(folder / name), str(folder / "dest" / name))
+        for name in ("a.txt", "b.jpg", "no_existe.txt")
+    ]
+    done, collisions, failed = organizer.execute_moves(moves, workers=2)
+    assert (done, collisions) == (2, 0)
+    ((src, dst, error),) = failed
+    assert src == str(folder / "no_existe.txt") and isinstance(error, OSError)
+    assert sorted(os.listdir(folder / "dest")) == ["a.txt", "b.jpg"]
+
+    ((path, _, status),) = organizer.list_journals()
+    assert status == "completo"
+    records = organizer.MoveJournal.read(path)
+    assert sorted(r["id"] for r in records if r["op"] == "done") == [0, 1]
+
+
+def test_organize_by_rules_moves_and_undoes(workdir):
+    import json
+
+    folder = _tree(workdir)
+    write(folder / "aab.log", "L")
+    write(folder / "borrar.tmp", "T")
+    rules = {
+        "rules": [
+            {"glob": "*.tmp", "target": None},
+            {"regex": r"^(\w)\1", "target": "Dobles"},
+            {"extensions": ["jpg"], "target": "Imagenes/{ext}"},
+            {"target": "../fuera"},
+        ]
+    }
+    (workdir / "reglas.json").write_text(json.dumps(rules), encoding="utf-8")
+
+    actions = organizer.organize_by_rules(str(folder), "reglas.json")
+    assert sorted(os.path.relpath(dst, folder) for _, dst, _ in actions) == [
+        os.path.join("Dobles", "aab.log"),
+        os.path.join("Imagenes", "jpg", "b.jpg"),
+    ]
+    assert os.path.exists(folder / "Dobles" / "aab.log")
+    assert os.path.exists(folder / "borrar.tmp") and os.path.exists(folder / "a.txt")
+
+    ((journal, operation, status),) = organizer.list_journals()
+    assert (operation, status) == ("organize_by_rules", "completo")
+    organizer.undo_journal(journal)
+    assert os.path.exists(folder / "aab.log") and os.path.exists(folder / "b.jpg")
+    assert organizer.list_journals()[0][2] == "deshecho"
+
+
+def _appear_after_listing(monkeypatch, path, text):
+    """Crea `path` justo después de que el plan lista las carpetas destino."""
+    plan_moves = organizer._plan_moves
+
+    def plan_then_create(moves, journal):
+        result = plan_moves(moves, journal)
+        write(path, text)
+        return result
+
+    monkeypatch.setattr(organizer, "_plan_moves", plan_then_create)
+
+
+@pytest.mark.parametrize("hardlinks", [True, False])
+def test_moves_never_overwrite_a_late_destination(workdir, monkeypatch, hardlinks):
+    folder = _tree(workdir)
+    if not hardlinks:
+
+        def link(src, dst, **kwargs):
+            raise OSError(errno.EPERM, "Operation not permitted")
+
+        monkeypatch.setattr(os, "link", link)
+    _appear_after_listing(monkeypatch, folder / "txt" / "a.txt", "tardío")
+
+    organizer.organize_by_extension(str(folder))
+    assert (folder / "txt" / "a.txt").read_text() == "tardío"
+    assert (folder / "txt" / "a_1.txt").read_text() == "A"
+
+    ((path, _, _),) = organizer.list_journals()
+    assert organizer.undo_journal(path) == 3
+    assert (folder / "a.txt").read_text() == "A"
+    assert (folder / "txt" / "a.txt").read_text() == "tardío"
+
+
+def test_cross_device_moves_never_overwrite(workdir, monkeypatch):
+    folder = _tree(workdir)
+
+    def link(src, dst, **kwargs):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", link)
+    _appear_after_listing(monkeypatch, folder / "jpg" / "b.jpg", "tardío")
+    organizer.organize_by_extension(str(folder))
+    assert (folder / "jpg" / "b.jpg").read_text() == "tardío"
+    assert (folder / "jpg" / "b_1.jpg").read_text() == "B"
+
+
+def test_case_only_rename(workdir):
+    folder = workdir / "x"
+    src = write(folder / "nota.txt", "N")
+    done, collisions, failed = organizer.execute_moves([(src, str(folder / "NOTA.txt"))])
+    assert (done, failed) == (1, [])
+    assert os.listdir(folder) == ["NOTA.txt"]
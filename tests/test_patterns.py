@@ -0,0 +1,51 @@
+import re
+
+import pytest
+
+from src import analyzer
+from tests.conftest import write
+
+PATTERNS = [
+    "error",
+    "err",
+    "warning",
+    r"\d{3}",
+    "café",
+    r"(\w)\1",
+    "(?i)FATAL",
+    "no aparece",
+]
+
+
+@pytest.fixture
+def logs(workdir):
+    folder = workdir / "logs"
+    write(folder / "a.log", "error 500\nwarning lento\nok\nFatal: café\n")
+    write(folder / "sub" / "b.txt", "todo bien\nerror 404\nsseguir\n")
+    return str(folder)
+
+
+def test_literal_trie_matches_alternation():
+    literals = ["error", "err", "errata", "warn", "w.x"]
+    combined = re.compile(analyzer._trie_regex(literals))
+    for text in ["err", "errata", "warn", "w.x", "wax", "er", "xx error"]:
+        assert bool(combined.search(text)) == any(lit in text for lit in literals), text
+
+
+def test_group_refs_disable_prefilter():
+    prefilter, checks = analyzer.compile_pattern_set(["error", r"(\w)\1"])
+    assert prefilter is None and len(checks) == 2
+    prefilter, _ = analyzer.compile_pattern_set(["error", r"\d+", "ok"])
+    assert prefilter is not None
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_pattern_set_matches_individual_searches(logs, parallel):
+    results = analyzer.analyze_patterns(logs, PATTERNS, parallel=parallel, workers=2)
+    assert list(results) == PATTERNS
+    for pattern in PATTERNS:
+        assert results[pattern] == analyzer.analyze_content(logs, pattern), pattern
+
+
+def test_invalid_pattern_in_set(logs):
+    assert analyzer.analyze_patterns(logs, ["ok", "("]) == {"ok": {}, "(": {}}
@@ -0,0 +1,34 @@
+import os
+
+from src import analyzer, progress
+from tests.conftest import write
+
+
+def test_state_reports_totals_and_eta():
+    with progress.Progress("Probando") as task:
+        progress.set_total(4, 400)
+        progress.advance(1, 100)
+        state = task.state(task.start + 1)
+    assert state["files"] == 1 and state["total_files"] == 4
+    assert state["bytes"] == 100 and state["total_bytes"] == 400
+    assert state["eta_s"] == 3.0
+    # Fuera de la tarea, advance no tiene efecto
+    progress.advance(5, 500)
+    assert task.files == 1
+
+
+def test_parallel_cached_search_totals_include_hits(workdir):
+    paths = [write(workdir / f"{i}.txt", f"error {i}\n" * (i + 1)) for i in range(5)]
+    analyzer.analyze_content(str(workdir), "error", parallel=True, workers=2, use_cache=True)
+
+    write(workdir / "0.txt", "error cambiado\n")
+    os.utime(paths[0], ns=(1, 1))
+    write(workdir / "1.txt", "ok\n")
+    os.utime(paths[1], ns=(1, 1))
+    sizes = sum(os.path.getsize(path) for path in paths)
+    with progress.Progress("Buscando") as task:
+        analyzer.analyze_content(
+            str(workdir), "error", parallel=True, workers=2, use_cache=True
+        )
+    assert (task.files, task.total_files) == (5, 5)
+    assert task.bytes == task.total_bytes == sizes
@@ -0,0 +1,57 @@
+from src import analyzer
+from tests.conftest import write
+
+CSV = "metodo,latencia,estado\nGET,100,200\nPOST,300,500\nGET,500,200\nGET,x,404\n"
+
+LOG = (
+    "GET /a 120ms\n"
+    "GET /b\n"
+    "POST /c 80ms\n"
+    "nada que ver\n"
+    "POST /d\n"
+)
+LOG_REGEX = r"^(?P<metodo>[A-Z]+) (?P<ruta>\S+)(?: (?P<ms>\d+)ms)?"
+
+
+def test_csv_group_by_and_aggregates(workdir):
+    path = write(workdir / "t.csv", CSV)
+    headers, rows = analyzer.query_table(
+        path, group_by=["metodo"], aggregates=["count", "sum:latencia", "max:latencia"]
+    )
+    assert headers == ["metodo", "count", "sum(latencia)", "max(latencia)"]
+    assert rows == [["GET", 3, 600.0, 500.0], ["POST", 1, 300.0, 300.0]]
+
+
+def test_csv_numeric_and_regex_filters(workdir):
+    path = write(workdir / "t.csv", CSV)
+    _, rows = analyzer.query_table(path, where=["latencia>=300"], aggregates=["count"])
+    assert rows == [[2]]
+    _, rows = analyzer.query_table(path, where=["estado~^2"], aggregates=["count"])
+    assert rows == [[2]]
+
+
+def test_log_optional_groups_are_missing_values(workdir):
+    path = write(workdir / "app.log", LOG)
+    headers, rows = analyzer.query_table(
+        path,
+        group_by=["metodo"],
+        aggregates=["count", "avg:ms", "min:ms"],
+        log_regex=LOG_REGEX,
+    )
+    assert headers == ["metodo", "count", "avg(ms)", "min(ms)"]
+    assert rows == [["GET", 2, 120.0, 120.0], ["POST", 2, 80.0, 80.0]]
+
+
+def test_log_filters_skip_missing_values(workdir):
+    path = write(workdir / "app.log", LOG)
+    for where, count in ((["ms>100"], 1), (["ms==120"], 1), (["ms~^1"], 1), (["ms!=x"], 2)):
+        _, rows = analyzer.query_table(path, where=where, log_regex=LOG_REGEX)
+        assert rows == [[count]], where
+
+
+def test_log_group_by_optional_column(workdir):
+    path = write(workdir / "app.log", LOG)
+    _, rows = analyzer.query_table(path, group_by=["ms"], log_regex=LOG_REGEX)
+    assert rows == [["120", 1], ["80", 1], [None, 2]]
+    _, rows = analyzer.query_table(path, group_by=["metodo", "ms"], log_regex=LOG_REGEX)
+    assert rows == [["GET", "120", 1], ["GET", None, 1], ["POST", "80", 1], ["POST", None, 1]]
@@ -0,0 +1,60 @@
+import csv
+import gzip
+import json
+import os
+
+import pytest
+
+from src import analyzer, reporter, utils
+from tests.conftest import write
+
+
+@pytest.fixture(autouse=True)
+def dirs(workdir):
+    utils.ensure_directories()
+
+
+def _read(name):
+    with open(os.path.join(reporter.REPORT_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_streamed_txt_matches_generated_report(workdir):
+    write(workdir / "d" / "a.log", "error 1\nok\nerror 2\n")
+    write(workdir / "d" / "b.log", "error 3\n")
+    folder = str(workdir / "d")
+    reporter.generate_txt_report("Búsqueda", analyzer.analyze_content(folder, "error"), "a.txt")
+    rows = reporter.stream_txt_report("Búsqueda", analyzer.iter_matches(folder, "error"), "b.txt")
+    assert rows == 3
+    # Solo cambia la fecha de la cabecera
+    assert _read("a.txt").splitlines()[2:] == _read("b.txt").splitlines()[2:]
+
+
+def test_csv_and_jsonl_reports():
+    rows = [("a.log", 1, "error, con coma"), ("b.log", 2, 'comillas "dobles"')]
+    reporter.generate_csv_report(rows, ["archivo", "línea", "texto"], "r.csv")
+    with open(os.path.join(reporter.REPORT_DIR, "r.csv"), newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [["archivo", "línea", "texto"]] + [
+            [a, str(b), c] for a, b, c in rows
+        ]
+    assert reporter.stream_jsonl_report(iter(rows), ["archivo", "línea", "texto"], "r.jsonl") == 2
+    assert [json.loads(line) for line in _read("r.jsonl").splitlines()] == [
+        {"archivo": a, "línea": b, "texto": c} for a, b, c in rows
+    ]
+
+
+def test_compressed_stream_report():
+    rows = [("a", 1), ("b", 2)]
+    assert reporter.stream_csv_report(iter(rows), ["x", "y"], "r.csv", "gzip") == 2
+    with gzip.open(os.path.join(reporter.REPORT_DIR, "r.csv.gz"), "rt", encoding="utf-8") as f:
+        assert f.read().splitlines() == ["x,y", "a,1", "b,2"]
+    assert reporter.stream_csv_report(iter(rows), ["x"], "r.csv", "rar") is None
+
+
+def test_metrics_report(workdir):
+    path = write(workdir / "m.txt", "uno dos")
+    analyzer.count_words(path)
+    reporter.generate_metrics_report(utils.get_metrics(), "m")
+    data = json.loads(_read("m.json"))
+    assert data["counters"]["bytes_read"] == os.path.getsize(path)
+    assert "Métricas de ejecución" in _read("m.txt")
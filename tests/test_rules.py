@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from src.rules import RuleTable, load_rules, parse_size
+
+DAY = 86400
+NOW = 1_700_000_000
+
+
+def table(*rules):
+    return RuleTable(list(rules), now=NOW)
+
+
+def test_parse_size():
+    assert parse_size(10) == 10
+    assert parse_size("1.5KB") == 1536
+    assert parse_size("2 mb") == 2 * 1024**2
+    with pytest.raises(ValueError):
+        parse_size("mucho")
+
+
+def test_first_matching_rule_wins_across_selectors():
+    rules = table(
+        {"glob": "*.tmp", "target": None},
+        {"regex": "^factura_\\d+", "ignore_case": True, "target": "Facturas/{year}"},
+        {"extensions": ["jpg", ".PNG"], "target": "Imagenes"},
+        {"size": {"min": "1KB"}, "target": "Grandes"},
+        {"age_days": {"min": 365}, "target": "Archivo"},
+        {"target": "Otros/{ext}"},
+    )
+    recent = NOW - DAY
+    assert rules.match("a.tmp", 5000, recent) == 0
+    assert rules.match("FACTURA_12.jpg", 5000, recent) == 1
+    assert rules.match("foto.png", 5000, recent) == 2
+    assert rules.match("datos.csv", 5000, recent) == 3
+    assert rules.match("datos.csv", 10, NOW - 400 * DAY) == 4
+    assert rules.match("datos.csv", 10, recent) == 5
+    assert rules.target(5, "datos.CSV", recent) == "Otros/csv"
+    assert rules.target(0, "a.tmp", recent) is None
+
+
+def test_multi_part_extensions():
+    rules = table(
+        {"extensions": ["tar.gz", ".TGZ"], "target": "Paquetes"},
+        {"extensions": ["gz"], "target": "Comprimidos"},
+        {"extensions": ["txt"], "target": "Textos"},
+    )
+    assert rules.match("copia.TAR.gz", 0, NOW) == 0
+    assert rules.match("copia.2024.tar.gz", 0, NOW) == 0
+    assert rules.match("copia.tgz", 0, NOW) == 0
+    assert rules.match("log.gz", 0, NOW) == 1
+    assert rules.match("notas.v2.txt", 0, NOW) == 2
+    assert rules.match(".txt", 0, NOW) is None
+    assert rules.match("tar.gz", 0, NOW) == 1
+
+
+def test_size_ranges_min_inclusive_max_exclusive():
+    rules = table(
+        {"size": {"max": 100}, "target": "chico"},
+        {"size": {"min": 100, "max": 1000}, "target": "medio"},
+    )
+    assert rules.match("x", 99, NOW) == 0
+    assert rules.match("x", 100, NOW) == 1
+    assert rules.match("x", 1000, NOW) is None
+
+
+@pytest.mark.parametrize("first", [True, False])
+def test_regex_with_backreference(first):
+    backref = {"regex": r"^(\w)\1", "target": "dobles"}
+    glob = {"glob": "*.md", "target": "docs"}
+    rules = table(backref, glob) if first else table(glob, backref)
+    index = 0 if first else 1
+    assert rules.match("aab.txt", 1, NOW) == index
+    assert rules.match("abc.txt", 1, NOW) is None
+    assert rules.match("aab.md", 1, NOW) == 0
+
+
+def test_named_groups_and_inline_flags_are_kept_apart():
+    rules = table(
+        {"regex": r"(?P<x>\d)(?P=x)", "target": "a"},
+        {"regex": r"(?P<x>z)", "target": "b"},
+        {"regex": r"(?i)^informe", "target": "c"},
+        {"glob": "*.log", "target": "d"},
+    )
+    assert rules.match("v11.log", 1, NOW) == 0
+    assert rules.match("z.log", 1, NOW) == 1
+    assert rules.match("INFORME.txt", 1, NOW) == 2
+    assert rules.match("otro.log", 1, NOW) == 3
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        {"glob": "*.x", "regex": "x", "target": "a"},
+        {"glob": "*.x"},
+        {"regex": "(", "target": "a"},
+        {"glob": "*.x", "target": "{desconocido}"},
+    ],
+)
+def test_invalid_rules(rule):
+    with pytest.raises(ValueError):
+        table(rule)
+
+
+def test_load_rules(workdir):
+    (workdir / "reglas.json").write_text(
+        json.dumps({"rules": [{"extensions": ["txt"], "target": "Textos"}]})
+    )
+    assert load_rules("reglas.json").match("a.txt", 1, NOW) == 0
+    (workdir / "malas.json").write_text(json.dumps({"rules": [{"regex": "("}]}))
+    assert load_rules("malas.json") is None
@@ -0,0 +1,133 @@
+import os
+import random
+import re
+
+import pytest
+
+from src import analyzer
+from tests.conftest import write
+
+PATTERNS = [
+    r"\s$",
+    r"\s",
+    r"[^a-z]$",
+    r"\W$",
+    r"\D\d",
+    r"(?s)o.",
+    r"[\s\S]x",
+    r"error \d+",
+    r"^id=\d+7 ",
+    r"^$",
+    r"o$",
+    r"^\s*$",
+    r"\bfoo\b",
+    r"(?i)ERROR",
+    r"\w+@\w+\.com",
+    r"(?<=x)y",
+    r"(?<![^ ])z",
+    r"a|b\s",
+    r"(ab)\1",
+    r"[^\n]{30,}",
+]
+
+
+@pytest.fixture
+def big_file(workdir):
+    rng = random.Random(7)
+    words = ["foo", "error 17", "id=1237 ok", "ab ab", "abab", "x y", "xy", "z", " z", "a@b.com"]
+    lines = []
+    for _ in range(6000):
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(0, 5)))
+        line += rng.choice(["", " ", "\t", "9"])
+        lines.append(line)
+    text = "\n".join(lines)  # sin salto final en la última línea
+    assert len(text) >= analyzer.MMAP_MIN_SIZE
+    return write(workdir / "grande.txt", text)
+
+
+def _line_by_line(path, regex):
+    return [
+        (n, line)
+        for n, line in enumerate(analyzer.read_large_file(path), 1)
+        if regex.search(line)
+    ]
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_fast_path_matches_line_by_line(big_file, pattern):
+    regex = re.compile(pattern)
+    assert list(analyzer._iter_file_matches(big_file, regex)) == _line_by_line(big_file, regex)
+
+
+@pytest.mark.parametrize("pattern", [r"\s$", r"[^a]", r"\W", r"\D", r"(?s).", r"[\s\S]", r"(a)\1"])
+def test_newline_patterns_skip_fast_path(pattern):
+    assert analyzer._to_bytes_regex(re.compile(pattern)) is None
+
+
+@pytest.mark.parametrize("pattern", [r"error \d+", r"^foo.*bar$", r"\S+", r"[^\n]+"])
+def test_line_local_patterns_use_fast_path(pattern):
+    assert analyzer._to_bytes_regex(re.compile(pattern)) is not None
+
+
+def test_analyze_content_reads_compressed_and_archives(compressed_tree):
+    folder, expected = compressed_tree
+    results = analyzer.analyze_content(str(folder), r"error \d")
+    assert results == expected
+    assert analyzer.analyze_content(str(folder), r"error \d", parallel=True, workers=2) == results
+    assert analyzer.search_pattern_in_file(f"{folder / 'd.zip'}::sub/c.txt", "error") == [
+        (2, "error 3")
+    ]
+
+
+@pytest.mark.parametrize("name", ["d.zip", "e.tar.gz"])
+def test_single_file_reads_reject_whole_archives(compressed_tree, name):
+    folder, _ = compressed_tree
+    path = str(folder / name)
+    with pytest.raises(ValueError, match="archivador"):
+        list(analyzer.read_large_file(path))
+    with pytest.raises(ValueError, match="archivador"):
+        list(analyzer._iter_file_matches(path, re.compile("error")))
+    # Los miembros y los archivos comprimidos se siguen leyendo
+    member = f"{folder / 'd.zip'}::sub/c.txt"
+    assert list(analyzer.read_large_file(member)) == ["nada\n", "error 3\n"]
+    assert list(analyzer.read_large_file(str(folder / "b.log.gz"))) == ["error 2\n", "ok\n"]
+
+
+@pytest.fixture
+def many_logs(workdir):
+    folder = workdir / "many"
+    for i in range(12):
+        write(folder / f"d{i % 3}" / f"{i}.log", f"ok {i}\n" * (i * 20) + f"error {i}\n")
+    return folder
+
+
+def test_batches_are_size_bounded_and_largest_first(many_logs):
+    entries = list(analyzer._find_search_files(str(many_logs)))
+    batches = list(analyzer._batch_files_by_size(entries, 1000))
+    paths = [path for batch, _ in batches for path in batch]
+    assert sorted(paths) == sorted(entry.path for entry in entries)
+    sizes = [os.path.getsize(path) for path in paths]
+    assert sizes == sorted(sizes, reverse=True)
+    for batch, batch_bytes in batches[:-1]:
+        assert batch_bytes == sum(os.path.getsize(p) for p in batch) >= 1000
+        assert batch_bytes - os.path.getsize(batch[-1]) < 1000
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2000, 10**7])
+def test_parallel_search_matches_serial(many_logs, chunk_size):
+    folder = str(many_logs)
+    serial = analyzer.analyze_content(folder, r"error \d+")
+    assert len(serial) == 12
+    parallel = analyzer.analyze_content(
+        folder, r"error \d+", parallel=True, workers=3, chunk_size=chunk_size
+    )
+    assert parallel == serial
+    streamed = list(analyzer.iter_matches(folder, r"error \d+", parallel=True, workers=2))
+    assert sorted(streamed) == sorted(
+        (path, line, text) for path, found in serial.items() for line, text in found
+    )
+
+
+def test_invalid_regex_returns_empty(many_logs):
+    assert analyzer.analyze_content(str(many_logs), "(", parallel=True) == {}
+    assert list(analyzer.iter_matches(str(many_logs), "(")) == []
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Subsistemas que solo se importan en el comando o menú que los usa
+LAZY_MODULES = [
+    "src.organizer",
+    "src.analyzer",
+    "src.auditor",
+    "src.indexer",
+    "src.reporter",
+    "src.dedup",
+    "src.cache",
+    "sqlite3",
+    "concurrent.futures",
+]
+
+
+def _run(code, workdir):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize("module", ["src.main", "src.cli"])
+def test_import_is_lazy(workdir, module):
+    code = (
+        f"import sys, {module}; from src import utils; "
+        f"print(*[m for m in {LAZY_MODULES!r} if m in sys.modules]); "
+        "print('consola' if utils._console_ready else '')"
+    )
+    assert _run(code, workdir) == []
+    # Importar no crea logs/ ni ningún otro directorio
+    assert os.listdir(workdir) == []
+
+
+def test_command_imports_only_what_it_needs(workdir):
+    (workdir / "datos").mkdir()
+    code = (
+        "import sys; from src import cli; cli.run(['count', 'datos']); "
+        "print(*sorted(m for m in sys.modules if m.startswith('src.')))"
+    )
+    loaded = _run(code, workdir)
+    assert "src.analyzer" in loaded
+    assert "src.organizer" not in loaded and "src.auditor" not in loaded
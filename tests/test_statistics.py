@@ -0,0 +1,66 @@
+import gzip
+import random
+import zipfile
+
+import pytest
+
+from src import analyzer
+from tests.conftest import write
+
+WORDS = ["error", "ok", "Error", "año", "café", "x" * 40, "datos", "\tfin"]
+
+
+@pytest.fixture
+def corpus(workdir, monkeypatch):
+    # Bloques pequeños para que los cortes caigan dentro de las palabras
+    monkeypatch.setattr(analyzer, "COUNT_BLOCK_SIZE", 7)
+    rng = random.Random(3)
+    folder = workdir / "textos"
+    texts = {}
+    for i in range(4):
+        lines = (" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))) for _ in range(60))
+        texts[f"{i}.txt"] = "\n".join(lines) + "\n"
+        write(folder / f"{i}.txt", texts[f"{i}.txt"])
+    with gzip.open(folder / "c.log.gz", "wt", encoding="utf-8") as f:
+        f.write(texts["0.txt"])
+    with zipfile.ZipFile(folder / "z.zip", "w") as z:
+        z.writestr("m.txt", texts["1.txt"])
+    all_text = "".join(texts.values()) + texts["0.txt"] + texts["1.txt"]
+    return folder, texts, all_text
+
+
+def test_count_words_matches_split(corpus):
+    folder, texts, _ = corpus
+    for name, text in texts.items():
+        assert analyzer.count_words(str(folder / name)) == len(text.split())
+    assert analyzer.count_words(str(folder / "c.log.gz")) == len(texts["0.txt"].split())
+    assert analyzer.count_words(f"{folder / 'z.zip'}::m.txt") == len(texts["1.txt"].split())
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+@pytest.mark.parametrize("chunk_size", [16, 1000, 10**6])
+def test_text_statistics(corpus, parallel, chunk_size):
+    folder, _, all_text = corpus
+    stats = analyzer.text_statistics(
+        str(folder), top=3, parallel=parallel, workers=2, chunk_size=chunk_size
+    )
+    tokens = all_text.lower().split()
+    assert stats["files"] == 6
+    assert stats["words"] == len(tokens)
+    assert stats["lines"] == all_text.count("\n")
+    counts = {}
+    for token in tokens:
+        counts[token] = counts.get(token, 0) + 1
+    assert [count for _, count in stats["top"]] == sorted(counts.values(), reverse=True)[:3]
+    assert all(counts[token] == count for token, count in stats["top"])
+
+
+def test_file_ranges_never_split_words(corpus):
+    folder, texts, _ = corpus
+    path = str(folder / "2.txt")
+    size = len(texts["2.txt"].encode())
+    ranges = analyzer._file_ranges(path, size, 50)
+    assert ranges[0][1] == 0 and ranges[-1][2] == size
+    assert all(a[2] == b[1] for a, b in zip(ranges, ranges[1:]))
+    data = texts["2.txt"].encode()
+    assert all(data[end : end + 1] in b" \n\t" for _, _, end in ranges[:-1])
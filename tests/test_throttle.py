@@ -0,0 +1,68 @@
+import pytest
+
+from src import analyzer, throttle
+from tests.conftest import write
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = throttle.IOScheduler()
+    yield scheduler
+    throttle.SCHEDULER.configure()
+
+
+def test_inactive_by_default(scheduler):
+    assert not scheduler.active
+    assert not throttle.SCHEDULER.active
+
+
+def test_token_bucket_allows_one_second_burst(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(throttle.time, "monotonic", lambda: now[0])
+    bucket = throttle._TokenBucket(10)
+    assert bucket.reserve(10) == 0.0
+    assert bucket.reserve(5) == pytest.approx(0.5)
+    # En un segundo se recuperan 10 fichas: el saldo vuelve a 5
+    now[0] += 1.0
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(10) == pytest.approx(0.6)
+
+
+def test_worker_config_splits_budget(scheduler):
+    scheduler.configure(bytes_per_sec=1000, ops_per_sec=40, adaptive=True, max_concurrency=8)
+    assert scheduler.worker_config(4) == {
+        "bytes_per_sec": 250,
+        "ops_per_sec": 10,
+        "adaptive": True,
+        "max_concurrency": 2,
+    }
+
+
+def test_invalid_priority(scheduler):
+    assert scheduler.configure(priority="urgente") is False
+
+
+def test_adaptive_concurrency_backs_off_and_recovers(scheduler, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(throttle.time, "monotonic", lambda: now[0])
+    scheduler.configure(adaptive=True, max_concurrency=8)
+    scheduler.record(0.001)
+    now[0] = 1.0
+    scheduler.record(0.1)
+    assert scheduler.limit == 4 and scheduler.backoffs == 1
+    for _ in range(200):
+        scheduler.record(0.001)
+    assert scheduler.limit > 4
+
+
+def test_throttled_reads_return_same_content(workdir):
+    path = write(workdir / "a.log", "error 1\nok\n" * 1000)
+    expected = analyzer.analyze_content(str(workdir), "error")
+    throttle.SCHEDULER.configure(bytes_per_sec=10**9, ops_per_sec=10**6, adaptive=True)
+    try:
+        with throttle.open_read(path) as f:
+            assert f.read() == open(path, "rb").read()
+        assert analyzer.analyze_content(str(workdir), "error") == expected
+        assert throttle.SCHEDULER.stats()["active"]
+    finally:
+        throttle.SCHEDULER.configure()
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from src import utils
+from tests.conftest import write
+
+
+@pytest.fixture
+def folder(workdir):
+    folder = workdir / "arbol"
+    for name in ("b.txt", "a.log", "c.TXT", "sub/d.txt", "sub-x/e.log", "sub/z/f.txt"):
+        write(folder / name, name)
+    return folder
+
+
+def _walk(folder, **kwargs):
+    return [
+        os.path.relpath(entry.path, folder)
+        for entry in utils.walk_files(str(folder), sort=True, **kwargs)
+    ]
+
+
+def test_walk_files_sorted_by_path_components(folder):
+    paths = _walk(folder)
+    assert paths == [
+        "a.log",
+        "b.txt",
+        "c.TXT",
+        os.path.join("sub", "d.txt"),
+        os.path.join("sub", "z", "f.txt"),
+        os.path.join("sub-x", "e.log"),
+    ]
+    assert paths == sorted(paths, key=utils.path_sort_key)
+    unsorted = [os.path.relpath(e.path, folder) for e in utils.walk_files(str(folder))]
+    assert sorted(unsorted) == sorted(paths)
+
+
+def test_walk_files_filters(folder):
+    assert _walk(folder, extensions=(".log",)) == ["a.log", os.path.join("sub-x", "e.log")]
+    # Las extensiones distinguen mayúsculas
+    assert "c.TXT" not in _walk(folder, extensions=(".txt",))
+    assert _walk(folder, patterns=["[ab].*"]) == ["a.log", "b.txt"]
+    assert _walk(folder, max_depth=0) == ["a.log", "b.txt", "c.TXT"]
+    assert os.path.join("sub", "z", "f.txt") not in _walk(folder, max_depth=1)
+
+
+def test_walk_files_counts_and_reports_directories(folder):
+    seen = []
+    entries = list(utils.walk_files(str(folder), on_directory=seen.append))
+    assert sorted(seen) == sorted(
+        str(folder / name) for name in ("", "sub", "sub-x", os.path.join("sub", "z"))
+    )
+    counters = utils.get_metrics()["counters"]
+    assert counters["files_visited"] == len(entries) == 6
+    assert counters["dirs_scanned"] == 4
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="sin enlaces simbólicos")
+def test_walk_files_symlinked_directories(folder, workdir):
+    write(workdir / "fuera" / "g.txt", "g")
+    os.symlink(workdir / "fuera", folder / "enlace")
+    assert os.path.join("enlace", "g.txt") not in _walk(folder)
+    assert os.path.join("enlace", "g.txt") in _walk(folder, follow_symlinks=True)
+
+
+def test_walk_files_missing_directory(workdir):
+    assert list(utils.walk_files(str(workdir / "no_existe"))) == []
@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+
+import pytest
+
+from src import auditor
+from tests.conftest import write
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="requiere inotify")
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def watched(workdir):
+    folder = workdir / "datos"
+    write(folder / "a.txt", "uno")
+    write(folder / "sub" / "b.txt", "dos")
+    watcher = auditor.ChangeWatcher(str(folder), events_file=str(workdir / "eventos.jsonl"))
+    with watcher:
+        yield folder, watcher
+
+
+def _watched_dirs(watcher):
+    with watcher._lock:
+        return set(watcher._watches.values())
+
+
+def test_initial_scan_watches_every_directory(watched):
+    folder, watcher = watched
+    assert set(watcher.snapshot) == {str(folder / "a.txt"), str(folder / "sub" / "b.txt")}
+    assert _watched_dirs(watcher) == {str(folder), str(folder / "sub")}
+
+
+def test_changes_since_marker(watched):
+    folder, watcher = watched
+    watcher.mark("antes")
+    write(folder / "nueva" / "c.txt", "tres")
+    os.remove(folder / "a.txt")
+    assert _wait(lambda: watcher.changes_since("antes")["added"])
+    assert _wait(lambda: watcher.changes_since("antes")["removed"])
+    assert watcher.changes_since("antes") == {
+        "added": [str(folder / "nueva" / "c.txt")],
+        "removed": [str(folder / "a.txt")],
+        "modified": [],
+    }
+    assert str(folder / "nueva") in _watched_dirs(watcher)
+
+
+def test_unknown_marker_is_an_error(watched):
+    _, watcher = watched
+    assert watcher.changes_since("nunca") is None
+
+
+def test_directory_moved_out_stops_being_watched(watched, workdir):
+    folder, watcher = watched
+    os.rename(folder / "sub", workdir / "fuera")
+    assert _wait(lambda: str(folder / "sub") not in _watched_dirs(watcher))
+    assert str(folder / "sub" / "b.txt") not in watcher.snapshot
+
+    # Los cambios fuera del árbol ya no se atribuyen a la ruta vieja
+    write(workdir / "fuera" / "otro.txt", "x")
+    time.sleep(0.3)
+    assert all("otro.txt" not in path for path in watcher.snapshot)
+
+
+def test_deleted_directory_releases_its_watch(watched):
+    folder, watcher = watched
+    os.remove(folder / "sub" / "b.txt")
+    os.rmdir(folder / "sub")
+    assert _wait(lambda: _watched_dirs(watcher) == {str(folder)})
+    assert watcher.changes_since() == {
+        "added": [],
+        "removed": [str(folder / "sub" / "b.txt")],
+        "modified": [],
+    }
+
+
+def test_events_are_trimmed_to_the_oldest_marker(watched):
+    folder, watcher = watched
+    write(folder / "c.txt", "tres")
+    assert _wait(lambda: watcher.changes_since()["added"])
+    watcher.mark("despues")
+    assert len(watcher.events) == 1
+
+    # Sin "inicio" el punto más antiguo es "despues": el evento previo sobra
+    assert watcher.unmark("inicio")
+    assert watcher.events == []
+    write(folder / "d.txt", "cuatro")
+    assert _wait(lambda: watcher.changes_since("despues")["added"])
+    assert watcher.changes_since("despues")["added"] == [str(folder / "d.txt")]
+
+    assert watcher.unmark("despues")
+    assert not watcher.unmark("despues")
+    os.remove(folder / "d.txt")
+    time.sleep(0.3)
+    assert watcher.events == []
+
+
+def test_event_ids_continue_across_sessions(workdir):
+    folder = workdir / "datos"
+    events_file = str(workdir / "eventos.jsonl")
+    write(folder / "a.txt", "uno")
+    for name in ("b.txt", "c.txt"):
+        with auditor.ChangeWatcher(str(folder), events_file=events_file) as watcher:
+            start = watcher.mark("antes")
+            write(folder / name, name)
+            assert _wait(lambda: watcher.changes_since("antes")["added"])
+
+    events = auditor.read_watch_events(events_file)
+    ids = [event[0] for event in events]
+    assert ids == sorted(set(ids))
+    assert [event[3] for event in auditor.read_watch_events(events_file, since=start)] == [
+        str(folder / "c.txt")
+    ]
+
+
+@pytest.mark.parametrize("action", ["delete", "move"])
+def test_losing_the_root_stops_the_watch(watched, workdir, action):
+    import shutil
+
+    folder, watcher = watched
+    if action == "delete":
+        shutil.rmtree(folder)
+    else:
+        os.rename(folder, workdir / "movido")
+    assert _wait(lambda: not watcher.running)
+    assert watcher.snapshot == {}
+    assert _watched_dirs(watcher) == set()
+    assert sorted(watcher.changes_since()["removed"]) == [
+        str(folder / "a.txt"),
+        str(folder / "sub" / "b.txt"),
+    ]